@@ -2,6 +2,8 @@ from dash import Dash
 import dash_bootstrap_components as dbc
 from layout import create_layout
 from callbacks import register_callbacks
+from database.connector import DATABASE_PATH
+from database.migrate import apply_migrations
 from dotenv import load_dotenv
 import os
 
@@ -13,6 +15,9 @@ load_dotenv()
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
 
+# Upgrade the database schema in place before anything queries it
+apply_migrations(DATABASE_PATH)
+
 # Initialize the Dash app
 app = Dash(__name__, title="Kit Readiness Tool", external_stylesheets=[dbc.themes.BOOTSTRAP])
 
@@ -1,12 +1,18 @@
-from dash import Input, Output, html, dash_table
+from math import ceil
+
+from dash import Input, Output, State, html, dash_table
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from database.connector import (
     get_warehouse_health_metrics,
-    get_warehouse_transfers,
-    get_end_user_shipments,
+    get_network_kit_readiness,
+    get_warehouse_transfers_page,
+    count_warehouse_transfers,
+    get_end_user_shipments_page,
+    count_end_user_shipments,
 )
 
-from .utils import create_health_card
+from .utils import create_health_card, parse_filter_query
 
 
 def register_dashboard_callbacks(app):
@@ -16,6 +22,8 @@ def register_dashboard_callbacks(app):
             Output("inventory-management", "style"),
             Output("rebalance-container", "style"),
             Output("kit-calculator-container", "style"),
+            Output("transfers-container", "style"),
+            Output("shipments-container", "style"),
         ],
         [Input("tabs", "active_tab")],
     )
@@ -24,6 +32,8 @@ def register_dashboard_callbacks(app):
         inventory_style = {"display": "none"}
         rebalance_style = {"display": "none"}
         calculator_style = {"display": "none"}
+        transfers_style = {"display": "none"}
+        shipments_style = {"display": "none"}
 
         if active_tab == "home":
             return (
@@ -115,11 +125,14 @@ def register_dashboard_callbacks(app):
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         elif active_tab == "warehouse-health":
             # Moved health metrics content
             health_metrics = get_warehouse_health_metrics()
+            kit_readiness = get_network_kit_readiness()
 
             # Calculate overall statistics
             total_warehouses = len(health_metrics)
@@ -129,6 +142,7 @@ def register_dashboard_callbacks(app):
             critical_warehouses = sum(
                 1 for w in health_metrics if w["health_status"] == "Critical"
             )
+            total_possible_kits = sum(kit_readiness.values())
 
             # Create overview cards
             overview_stats = dbc.Row(
@@ -148,12 +162,23 @@ def register_dashboard_callbacks(app):
                             "Critical Warehouses", critical_warehouses, "danger"
                         )
                     ),
+                    dbc.Col(
+                        create_health_card(
+                            "Possible Kits", total_possible_kits, "primary"
+                        )
+                    ),
                 ]
             )
 
             # Create warehouse health table
             health_table = dash_table.DataTable(
-                data=[dict(row) for row in health_metrics],
+                data=[
+                    {
+                        **dict(row),
+                        "possible_kits": kit_readiness.get(row["warehouse_id"], 0),
+                    }
+                    for row in health_metrics
+                ],
                 columns=[
                     {"name": "Warehouse", "id": "warehouse_name"},
                     {
@@ -164,6 +189,7 @@ def register_dashboard_callbacks(app):
                     },
                     {"name": "Low Stock Items", "id": "low_stock_items"},
                     {"name": "Total Items", "id": "total_items"},
+                    {"name": "Possible Kits", "id": "possible_kits"},
                     {"name": "Status", "id": "health_status"},
                 ],
                 style_data_conditional=[
@@ -207,6 +233,8 @@ def register_dashboard_callbacks(app):
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         elif active_tab == "warehouse-inventory":
@@ -245,6 +273,8 @@ def register_dashboard_callbacks(app):
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         elif active_tab == "kit-calculator":
@@ -261,6 +291,8 @@ def register_dashboard_callbacks(app):
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         elif active_tab == "rebalance-warehouses":
@@ -281,72 +313,25 @@ def register_dashboard_callbacks(app):
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         elif active_tab == "scheduled-transfers":
-            transfers = get_warehouse_transfers()
-
-            transfers_table = dash_table.DataTable(
-                data=[dict(row) for row in transfers],
-                columns=[
-                    {
-                        "name": "Transfer Date",
-                        "id": "transfer_date",
-                    },
-                    {"name": "From", "id": "source_warehouse"},
-                    {"name": "To", "id": "destination_warehouse"},
-                    {"name": "Component", "id": "component_name"},
-                    {"name": "Quantity", "id": "quantity"},
-                ],
-                style_table={"overflowX": "auto"},
-                style_cell={"textAlign": "left", "padding": "10px"},
-                style_header={
-                    "backgroundColor": "rgb(230, 230, 230)",
-                    "fontWeight": "bold",
-                },
-                sort_action="native",
-                sort_mode="multi",
-            )
-
+            # The table itself lives in the layout and pages through the
+            # connector, so switching tabs no longer reloads the full history
+            transfers_style = {"display": "block"}
             return (
-                html.Div(
-                    [
-                        html.H3("Warehouse Transfers", className="mb-4"),
-                        dbc.Card(
-                            [
-                                dbc.CardHeader("Component Transfers"),
-                                dbc.CardBody(transfers_table),
-                            ]
-                        ),
-                    ]
-                ),
+                html.Div(html.H3("Warehouse Transfers", className="mb-4")),
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         elif active_tab == "scheduled-shipments":
-            shipments = get_end_user_shipments()
-
-            shipments_table = dash_table.DataTable(
-                data=[dict(row) for row in shipments],
-                columns=[
-                    {"name": "Shipment Date", "id": "shipment_date"},
-                    {"name": "Warehouse", "id": "source_warehouse"},
-                    {"name": "Destination", "id": "destination_name"},
-                    {"name": "Kit", "id": "kit_name"},
-                    {"name": "Quantity", "id": "quantity"},
-                ],
-                style_table={"overflowX": "auto"},
-                style_cell={"textAlign": "left", "padding": "10px"},
-                style_header={
-                    "backgroundColor": "rgb(230, 230, 230)",
-                    "fontWeight": "bold",
-                },
-                sort_action="native",
-                sort_mode="multi",
-            )
-
+            shipments_style = {"display": "block"}
             return (
                 html.Div(
                     [
@@ -357,17 +342,13 @@ def register_dashboard_callbacks(app):
                             color="primary",
                             className="mb-3",
                         ),
-                        dbc.Card(
-                            [
-                                dbc.CardHeader("Kit Shipments"),
-                                dbc.CardBody(shipments_table),
-                            ]
-                        ),
                     ]
                 ),
                 inventory_style,
                 rebalance_style,
                 calculator_style,
+                transfers_style,
+                shipments_style,
             )
 
         return (
@@ -375,4 +356,123 @@ def register_dashboard_callbacks(app):
             inventory_style,
             rebalance_style,
             calculator_style,
+            transfers_style,
+            shipments_style,
+        )
+
+    @app.callback(
+        [
+            Output("transfers-table", "data"),
+            Output("transfers-table", "page_count"),
+            Output("transfers-table-cursors", "data"),
+        ],
+        [
+            Input("tabs", "active_tab"),
+            Input("transfers-table", "page_current"),
+            Input("transfers-table", "page_size"),
+            Input("transfers-table", "sort_by"),
+            Input("transfers-table", "filter_query"),
+            Input("transfers-table-refresh", "data"),
+        ],
+        [State("transfers-table-cursors", "data")],
+    )
+    def update_transfers_page(
+        active_tab, page_current, page_size, sort_by, filter_query, refresh, cursors
+    ):
+        if active_tab != "scheduled-transfers":
+            raise PreventUpdate
+        return load_page(
+            get_warehouse_transfers_page,
+            count_warehouse_transfers,
+            ("transfer_date", "transfer_id"),
+            page_current,
+            page_size,
+            sort_by,
+            filter_query,
+            cursors,
         )
+
+    @app.callback(
+        [
+            Output("shipments-table", "data"),
+            Output("shipments-table", "page_count"),
+            Output("shipments-table-cursors", "data"),
+        ],
+        [
+            Input("tabs", "active_tab"),
+            Input("shipments-table", "page_current"),
+            Input("shipments-table", "page_size"),
+            Input("shipments-table", "sort_by"),
+            Input("shipments-table", "filter_query"),
+            Input("shipments-table-refresh", "data"),
+        ],
+        [State("shipments-table-cursors", "data")],
+    )
+    def update_shipments_page(
+        active_tab, page_current, page_size, sort_by, filter_query, refresh, cursors
+    ):
+        if active_tab != "scheduled-shipments":
+            raise PreventUpdate
+        return load_page(
+            get_end_user_shipments_page,
+            count_end_user_shipments,
+            ("shipment_date", "shipment_id"),
+            page_current,
+            page_size,
+            sort_by,
+            filter_query,
+            cursors,
+        )
+
+
+def load_page(
+    fetch_page,
+    count_rows,
+    default_columns,
+    page_current,
+    page_size,
+    sort_by,
+    filter_query,
+    cursors,
+):
+    """
+    Fetches one table page plus the page count.
+
+    cursors remembers the keyset (sort value, row id) where each visited
+    page ends, so stepping to the next page never needs an OFFSET. It is
+    reset whenever the sort, filter or page size changes.
+    """
+    default_sort_column, id_column = default_columns
+    page_current = page_current or 0
+    page_size = page_size or 25
+    sort = (sort_by[0]["column_id"], sort_by[0]["direction"]) if sort_by else None
+    filters = parse_filter_query(filter_query)
+
+    view = [list(sort) if sort else None, [list(f) for f in filters], page_size]
+    if not cursors or cursors.get("view") != view:
+        cursors = {"view": view, "after": {}}
+
+    try:
+        total = count_rows(filters)
+        page_count = max(1, ceil(total / page_size))
+        page_current = min(page_current, page_count - 1)
+        rows = fetch_page(
+            page_size,
+            sort,
+            filters,
+            cursors["after"].get(str(page_current)),
+            page_current * page_size,
+        )
+    except ValueError:
+        # A filter on an unsupported column or operator matches nothing
+        return [], 1, cursors
+
+    # DataTable tracks selected rows by their "id" key across pages
+    for row in rows:
+        row["id"] = row[id_column]
+
+    if rows:
+        sort_column = sort[0] if sort else default_sort_column
+        last = rows[-1]
+        cursors["after"][str(page_current + 1)] = [last[sort_column], last[id_column]]
+    return rows, page_count, cursors
@@ -1,40 +1,96 @@
-from dash import Input, Output, html, dash_table, State
+from dash import Input, Output, html, dash_table, dcc, no_update, State
 import dash_bootstrap_components as dbc
 from database.connector import (
+    StaleWriteError,
     get_warehouse_inventory,
     update_warehouse_inventory,
 )
 from dash.exceptions import PreventUpdate
 
 
+def inventory_snapshot(inventory):
+    """Quantity and row version of each component, as loaded into the table"""
+    return {
+        str(row["component_id"]): {
+            "quantity": row["quantity"],
+            "version": row["version"],
+        }
+        for row in inventory
+    }
+
+
+def inventory_changes(table_data, snapshot):
+    """Updates for the rows whose quantity differs from the snapshot"""
+    changes = []
+    for row in table_data:
+        original = snapshot.get(str(row["component_id"]))
+        if original and row["quantity"] != original["quantity"]:
+            changes.append(
+                {
+                    "component_id": row["component_id"],
+                    "quantity": row["quantity"],
+                    "version": original["version"],
+                }
+            )
+    return changes
+
+
 def register_inventory_callbacks(app):
     @app.callback(
-        Output("save-status", "children"),
+        [
+            Output("save-status", "children"),
+            Output("inventory-snapshot", "data"),
+        ],
         [
             Input("save-inventory", "n_clicks"),
         ],
         [
             State("inventory-table", "data"),
+            State("inventory-snapshot", "data"),
             State("common-warehouse-selector", "value"),
         ],
         prevent_initial_call=True,
     )
-    def save_inventory_changes(n_clicks, table_data, warehouse_id):
+    def save_inventory_changes(n_clicks, table_data, snapshot, warehouse_id):
         if not n_clicks or not table_data or not warehouse_id:
             raise PreventUpdate
 
-        updates = [
-            {"component_id": row["component_id"], "quantity": row["quantity"]}
-            for row in table_data
-        ]
+        updates = inventory_changes(table_data, snapshot or {})
+        if not updates:
+            return html.Div("No changes to save.", className="text-muted"), no_update
 
-        success = update_warehouse_inventory(warehouse_id, updates)
+        try:
+            success = update_warehouse_inventory(warehouse_id, updates)
+        except StaleWriteError as e:
+            names = {row["component_id"]: row["component_name"] for row in table_data}
+            changed = ", ".join(names.get(c, str(c)) for c in e.component_ids)
+            return (
+                html.Div(
+                    f"Not saved: {changed} changed since you loaded this "
+                    "warehouse. Reselect it to see the latest values.",
+                    className="text-danger",
+                ),
+                no_update,
+            )
 
         if success:
-            return html.Div("Changes saved successfully!", className="text-success")
+            # Saved rows are now one version ahead of what was loaded
+            snapshot = dict(snapshot)
+            for update in updates:
+                snapshot[str(update["component_id"])] = {
+                    "quantity": update["quantity"],
+                    "version": update["version"] + 1,
+                }
+            return (
+                html.Div("Changes saved successfully!", className="text-success"),
+                snapshot,
+            )
         else:
-            return html.Div(
-                "Error saving changes. Please try again.", className="text-danger"
+            return (
+                html.Div(
+                    "Error saving changes. Please try again.", className="text-danger"
+                ),
+                no_update,
             )
 
     @app.callback(
@@ -59,6 +115,8 @@ def register_inventory_callbacks(app):
                             "component_name": row["component_name"],
                             "description": row["description"],
                             "quantity": row["quantity"],
+                            "reserved": row["reserved"],
+                            "available": row["available"],
                             "min_stock": row["min_stock"],
                             "max_stock": row["max_stock"],
                         }
@@ -77,6 +135,18 @@ def register_inventory_callbacks(app):
                             "editable": True,
                             "type": "numeric",
                         },
+                        {
+                            "name": "Reserved",
+                            "id": "reserved",
+                            "editable": False,
+                            "type": "numeric",
+                        },
+                        {
+                            "name": "Available",
+                            "id": "available",
+                            "editable": False,
+                            "type": "numeric",
+                        },
                         {
                             "name": "Minimum Healthy Stock",
                             "id": "min_stock",
@@ -128,5 +198,6 @@ def register_inventory_callbacks(app):
                     className="mt-3",
                 ),
                 html.Div(id="save-status", className="mt-2"),
+                dcc.Store(id="inventory-snapshot", data=inventory_snapshot(inventory)),
             ]
         )
@@ -1,130 +1,336 @@
-from dash import Input, Output
+import os
+
+import numpy as np
+from dash import Input, Output, State, Patch, ctx, html
+from dash.exceptions import PreventUpdate
 from database.connector import (
+    cached,
     get_all_warehouses,
     get_all_destinations,
+    get_location,
+    get_table_versions,
 )
-import plotly.express as px
+
+LOCATION_TABLES = ("warehouses", "destinations")
+
+# Zoom level the map opens at, and the level from which every point is drawn
+# individually no matter how many there are
+INITIAL_ZOOM = 3
+CLUSTER_MAX_ZOOM = 10
+# Approximate on-screen width of one cluster cell, in pixels
+CLUSTER_CELL_PX = 60
+
+# Traces 0 and 1 of the base map, in this order
+LAYERS = [
+    dict(
+        kind="warehouse",
+        name="Warehouse",
+        color="#3072b4",
+        id_key="warehouse_id",
+        rows=get_all_warehouses,
+    ),
+    dict(
+        kind="destination",
+        name="Destination",
+        color="#e67e22",
+        id_key="destination_id",
+        rows=get_all_destinations,
+    ),
+]
+
+# The layers are followed by one slot per overlay. Slots start hidden and are
+# filled in place, so a selection change only sends the few changed values.
+OVERLAY_START = len(LAYERS)
+OVERLAY_SLOTS = [
+    dict(
+        mode="lines",
+        line=dict(width=2, color="#3072b4"),
+        name="Transfer Route",
+        hoverinfo="skip",
+    ),
+    dict(
+        mode="markers", marker=dict(size=12, color="#e74c3c"), name="Source Warehouse"
+    ),
+    dict(
+        mode="markers",
+        marker=dict(size=12, color="#27ae60"),
+        name="Destination Warehouse",
+    ),
+    dict(
+        mode="markers",
+        marker=dict(size=25, color="rgba(48, 114, 180, 0.3)", symbol="circle"),
+        name="Selection Highlight",
+        hoverinfo="skip",
+        showlegend=False,
+    ),
+    dict(mode="markers", marker=dict(size=8, color="#3072b4"), name="Active Warehouse"),
+]
+
+
+def cluster_threshold():
+    """Point count above which a layer is drawn as clusters when zoomed out"""
+    return int(os.getenv("MAP_CLUSTER_THRESHOLD", "500"))
+
+
+def zoom_level(zoom):
+    return int(min(max(np.floor(zoom), 0), CLUSTER_MAX_ZOOM))
+
+
+def cluster_points(lat, lon, level):
+    """
+    Groups points into square grid cells sized for the zoom level.
+
+    Returns the mean position and point count of every non-empty cell.
+    """
+    cell = CLUSTER_CELL_PX * 360 / (256 * 2**level)
+    cells = np.floor(np.column_stack([lat, lon]) / cell).astype(np.int64)
+    _, inverse, counts = np.unique(
+        cells, axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.ravel()
+    return (
+        np.bincount(inverse, weights=lat) / counts,
+        np.bincount(inverse, weights=lon) / counts,
+        counts,
+    )
+
+
+@cached(*LOCATION_TABLES)
+def location_layers():
+    """
+    Point ids and positions of every layer, with its clusters precomputed for
+    each zoom level below CLUSTER_MAX_ZOOM.
+    """
+    layers = []
+    for layer in LAYERS:
+        rows = [
+            r
+            for r in layer["rows"]()
+            if r["latitude"] is not None and r["longitude"] is not None
+        ]
+        lat = np.array([r["latitude"] for r in rows], dtype=float)
+        lon = np.array([r["longitude"] for r in rows], dtype=float)
+
+        clusters = {}
+        if len(rows) > 0:
+            for level in range(CLUSTER_MAX_ZOOM):
+                c_lat, c_lon, counts = cluster_points(lat, lon, level)
+                clusters[level] = dict(
+                    lat=c_lat.tolist(), lon=c_lon.tolist(), count=counts.tolist()
+                )
+
+        layers.append(
+            dict(
+                ids=[r[layer["id_key"]] for r in rows],
+                lat=lat.tolist(),
+                lon=lon.tolist(),
+                clusters=clusters,
+            )
+        )
+    return layers
+
+
+def is_clustered(points, level):
+    return len(points["ids"]) > cluster_threshold() and level < CLUSTER_MAX_ZOOM
+
+
+def layer_values(index, level, points=None):
+    """
+    Trace values for one layer at a zoom level.
+
+    Hover data is only the point id (or the cluster size); names and other
+    details are looked up when a point is clicked.
+    """
+    layer = LAYERS[index]
+    points = points or location_layers()[index]
+
+    if is_clustered(points, level):
+        clusters = points["clusters"][level]
+        return dict(
+            lat=clusters["lat"],
+            lon=clusters["lon"],
+            customdata=clusters["count"],
+            marker=dict(
+                color=layer["color"],
+                size=(8 + 4 * np.log2(clusters["count"])).round(1).tolist(),
+                opacity=0.7,
+            ),
+            hovertemplate=f"%{{customdata}} {layer['name']}s<extra></extra>",
+        )
+
+    return dict(
+        lat=points["lat"],
+        lon=points["lon"],
+        customdata=points["ids"],
+        marker=dict(color=layer["color"], size=8, opacity=1),
+        hovertemplate=f"{layer['name']} #%{{customdata}}<extra></extra>",
+    )
+
+
+@cached(*LOCATION_TABLES)
+def build_base_map(level=INITIAL_ZOOM):
+    """
+    Location layers at a zoom level with empty overlay slots, as a figure dict.
+
+    Cached until a write touches warehouses or destinations.
+    """
+    layers = location_layers()
+
+    data = [
+        dict(
+            type="scattermapbox",
+            mode="markers",
+            name=layer["name"],
+            **layer_values(index, level, layers[index]),
+        )
+        for index, layer in enumerate(LAYERS)
+    ]
+    data += [
+        dict(type="scattermapbox", lat=[], lon=[], visible=False, **slot)
+        for slot in OVERLAY_SLOTS
+    ]
+
+    lat = [value for points in layers for value in points["lat"]]
+    lon = [value for points in layers for value in points["lon"]]
+    center = dict(
+        lat=float(np.mean(lat)) if lat else 0, lon=float(np.mean(lon)) if lon else 0
+    )
+    layout = dict(
+        mapbox=dict(
+            style="carto-positron",
+            center=center,
+            zoom=INITIAL_ZOOM,
+            bearing=0,
+            pitch=0,
+        ),
+        # Keeps the user's pan and zoom when the figure is replaced or patched
+        uirevision="locations",
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        showlegend=True,
+        paper_bgcolor="white",
+        plot_bgcolor="white",
+        legend_title_text="Legend",
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
+    )
+    return dict(data=data, layout=layout)
+
+
+def overlay_updates(source_id, dest_id, inventory_id):
+    """Values for every overlay slot; unused slots are emptied and hidden"""
+    warehouses = {w["warehouse_id"]: w for w in get_all_warehouses()}
+    source = warehouses.get(source_id)
+    dest = warehouses.get(dest_id)
+    selected = warehouses.get(inventory_id)
+
+    def points(*locations, label=None):
+        return dict(
+            lon=[w["longitude"] for w in locations],
+            lat=[w["latitude"] for w in locations],
+            hovertext=(
+                [f"{label}: {w['warehouse_name']}" for w in locations]
+                if label
+                else None
+            ),
+            visible=True,
+        )
+
+    hidden = dict(lon=[], lat=[], hovertext=None, visible=False)
+    route = source and dest
+    return [
+        points(source, dest) if route else hidden,
+        points(source, label="Source") if route else hidden,
+        points(dest, label="Destination") if route else hidden,
+        points(selected) if selected else hidden,
+        points(selected, label="Selected") if selected else hidden,
+    ]
+
+
+def location_detail(kind, location_id):
+    location = get_location(kind, location_id)
+    if location is None:
+        return html.Div("Location not found", className="text-muted")
+
+    name = location.get("warehouse_name") or location.get("destination_name")
+    lines = [html.Strong(name), html.Span(f" ({kind.title()} #{location_id})")]
+    if location.get("location"):
+        lines.append(html.Div(location["location"]))
+    lines.append(
+        html.Div(
+            f"{location['latitude']:.4f}, {location['longitude']:.4f}",
+            className="text-muted",
+        )
+    )
+    return html.Div(lines)
 
 
 def register_map_callbacks(app):
     # Update map callback to use common selector
     @app.callback(
-        Output("map-content", "figure"),
+        [
+            Output("map-content", "figure"),
+            Output("map-base-version", "data"),
+            Output("map-zoom-level", "data"),
+        ],
         [
             Input("source-warehouse", "value"),
             Input("destination-warehouse", "value"),
             Input("common-warehouse-selector", "value"),
+            Input("map-content", "relayoutData"),
         ],
+        [State("map-base-version", "data"), State("map-zoom-level", "data")],
     )
-    def update_map_with_selections(source_id, dest_id, inventory_id):
-        warehouses = get_all_warehouses()
-        destinations = get_all_destinations()
-
-        # Create base map
-        fig = px.scatter_mapbox(
-            lat=[w["latitude"] for w in warehouses]
-            + [d["latitude"] for d in destinations],
-            lon=[w["longitude"] for w in warehouses]
-            + [d["longitude"] for d in destinations],
-            hover_name=[w["warehouse_name"] for w in warehouses]
-            + [d["destination_name"] for d in destinations],
-            color=["Warehouse" for _ in warehouses]
-            + ["Destination" for _ in destinations],
-            color_discrete_map={"Warehouse": "#3072b4", "Destination": "#e67e22"},
-            zoom=3,
-            mapbox_style="carto-positron",
-        )
+    def update_map_with_selections(
+        source_id, dest_id, inventory_id, relayout, base_version, current_level
+    ):
+        level = current_level
+        if ctx.triggered_id == "map-content":
+            zoom = (relayout or {}).get("mapbox.zoom")
+            if zoom is None or zoom_level(zoom) == current_level:
+                # Panning, or zooming within the same cluster level
+                raise PreventUpdate
+            level = zoom_level(zoom)
 
-        fig.update_layout(
-            mapbox=dict(bearing=0, pitch=0),
-            margin={"r": 0, "t": 0, "l": 0, "b": 0},
-            showlegend=True,
-            paper_bgcolor="white",
-            plot_bgcolor="white",
-            legend_title_text="Legend",
-            legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
-        )
+        version = get_table_versions(*LOCATION_TABLES)
+        updates = overlay_updates(source_id, dest_id, inventory_id)
 
-        # Handle rebalancing warehouse connections
-        if source_id and dest_id:
-            source = next(
-                (w for w in warehouses if w["warehouse_id"] == source_id), None
-            )
-            dest = next((w for w in warehouses if w["warehouse_id"] == dest_id), None)
-
-            if source and dest:
-                # Add connection line
-                fig.add_trace(
-                    dict(
-                        type="scattermapbox",
-                        lon=[source["longitude"], dest["longitude"]],
-                        lat=[source["latitude"], dest["latitude"]],
-                        mode="lines",
-                        line=dict(
-                            width=2,
-                            color="#3072b4",
-                        ),
-                        name="Transfer Route",
-                        hoverinfo="skip",
-                    )
-                )
+        if version is None or version != base_version:
+            # Locations changed since the browser got its copy: send it whole
+            figure = build_base_map(level)
+            for slot, values in enumerate(updates):
+                figure["data"][OVERLAY_START + slot].update(values)
+            return figure, version, level
 
-                # Add source and destination markers
-                fig.add_trace(
-                    dict(
-                        type="scattermapbox",
-                        lon=[source["longitude"]],
-                        lat=[source["latitude"]],
-                        mode="markers",
-                        marker=dict(size=12, color="#e74c3c"),
-                        name="Source Warehouse",
-                        hovertext=f"Source: {source['warehouse_name']}",
-                    )
-                )
+        figure = Patch()
+        if level != current_level:
+            layers = location_layers()
+            for index in range(len(LAYERS)):
+                values = layer_values(index, level, layers[index])
+                for key, value in values.items():
+                    figure["data"][index][key] = value
+        for slot, values in enumerate(updates):
+            for key, value in values.items():
+                figure["data"][OVERLAY_START + slot][key] = value
+        return figure, version, level
 
-                fig.add_trace(
-                    dict(
-                        type="scattermapbox",
-                        lon=[dest["longitude"]],
-                        lat=[dest["latitude"]],
-                        mode="markers",
-                        marker=dict(size=12, color="#27ae60"),
-                        name="Destination Warehouse",
-                        hovertext=f"Destination: {dest['warehouse_name']}",
-                    )
-                )
+    @app.callback(
+        Output("map-point-detail", "children"),
+        Input("map-content", "clickData"),
+        State("map-zoom-level", "data"),
+    )
+    def show_location_detail(click_data, level):
+        if not click_data:
+            raise PreventUpdate
 
-        # Handle inventory warehouse selection
-        if inventory_id:
-            selected = next(
-                (w for w in warehouses if w["warehouse_id"] == inventory_id), None
-            )
-            if selected:
-                # Add selection markers with proper names
-                fig.add_trace(
-                    dict(
-                        type="scattermapbox",
-                        lon=[selected["longitude"]],
-                        lat=[selected["latitude"]],
-                        mode="markers",
-                        marker=dict(
-                            size=25, color="rgba(48, 114, 180, 0.3)", symbol="circle"
-                        ),
-                        name="Selection Highlight",
-                        hoverinfo="skip",
-                        showlegend=False,
-                    )
-                )
-                fig.add_trace(
-                    dict(
-                        type="scattermapbox",
-                        lon=[selected["longitude"]],
-                        lat=[selected["latitude"]],
-                        mode="markers",
-                        marker=dict(size=8, color="#3072b4"),
-                        name="Active Warehouse",
-                        hovertext=f"Selected: {selected['warehouse_name']}",
-                    )
-                )
+        point = click_data["points"][0]
+        index = point.get("curveNumber")
+        if index is None or index >= len(LAYERS):
+            raise PreventUpdate
 
-        return fig
+        layer = LAYERS[index]
+        if is_clustered(location_layers()[index], level):
+            return html.Div(
+                f"{point['customdata']} {layer['name'].lower()}s here. "
+                "Zoom in to see them individually.",
+                className="text-muted",
+            )
+        return location_detail(layer["kind"], point["customdata"])
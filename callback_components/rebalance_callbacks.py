@@ -2,27 +2,138 @@ from dash import Input, Output, html, dash_table
 import dash_bootstrap_components as dbc
 from database.connector import (
     calculate_possible_kits,
+    get_all_warehouses,
     get_kit_components,
+    get_projected_kits,
+    get_projected_readiness,
     calculate_rebalance_suggestions,
+    calculate_network_rebalance,
 )
 
 from .utils import create_health_card
 
 
+def _suggestions_card(table, note=None):
+    body = [table]
+    if note:
+        body.append(html.Div(note, className="text-muted small mt-2"))
+    body.append(
+        html.Div(
+            dbc.Button(
+                "Schedule Transfer",
+                id="schedule-transfers",
+                color="primary",
+                className="mt-3",
+                n_clicks=0,  # Initialize with 0 clicks
+            ),
+            className="text-end",
+        )
+    )
+    return dbc.Card([dbc.CardHeader("Suggested Transfers"), dbc.CardBody(body)])
+
+
+def _network_plan_view(min_transfers, max_transfers):
+    plan = calculate_network_rebalance(min_transfers, max_transfers)
+
+    if not plan["transfers"]:
+        return (
+            html.Div(
+                "No transfers would increase network kit readiness.",
+                className="text-warning",
+            ),
+            [],
+        )
+
+    plan_table = dash_table.DataTable(
+        data=plan["transfers"],
+        columns=[
+            {"name": "Source", "id": "source"},
+            {"name": "Destination", "id": "destination"},
+            {"name": "Component", "id": "component"},
+            {"name": "Transfer Quantity", "id": "quantity", "type": "numeric"},
+            {"name": "Kit Gain", "id": "kit_gain", "type": "numeric"},
+            {"name": "Source Remaining", "id": "source_remaining"},
+            {"name": "Destination New Total", "id": "dest_new_total"},
+        ],
+        page_size=20,
+        sort_action="native",
+        style_table={"overflowX": "auto"},
+        style_cell={"textAlign": "left", "padding": "10px"},
+        style_header={
+            "backgroundColor": "var(--light)",
+            "fontWeight": "bold",
+        },
+        style_data_conditional=[
+            {
+                "if": {"filter_query": "{kit_gain} > 0"},
+                "backgroundColor": "rgba(39, 174, 96, 0.1)",
+            },
+        ],
+    )
+
+    metrics_cards = dbc.Row(
+        [
+            dbc.Col(
+                create_health_card(
+                    "Current Network Kits", plan["current_total"], "primary"
+                )
+            ),
+            dbc.Col(
+                create_health_card(
+                    "Planned Network Kits", plan["planned_total"], "success"
+                )
+            ),
+        ]
+    )
+
+    note = "Kit Gain is the number of kits lost if that transfer alone is skipped."
+    if not plan["complete"]:
+        note += " The time limit was reached, so the plan may be incomplete."
+
+    return (
+        html.Div([metrics_cards, html.Br(), _suggestions_card(plan_table, note)]),
+        plan["transfers"],
+    )
+
+
 def register_rebalance_callbacks(app):
     @app.callback(
         [
             Output("rebalance-suggestions", "children"),
             Output("suggestions-store", "data"),  # Add output for store
+            Output("rebalance-pair-selectors", "style"),
         ],
         [
+            Input("rebalance-mode", "value"),
             Input("source-warehouse", "value"),
             Input("destination-warehouse", "value"),
             Input("min-transfers", "value"),
             Input("max-transfers", "value"),
         ],
     )
-    def update_rebalance_suggestions(source_id, dest_id, min_transfers, max_transfers):
+    def update_rebalance_suggestions(
+        mode, source_id, dest_id, min_transfers, max_transfers
+    ):
+        # Use safe default values if not provided
+        min_transfers = max(1, min_transfers or 1)
+        max_transfers = max(min_transfers, max_transfers or 100)
+
+        if mode == "network":
+            try:
+                return _network_plan_view(min_transfers, max_transfers) + (
+                    {"display": "none"},
+                )
+            except Exception as e:
+                return (
+                    html.Div(
+                        "Error generating the network plan. Please try again.",
+                        className="text-danger",
+                    ),
+                    [],
+                    {"display": "none"},
+                )
+
+        pair_style = {}
         if not source_id or not dest_id or source_id == dest_id:
             return (
                 html.Div(
@@ -30,13 +141,10 @@ def register_rebalance_callbacks(app):
                     className="text-muted",
                 ),
                 [],
+                pair_style,
             )  # Return empty list for store
 
         try:
-            # Use safe default values if not provided
-            min_transfers = max(1, min_transfers or 1)
-            max_transfers = max(min_transfers, max_transfers or 100)
-
             results = calculate_rebalance_suggestions(
                 source_id, dest_id, min_transfers, max_transfers
             )
@@ -48,14 +156,31 @@ def register_rebalance_callbacks(app):
                         className="text-warning",
                     ),
                     [],
+                    pair_style,
                 )
 
+            # The transfer modal reads the route from each stored row
+            for suggestion in results["suggestions"]:
+                suggestion["source_id"] = source_id
+                suggestion["dest_id"] = dest_id
+
             suggestions_table = dash_table.DataTable(
                 data=results["suggestions"],
                 columns=[
                     {"name": "Component", "id": "component"},
                     {"name": "Transfer Quantity", "id": "quantity"},
                     {"name": "Impact", "id": "impact"},
+                    {"name": "Kits Unlocked", "id": "dest_kit_gain", "type": "numeric"},
+                    {
+                        "name": "Source Kits Lost",
+                        "id": "source_kit_loss",
+                        "type": "numeric",
+                    },
+                    {
+                        "name": "Net Kit Change",
+                        "id": "net_kit_change",
+                        "type": "numeric",
+                    },
                     {"name": "Source Remaining", "id": "source_remaining"},
                     {"name": "Destination New Total", "id": "dest_new_total"},
                 ],
@@ -105,29 +230,11 @@ def register_rebalance_callbacks(app):
                     [
                         metrics_cards,
                         html.Br(),
-                        dbc.Card(
-                            [
-                                dbc.CardHeader("Suggested Transfers"),
-                                dbc.CardBody(
-                                    [
-                                        suggestions_table,
-                                        html.Div(
-                                            dbc.Button(
-                                                "Schedule Transfer",
-                                                id="schedule-transfers",
-                                                color="primary",
-                                                className="mt-3",
-                                                n_clicks=0,  # Initialize with 0 clicks
-                                            ),
-                                            className="text-end",
-                                        ),
-                                    ]
-                                ),
-                            ]
-                        ),
+                        _suggestions_card(suggestions_table),
                     ]
                 ),
                 results["suggestions"],
+                pair_style,
             )
 
         except Exception as e:
@@ -137,6 +244,7 @@ def register_rebalance_callbacks(app):
                     className="text-danger",
                 ),
                 [],
+                pair_style,
             )
 
     @app.callback(
@@ -216,3 +324,90 @@ def register_rebalance_callbacks(app):
             {"display": "block"},
             {"display": "block"},
         )
+
+    @app.callback(
+        [
+            Output("projected-kits", "children"),
+            Output("projection-graph", "figure"),
+        ],
+        [
+            Input("common-warehouse-selector", "value"),
+            Input("projection-date", "date"),
+        ],
+    )
+    def update_kit_projection(warehouse_id, projection_date):
+        dates, readiness = get_projected_readiness()
+        names = {w["warehouse_id"]: w["warehouse_name"] for w in get_all_warehouses()}
+
+        # Every warehouse as a faint line, the selected one drawn on top
+        traces = [
+            dict(
+                type="scatter",
+                mode="lines",
+                x=dates,
+                y=totals,
+                name=names.get(w, f"Warehouse {w}"),
+                line=dict(width=1, color="rgba(120, 120, 120, 0.35)"),
+                showlegend=False,
+            )
+            for w, totals in readiness.items()
+            if w != warehouse_id
+        ]
+        if warehouse_id in readiness:
+            traces.append(
+                dict(
+                    type="scatter",
+                    mode="lines",
+                    x=dates,
+                    y=readiness[warehouse_id],
+                    name=names.get(warehouse_id, f"Warehouse {warehouse_id}"),
+                    line=dict(width=3, color="#3072b4"),
+                )
+            )
+        figure = dict(
+            data=traces,
+            layout=dict(
+                xaxis_title="Date",
+                yaxis_title="Possible Kits (all types)",
+                margin={"r": 10, "t": 10, "l": 50, "b": 40},
+                height=300,
+                hovermode="closest",
+            ),
+        )
+        if projection_date:
+            figure["layout"]["shapes"] = [
+                dict(
+                    type="line",
+                    x0=projection_date,
+                    x1=projection_date,
+                    yref="paper",
+                    y0=0,
+                    y1=1,
+                    line=dict(color="#e67e22", dash="dot"),
+                )
+            ]
+
+        if not warehouse_id or not projection_date:
+            return (
+                html.Div("Select a warehouse and date", className="text-muted"),
+                figure,
+            )
+        try:
+            projected = get_projected_kits(warehouse_id, projection_date)
+        except ValueError as e:
+            return html.Div(str(e), className="text-danger"), figure
+
+        table = dash_table.DataTable(
+            data=projected,
+            columns=[
+                {"name": "Kit Name", "id": "kit_name"},
+                {"name": "Projected Completions", "id": "possible_kits"},
+            ],
+            style_table={"overflowX": "auto"},
+            style_cell={"textAlign": "left", "padding": "10px"},
+            style_header={
+                "backgroundColor": "rgb(230, 230, 230)",
+                "fontWeight": "bold",
+            },
+        )
+        return table, figure
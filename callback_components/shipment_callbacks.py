@@ -4,8 +4,11 @@ from database.connector import (
     get_all_destinations,
     get_kit_details,
     create_end_shipment,
+    set_shipment_status,
 )
 
+from .utils import move_status_result
+
 
 def register_shipment_callbacks(app):
     @app.callback(
@@ -111,3 +114,30 @@ def register_shipment_callbacks(app):
             kit_options,
             message,
         )
+
+    @app.callback(
+        [
+            Output("shipment-status-message", "children"),
+            Output("shipments-table-refresh", "data"),
+            Output("shipments-table", "selected_row_ids"),
+        ],
+        [
+            Input("complete-selected-shipment", "n_clicks"),
+            Input("cancel-selected-shipment", "n_clicks"),
+        ],
+        [
+            State("shipments-table", "selected_row_ids"),
+            State("shipments-table-refresh", "data"),
+        ],
+        prevent_initial_call=True,
+    )
+    def update_shipment_status(complete_n, cancel_n, selected_ids, refresh):
+        # Completing moves the stock; cancelling only releases the reservation
+        status = (
+            "completed"
+            if ctx.triggered_id == "complete-selected-shipment"
+            else "cancelled"
+        )
+        return move_status_result(
+            set_shipment_status, selected_ids, status, "shipment", refresh
+        )
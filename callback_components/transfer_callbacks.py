@@ -2,8 +2,11 @@ from dash import Input, Output, html, State, dcc, ctx
 import dash_bootstrap_components as dbc
 from database.connector import (
     create_warehouse_transfer,
+    set_transfer_status,
 )
 
+from .utils import move_status_result
+
 
 def register_transfer_callbacks(app):
     @app.callback(
@@ -50,12 +53,19 @@ def register_transfer_callbacks(app):
                         html.Label("Select Component to Transfer:"),
                         dcc.Dropdown(
                             id="transfer-component-selector",
+                            # Values index the stored suggestions, since a
+                            # network plan can move one component on several routes
                             options=[
                                 {
-                                    "label": row["component"],
-                                    "value": row["component_id"],
+                                    "label": (
+                                        f"{row['component']} "
+                                        f"({row['source']} → {row['destination']})"
+                                        if "source" in row
+                                        else row["component"]
+                                    ),
+                                    "value": index,
                                 }
-                                for row in (suggestions or [])
+                                for index, row in enumerate(suggestions or [])
                             ],
                             className="mb-3",
                         ),
@@ -89,17 +99,22 @@ def register_transfer_callbacks(app):
             return False, component_selector, quantity_input, message
 
         elif triggered_id == "confirm-transfer":
-            if not all(
-                [source_id, dest_id, transfer_date, selected_component, quantity]
+            suggestions = suggestions or []
+            if (
+                selected_component is None
+                or selected_component >= len(suggestions)
+                or not all([transfer_date, quantity])
             ):
                 message = html.Div("Please fill in all fields", className="text-danger")
                 return True, component_selector, quantity_input, message
 
+            suggestion = suggestions[selected_component]
+
             # Create transfer record using correct function
             success = create_warehouse_transfer(
-                source_id=source_id,
-                dest_id=dest_id,
-                component_id=selected_component,
+                source_id=suggestion.get("source_id", source_id),
+                dest_id=suggestion.get("dest_id", dest_id),
+                component_id=suggestion["component_id"],
                 quantity=quantity,
                 transfer_date=transfer_date,
             )
@@ -111,3 +126,30 @@ def register_transfer_callbacks(app):
                 return True, component_selector, quantity_input, message
 
         return is_open, component_selector, quantity_input, message
+
+    @app.callback(
+        [
+            Output("transfer-status-message", "children"),
+            Output("transfers-table-refresh", "data"),
+            Output("transfers-table", "selected_row_ids"),
+        ],
+        [
+            Input("complete-selected-transfer", "n_clicks"),
+            Input("cancel-selected-transfer", "n_clicks"),
+        ],
+        [
+            State("transfers-table", "selected_row_ids"),
+            State("transfers-table-refresh", "data"),
+        ],
+        prevent_initial_call=True,
+    )
+    def update_transfer_status(complete_n, cancel_n, selected_ids, refresh):
+        # Completing moves the stock; cancelling only releases the reservation
+        status = (
+            "completed"
+            if ctx.triggered_id == "complete-selected-transfer"
+            else "cancelled"
+        )
+        return move_status_result(
+            set_transfer_status, selected_ids, status, "transfer", refresh
+        )
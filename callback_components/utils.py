@@ -1,4 +1,4 @@
-from dash import html
+from dash import html, no_update
 import dash_bootstrap_components as dbc
 
 
@@ -12,3 +12,91 @@ def create_health_card(title, value, color="success"):
         ),
         className="mb-4",
     )
+
+
+# Dash filter operators, longest first so "<=" is not read as "<"
+FILTER_OPERATORS = [
+    (">=", ">="),
+    ("<=", "<="),
+    ("!=", "!="),
+    ("ge ", ">="),
+    ("le ", "<="),
+    ("ne ", "!="),
+    ("lt ", "<"),
+    ("gt ", ">"),
+    ("eq ", "="),
+    ("<", "<"),
+    (">", ">"),
+    ("=", "="),
+    ("datestartswith ", "datestartswith"),
+    ("contains ", "contains"),
+    # LIKE is already case-insensitive for ASCII text
+    ("icontains ", "contains"),
+    ("scontains ", "contains"),
+]
+
+
+def parse_filter_query(filter_query):
+    """
+    Turns a DataTable filter_query into (column_id, operator, value) filters.
+
+    Handles the expressions the column filter boxes produce, such as
+    {quantity} > 5 && {component_name} contains "Flash". Parts that cannot be
+    parsed are skipped.
+    """
+    filters = []
+    for part in (filter_query or "").split(" && "):
+        if "{" not in part or "}" not in part:
+            continue
+        column_id = part[part.find("{") + 1 : part.find("}")]
+        expression = part[part.find("}") + 1 :].strip()
+
+        for token, operator in FILTER_OPERATORS:
+            if expression.startswith(token):
+                value = expression[len(token) :].strip()
+                break
+        else:
+            continue
+        if not value:
+            continue
+
+        if value[0] == value[-1] and value[0] in ("'", '"', "`") and len(value) > 1:
+            value = value[1:-1].replace("\\" + value[0], value[0])
+        else:
+            try:
+                value = float(value) if "." in value else int(value)
+            except ValueError:
+                pass
+        filters.append((column_id, operator, value))
+    return filters
+
+
+def move_status_result(set_status, selected_ids, status, label, refresh):
+    """
+    Completes or cancels the selected transfer or shipment.
+
+    Returns the status message, the next table refresh counter and the
+    selection to keep, for the complete/cancel button callbacks.
+    """
+    if not selected_ids:
+        return (
+            html.Div(f"Select a {label} first.", className="text-muted"),
+            no_update,
+            no_update,
+        )
+
+    if not set_status(selected_ids[0], status):
+        return (
+            html.Div(
+                f"Only pending {label}s can be completed or cancelled.",
+                className="text-danger",
+            ),
+            no_update,
+            no_update,
+        )
+
+    return (
+        html.Div(f"{label.title()} {status}.", className="text-success"),
+        (refresh or 0) + 1,
+        [],
+    )
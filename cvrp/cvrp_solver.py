@@ -1,11 +1,47 @@
 import sqlite3
-import math
 import json
 import heapq
+import hashlib
+from bisect import bisect_right
+import os
 from collections import defaultdict, namedtuple
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from solution_state import SolutionState
+
+EARTH_RADIUS_KM = 6371
+
+# Created on load for databases initialized before the table existed
+PATH_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS path_cache (
+    network_hash TEXT NOT NULL,
+    origin_id INTEGER NOT NULL,
+    destination_id INTEGER NOT NULL,
+    range_bucket INTEGER NOT NULL,
+    vehicle_id INTEGER NOT NULL,
+    max_hops INTEGER NOT NULL,
+    max_paths INTEGER NOT NULL,
+    paths TEXT NOT NULL,
+    PRIMARY KEY (network_hash, origin_id, destination_id, range_bucket, vehicle_id, max_hops, max_paths)
+)
+"""
+
+# Created on save for databases initialized before the table existed
+DELIVERY_STOPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS delivery_stops (
+    delivery_id INTEGER NOT NULL,
+    stop_number INTEGER NOT NULL,
+    location_id INTEGER NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (delivery_id, stop_number, inventory_id)
+)
+"""
+
 # Define data structures
 Vehicle = namedtuple(
     "Vehicle",
@@ -51,33 +87,75 @@ Route = namedtuple(
 )
 
 
+def parse_restricted_vehicle_types(value):
+    """Vehicle IDs in a routes.restricted_vehicle_types value, as a frozenset."""
+    if value is None:
+        return frozenset()
+    return frozenset(int(part) for part in str(value).split(",") if part.strip())
+
+
+def haversine_matrix(latitudes, longitudes):
+    """Great circle distances in kilometers between every pair of points."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    dlat = lat[None, :] - lat[:, None]
+    dlon = lon[None, :] - lon[:, None]
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
 class CVRPSolver:
     """Capacitated Vehicle Routing Problem Solver with multiple constraints."""
 
-    def __init__(self, db_path):
-        """Initialize the solver with database connection."""
+    def __init__(self, db_path, cache_dir=None):
+        """
+        Initialize the solver with database connection.
+
+        Precomputed data such as the distance matrix is cached in cache_dir,
+        which defaults to a .cvrp_cache folder next to the database.
+        """
         self.db_path = db_path
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), ".cvrp_cache"
+        )
         self.conn = None
         self.cursor = None
 
         # Data structures
         self.locations = {}  # location_id -> Location
+        self.location_ids_by_name = {}  # location name -> location_id
         self.vehicles = {}  # vehicle_id -> Vehicle
         self.inventory_types = {}  # inventory_id -> InventoryType
         self.inventory = defaultdict(dict)  # location_id -> {inventory_id -> quantity}
         self.demand = defaultdict(dict)  # location_id -> {inventory_id -> Demand}
         self.routes = {}  # (origin_id, destination_id) -> Route
         self.distances = {}  # (origin_id, destination_id) -> distance
+        self.location_ids = []  # matrix index -> location_id
+        self.location_index = {}  # location_id -> matrix index
+        self.distance_matrix = None  # dense distances, route distances where known
+        self.distance_rows = []  # distance_matrix as nested lists, for scalar lookups
         self.vehicle_locations = defaultdict(
             dict
         )  # location_id -> {vehicle_id -> quantity}
 
-        # Solution state
-        self.available_vehicles = defaultdict(
-            dict
-        )  # Copy of vehicle_locations for tracking
-        self.available_inventory = defaultdict(dict)  # Copy of inventory for tracking
-        self.route_graph = defaultdict(list)  # adjacency list for path finding
+        # Solution state: vehicles and inventory still available
+        self.solution_state = None  # SolutionState, built by load_data
+        self.route_restrictions = {}  # (origin_id, destination_id) -> vehicle IDs
+        self.restricted_range = {}  # vehicle_id -> shortest route it may not use
+        self.refuel_flags = []  # matrix index -> refuel_capable
+        self.route_graphs = {}  # graph_key -> CSR (indptr, indices, distances)
+
+        # Path search cache, kept across solves while the network is unchanged
+        self.route_lengths = []  # sorted distinct route distances
+        self.network_hash = None  # fingerprint of locations and routes
+        self.path_cache = {}  # (origin, destination, *graph_key, hops, k) -> paths
+        self.unsaved_paths = set()  # path_cache keys not yet in the database
+        self.path_cache_hits = 0
+        self.path_cache_misses = 0
 
         # Load all data
         self._connect_db()
@@ -104,6 +182,12 @@ class CVRPSolver:
                 warehouse_capacity=row["warehouse_capacity"],
             )
 
+        self.location_ids_by_name = {
+            loc.name: loc_id for loc_id, loc in self.locations.items()
+        }
+        self.location_ids = sorted(self.locations)
+        self.location_index = {loc_id: i for i, loc_id in enumerate(self.location_ids)}
+
         # Load vehicles
         self.cursor.execute("SELECT * FROM vehicles")
         for row in self.cursor.fetchall():
@@ -163,8 +247,28 @@ class CVRPSolver:
                 "distance_km"
             ]
 
-            # Build adjacency list for routing
-            self.route_graph[row["origin_id"]].append(row["destination_id"])
+            try:
+                restricted = parse_restricted_vehicle_types(
+                    route.restricted_vehicle_types
+                )
+            except ValueError:
+                raise ValueError(
+                    f"Route {route.id} has invalid restricted_vehicle_types: "
+                    f"{route.restricted_vehicle_types!r}"
+                )
+            if restricted:
+                self.route_restrictions[
+                    (route.origin_id, route.destination_id)
+                ] = restricted
+                for vehicle_id in restricted:
+                    self.restricted_range[vehicle_id] = min(
+                        self.restricted_range.get(vehicle_id, float("inf")),
+                        route.distance_km,
+                    )
+
+        self._build_distance_matrix()
+        self._load_path_cache()
+        self._build_route_graphs()
 
         # Load vehicle locations
         self.cursor.execute("SELECT * FROM vehicle_locations")
@@ -174,7 +278,19 @@ class CVRPSolver:
             ]
 
         # Initialize solution state
-        self.reset_solution_state()
+        self.solution_state = SolutionState(
+            self.location_ids
+            + sorted(
+                (set(self.inventory) | set(self.vehicle_locations))
+                - set(self.location_index)
+            ),
+            sorted(set(self.inventory_types).union(*map(set, self.inventory.values()))),
+            sorted(
+                set(self.vehicles).union(*map(set, self.vehicle_locations.values()))
+            ),
+            self.inventory,
+            self.vehicle_locations,
+        )
 
         print(
             f"Loaded {len(self.locations)} locations, {len(self.vehicles)} vehicle types"
@@ -185,52 +301,279 @@ class CVRPSolver:
         print(f"Loaded {sum(len(dem) for dem in self.demand.values())} demand records")
         print(f"Loaded {len(self.routes)} routes")
 
+    def _build_distance_matrix(self):
+        """
+        Build the dense distance matrix: haversine distances between all
+        locations, overridden by the route distance wherever a route exists.
+
+        The haversine part only depends on the locations table, so it is
+        cached as a .npy file keyed by a hash of the location coordinates.
+        """
+        coords = np.array(
+            [
+                (self.locations[loc_id].latitude, self.locations[loc_id].longitude)
+                for loc_id in self.location_ids
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+        key = hashlib.sha256()
+        key.update(np.asarray(self.location_ids, dtype=np.int64).tobytes())
+        key.update(coords.tobytes())
+        cache_path = os.path.join(
+            self.cache_dir, f"distances_{key.hexdigest()[:16]}.npy"
+        )
+
+        matrix = None
+        if os.path.exists(cache_path):
+            try:
+                matrix = np.load(cache_path)
+            except (OSError, ValueError):
+                matrix = None
+            if matrix is not None and matrix.shape != (len(coords),) * 2:
+                matrix = None
+
+        if matrix is None:
+            matrix = haversine_matrix(coords[:, 0], coords[:, 1])
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Written under a temporary name so a reader never sees a
+                # partial file
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, matrix)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"Could not cache distance matrix: {e}")
+            else:
+                self._remove_stale_distance_caches(cache_path)
+
+        for (origin_id, destination_id), distance in self.distances.items():
+            matrix[
+                self.location_index[origin_id], self.location_index[destination_id]
+            ] = distance
+
+        self.distance_matrix = matrix
+        # Indexing nested lists is much cheaper than indexing an ndarray one
+        # element at a time, which is what the path search loops do
+        self.distance_rows = matrix.tolist()
+
+    def _remove_stale_distance_caches(self, cache_path):
+        """Delete distance matrices cached for earlier versions of the locations."""
+        current = os.path.basename(cache_path)
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("distances_") and name.endswith(".npy"):
+                if name != current:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def _load_path_cache(self):
+        """
+        Load cached path searches for the current network from the database.
+
+        Entries found on a different set of locations or routes are deleted,
+        so the cache only goes stale when the network itself changes.
+        """
+        self.route_lengths = sorted(set(self.distances.values()))
+
+        network = hashlib.sha256()
+        for loc_id in self.location_ids:
+            loc = self.locations[loc_id]
+            network.update(
+                repr((loc_id, loc.latitude, loc.longitude, loc.refuel_capable)).encode()
+            )
+        for key in sorted(self.distances):
+            restricted = sorted(self.route_restrictions.get(key, ()))
+            network.update(repr((key, self.distances[key], restricted)).encode())
+        self.network_hash = network.hexdigest()
+
+        self.path_cache = {}
+        self.unsaved_paths = set()
+        try:
+            # Caches written before searches were keyed by vehicle are dropped
+            columns = {
+                row[1] for row in self.cursor.execute("PRAGMA table_info(path_cache)")
+            }
+            if columns and "vehicle_id" not in columns:
+                self.cursor.execute("DROP TABLE path_cache")
+            self.cursor.execute(PATH_CACHE_SCHEMA)
+            self.cursor.execute(
+                "DELETE FROM path_cache WHERE network_hash != ?", (self.network_hash,)
+            )
+            self.conn.commit()
+            self.cursor.execute(
+                """
+                SELECT origin_id, destination_id, range_bucket, vehicle_id, max_hops,
+                       max_paths, paths
+                FROM path_cache WHERE network_hash = ?
+                """,
+                (self.network_hash,),
+            )
+        except sqlite3.Error as e:
+            print(f"Could not load path cache: {e}")
+            return
+
+        for row in self.cursor.fetchall():
+            key = tuple(row)[:6]
+            self.path_cache[key] = tuple(tuple(path) for path in json.loads(row[6]))
+
+        print(f"Loaded {len(self.path_cache)} cached path searches")
+
+    def save_path_cache(self):
+        """Persist path searches made since the last save to the database."""
+        if not self.unsaved_paths:
+            return
+
+        rows = [
+            (self.network_hash, *key, json.dumps(self.path_cache[key]))
+            for key in self.unsaved_paths
+        ]
+        try:
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO path_cache
+                (network_hash, origin_id, destination_id, range_bucket, vehicle_id,
+                 max_hops, max_paths, paths)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Could not save path cache: {e}")
+            return
+        self.unsaved_paths = set()
+
+    def clear_path_cache(self):
+        """Forget all cached path searches, in memory and in the database."""
+        self.path_cache = {}
+        self.unsaved_paths = set()
+        self.path_cache_hits = 0
+        self.path_cache_misses = 0
+        self.cursor.execute("DELETE FROM path_cache")
+        self.conn.commit()
+
+    def path_cache_stats(self):
+        """Hit and miss counts of the path search cache."""
+        lookups = self.path_cache_hits + self.path_cache_misses
+        return {
+            "entries": len(self.path_cache),
+            "hits": self.path_cache_hits,
+            "misses": self.path_cache_misses,
+            "hit_rate": self.path_cache_hits / lookups if lookups else 0.0,
+        }
+
+    def range_bucket(self, max_range):
+        """
+        Number of route legs no longer than max_range.
+
+        find_path only compares max_range against route lengths, so every
+        range in the same bucket allows exactly the same legs and finds the
+        same paths.
+        """
+        return bisect_right(self.route_lengths, max_range)
+
+    def graph_key(self, max_range, vehicle_id=None):
+        """
+        (range_bucket, vehicle_id) identifying the routes a search may use.
+
+        vehicle_id is 0 when no route within range is closed to the vehicle,
+        so vehicle types that only differ by range share graphs and cached
+        searches.
+        """
+        shortest_restricted = self.restricted_range.get(vehicle_id, float("inf"))
+        if vehicle_id is None or shortest_restricted > max_range:
+            vehicle_id = 0
+        return self.range_bucket(max_range), vehicle_id
+
+    def _build_route_graphs(self):
+        """Build the route graph of every vehicle type ahead of the searches."""
+        self.refuel_flags = [
+            self.locations[loc_id].refuel_capable for loc_id in self.location_ids
+        ]
+        self.route_graphs = {}
+        for vehicle in self.vehicles.values():
+            self.route_csr(vehicle.range_km, vehicle.id)
+
+    def route_csr(self, max_range, vehicle_id=None):
+        """
+        Routes a vehicle may drive, as compressed sparse rows over matrix
+        indices.
+
+        Returns (indptr, indices, distances): the routes leaving location
+        index i are indices[indptr[i]:indptr[i + 1]], with their distances.
+        Routes longer than max_range or closed to vehicle_id are left out, so
+        path searches never have to check them. Graphs are built once per
+        graph_key and kept as lists, which are cheaper than arrays to index
+        one element at a time.
+        """
+        key = self.graph_key(max_range, vehicle_id)
+        graph = self.route_graphs.get(key)
+        if graph is not None:
+            return graph
+
+        index = self.location_index
+        edges = [
+            (index[origin_id], index[destination_id], distance)
+            for (origin_id, destination_id), distance in self.distances.items()
+            if distance <= max_range
+            and key[1]
+            not in self.route_restrictions.get((origin_id, destination_id), ())
+        ]
+        sources = np.array([edge[0] for edge in edges], dtype=np.int64)
+        targets = np.array([edge[1] for edge in edges], dtype=np.int64)
+        distances = np.array([edge[2] for edge in edges], dtype=np.float64)
+
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(self.location_ids) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources, minlength=len(self.location_ids)), out=indptr[1:]
+        )
+
+        graph = (indptr.tolist(), targets[order].tolist(), distances[order].tolist())
+        self.route_graphs[key] = graph
+        return graph
+
     def reset_solution_state(self):
         """Reset the solution state to initial conditions."""
-        # Deep copy of inventory and vehicle locations
-        self.available_inventory = defaultdict(dict)
-        for loc_id, inv_dict in self.inventory.items():
-            for inv_id, qty in inv_dict.items():
-                self.available_inventory[loc_id][inv_id] = qty
-
-        self.available_vehicles = defaultdict(dict)
-        for loc_id, veh_dict in self.vehicle_locations.items():
-            for veh_id, qty in veh_dict.items():
-                self.available_vehicles[loc_id][veh_id] = qty
-
-    def haversine_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate the great circle distance between two points in kilometers."""
-        # Convert decimal degrees to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
-        # Haversine formula
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = (
-            math.sin(dlat / 2) ** 2
-            + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        )
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Radius of earth in kilometers
-        return c * r
+        self.solution_state.reset()
+
+    @property
+    def available_inventory(self):
+        """Snapshot of location_id -> {inventory_id -> available quantity}."""
+        return self.solution_state.inventory_dict()
+
+    @property
+    def available_vehicles(self):
+        """Snapshot of location_id -> {vehicle_id -> available count}."""
+        return self.solution_state.vehicles_dict()
 
     def get_distance(self, origin_id, destination_id):
         """Get the distance between two locations."""
-        # Check if we have a direct route
-        if (origin_id, destination_id) in self.distances:
-            return self.distances[(origin_id, destination_id)]
-
-        # If not, calculate using coordinates
-        origin = self.locations[origin_id]
-        destination = self.locations[destination_id]
-        return self.haversine_distance(
-            origin.latitude,
-            origin.longitude,
-            destination.latitude,
-            destination.longitude,
-        )
-
-    def find_path(self, origin_id, destination_id, max_range, max_hops=2):
+        # Route distance if there is a direct route, great circle otherwise
+        return self.distance_rows[self.location_index[origin_id]][
+            self.location_index[destination_id]
+        ]
+
+    def path_legs(self, path):
+        """Distance of each leg of a path."""
+        indices = [self.location_index[loc_id] for loc_id in path]
+        rows = self.distance_rows
+        return [rows[i][j] for i, j in zip(indices, indices[1:])]
+
+    def find_path(
+        self,
+        origin_id,
+        destination_id,
+        max_range,
+        max_hops=2,
+        blocked_edges=None,
+        blocked_nodes=None,
+        vehicle_id=None,
+    ):
         """
         Find a path from origin to destination respecting range constraints.
         Uses Dijkstra's algorithm with a limit on the number of hops.
@@ -240,151 +583,203 @@ class CVRPSolver:
             destination_id: Target location ID
             max_range: Maximum range of the vehicle in kilometers
             max_hops: Maximum number of intermediate stops allowed
+            blocked_edges: Optional set of (origin_id, destination_id) edges
+                to ignore, so callers can mask edges without changing the graph
+            blocked_nodes: Optional set of location IDs the path may not visit
+            vehicle_id: Optional vehicle type; routes closed to it are not used
 
         Returns:
             List of location IDs representing the path, or None if no path found
         """
+        # Routes out of range or closed to the vehicle are already pruned, so
+        # the search runs on matrix indices and only checks refuelling
+        indptr, indices, distances = self.route_csr(max_range, vehicle_id)
+        index = self.location_index
+        refuel_flags = self.refuel_flags
+        source = index[origin_id]
+        target = index[destination_id]
+        blocked_edges = {(index[a], index[b]) for a, b in blocked_edges or ()}
+        blocked_nodes = {index[loc_id] for loc_id in blocked_nodes or ()}
+
         # Priority queue for Dijkstra's algorithm
-        pq = [
-            (0, origin_id, [origin_id], 0)
-        ]  # (total_distance, current_id, path, hops)
+        pq = [(0, source, [source], 0)]  # (total_distance, current, path, hops)
         visited = set()  # Track visited locations for each hop count
 
         while pq:
-            total_dist, current_id, path, hops = heapq.heappop(pq)
+            total_dist, current, path, hops = heapq.heappop(pq)
 
             # If we've reached the destination, return the path
-            if current_id == destination_id:
-                return path
+            if current == target:
+                return [self.location_ids[i] for i in path]
 
             # Skip if we've visited this node with the same or fewer hops
-            state = (current_id, hops)
+            state = (current, hops)
             if state in visited:
                 continue
             visited.add(state)
 
+            begin, end = indptr[current], indptr[current + 1]
+
             # If we've reached the maximum number of hops, only try to go directly to destination
             if hops >= max_hops:
-                if destination_id in self.route_graph[current_id]:
-                    next_dist = self.get_distance(current_id, destination_id)
-                    if next_dist <= max_range:
-                        new_path = path + [destination_id]
-                        heapq.heappush(
-                            pq,
-                            (
-                                total_dist + next_dist,
-                                destination_id,
-                                new_path,
-                                hops + 1,
-                            ),
-                        )
+                if (current, target) not in blocked_edges:
+                    for j in range(begin, end):
+                        if indices[j] == target:
+                            heapq.heappush(
+                                pq,
+                                (
+                                    total_dist + distances[j],
+                                    target,
+                                    path + [target],
+                                    hops + 1,
+                                ),
+                            )
+                            break
                 continue
 
             # Try all neighbors
-            for next_id in self.route_graph[current_id]:
-                # Skip if already in path (avoid cycles)
-                if next_id in path:
-                    continue
-
-                # Calculate distance to next node
-                next_dist = self.get_distance(current_id, next_id)
+            for j in range(begin, end):
+                next_index = indices[j]
 
-                # Skip if beyond range
-                if next_dist > max_range:
+                # Skip if already in path (avoid cycles) or masked out
+                if (
+                    next_index in path
+                    or next_index in blocked_nodes
+                    or (current, next_index) in blocked_edges
+                ):
                     continue
 
                 # Skip if not a refuel point and not the destination
-                if (
-                    next_id != destination_id
-                    and not self.locations[next_id].refuel_capable
-                ):
+                if next_index != target and not refuel_flags[next_index]:
                     continue
 
                 # Add to queue
-                new_path = path + [next_id]
                 heapq.heappush(
-                    pq, (total_dist + next_dist, next_id, new_path, hops + 1)
+                    pq,
+                    (
+                        total_dist + distances[j],
+                        next_index,
+                        path + [next_index],
+                        hops + 1,
+                    ),
                 )
 
         # No path found
         return None
 
     def find_all_paths(
-        self, origin_id, destination_id, max_range, max_hops=2, max_paths=10
+        self,
+        origin_id,
+        destination_id,
+        max_range,
+        max_hops=2,
+        max_paths=10,
+        vehicle_id=None,
     ):
         """
-        Find multiple paths from origin to destination.
+        Find the shortest simple paths from origin to destination, using
+        Yen's k-shortest paths algorithm.
         Returns paths sorted by total distance.
 
+        Edges are masked per search rather than removed from the route graph,
+        so searches from several origins can run at the same time. Results
+        are cached by origin, destination, graph_key, hops and path count.
+
         Args:
             origin_id: Starting location ID
             destination_id: Target location ID
             max_range: Maximum range of the vehicle in kilometers
             max_hops: Maximum number of intermediate stops allowed
             max_paths: Maximum number of paths to return
+            vehicle_id: Optional vehicle type; routes closed to it are not used
 
         Returns:
             List of paths, where each path is a list of location IDs
         """
-        # Use Dijkstra's for the first path
-        first_path = self.find_path(origin_id, destination_id, max_range, max_hops)
+        key = (
+            origin_id,
+            destination_id,
+            *self.graph_key(max_range, vehicle_id),
+            max_hops,
+            max_paths,
+        )
+        cached = self.path_cache.get(key)
+        if cached is not None:
+            self.path_cache_hits += 1
+            return [list(path) for path in cached]
+
+        self.path_cache_misses += 1
+        paths = self._k_shortest_paths(
+            origin_id, destination_id, max_range, max_hops, max_paths, vehicle_id
+        )
+        self.path_cache[key] = tuple(tuple(path) for path in paths)
+        self.unsaved_paths.add(key)
+        return paths
+
+    def _k_shortest_paths(
+        self, origin_id, destination_id, max_range, max_hops, max_paths, vehicle_id
+    ):
+        """Yen's algorithm behind find_all_paths, without caching."""
+        first_path = self.find_path(
+            origin_id, destination_id, max_range, max_hops, vehicle_id=vehicle_id
+        )
         if not first_path:
             return []
 
-        all_paths = [first_path]
-
-        # Use a modified k-shortest paths approach
-        # We'll find alternative paths by temporarily removing edges from the best path
-        original_graph = dict(self.route_graph)  # Save original graph
-
-        for _ in range(1, max_paths):
-            if not all_paths:
-                break
-
-            # Get the last best path
-            prev_path = all_paths[-1]
+        paths = [first_path]
+        candidates = []  # heap of (distance, path)
+        seen = {tuple(first_path)}
 
-            # Try removing one edge at a time from the previous best path
-            found_alternative = False
+        while len(paths) < max_paths:
+            prev_path = paths[-1]
 
+            # Deviate from the previous path at each of its nodes in turn
             for i in range(len(prev_path) - 1):
-                u, v = prev_path[i], prev_path[i + 1]
-
-                # Temporarily remove this edge
-                self.route_graph[u] = [x for x in self.route_graph[u] if x != v]
+                spur_id = prev_path[i]
+                root = prev_path[: i + 1]
+
+                # Edges leaving the spur node on any accepted path sharing
+                # this root, so the spur path is a new deviation
+                blocked_edges = {
+                    (path[i], path[i + 1])
+                    for path in paths
+                    if len(path) > i + 1 and path[: i + 1] == root
+                }
+                # The root's own nodes, so the joined path stays simple
+                blocked_nodes = set(root[:-1])
 
-                # Find a new path
-                new_path = self.find_path(
-                    origin_id, destination_id, max_range, max_hops
+                # The root already used i of the allowed hops
+                spur_path = self.find_path(
+                    spur_id,
+                    destination_id,
+                    max_range,
+                    max_hops - i,
+                    blocked_edges,
+                    blocked_nodes,
+                    vehicle_id,
                 )
+                if not spur_path:
+                    continue
 
-                # Restore the edge
-                self.route_graph[u] = original_graph[u]
-
-                if new_path and new_path not in all_paths:
-                    all_paths.append(new_path)
-                    found_alternative = True
-                    break
+                path = root[:-1] + spur_path
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(
+                        candidates, (self.calculate_path_distance(path), path)
+                    )
 
-            if not found_alternative:
+            if not candidates:
                 break
+            paths.append(heapq.heappop(candidates)[1])
 
-        # Restore original graph (just to be safe)
-        self.route_graph = original_graph
-
-        # Sort paths by total distance
-        return sorted(all_paths, key=lambda path: self.calculate_path_distance(path))
+        return paths
 
     def calculate_path_distance(self, path):
         """Calculate the total distance of a path."""
         if not path or len(path) < 2:
             return float("inf")
 
-        total_distance = 0
-        for i in range(len(path) - 1):
-            total_distance += self.get_distance(path[i], path[i + 1])
-
-        return total_distance
+        return sum(self.path_legs(path))
 
     def calculate_path_time(self, path, vehicle):
         """
@@ -405,14 +800,12 @@ class CVRPSolver:
         # Loading time at origin
         total_time += vehicle.loading_time
 
-        for i in range(len(path) - 1):
-            # Travel time
-            distance = self.get_distance(path[i], path[i + 1])
-            travel_time = distance / vehicle.speed_kmh
-            total_time += travel_time
+        # Travel time
+        total_time += sum(self.path_legs(path)) / vehicle.speed_kmh
 
-            # Add refueling time at intermediate stops (except destination)
-            if i < len(path) - 2 and self.locations[path[i + 1]].refuel_capable:
+        # Add refueling time at intermediate stops (except destination)
+        for loc_id in path[1:-1]:
+            if self.locations[loc_id].refuel_capable:
                 total_time += vehicle.refuel_time
 
         # Unloading time at destination
@@ -420,14 +813,66 @@ class CVRPSolver:
 
         return total_time
 
-    def find_vehicle_for_delivery(self, origin_id, inventory_needs, max_hops=2):
+    def plan_loading(self, origin_id, vehicle, inventory_needs, destination_id):
+        """
+        Fill one vehicle from the stock available at a warehouse.
+
+        Items are taken in order of demand priority per unit volume, as many
+        units of each as the stock and the remaining capacity allow, so a
+        demand too large for one vehicle or one warehouse is partly loaded
+        rather than refused.
+
+        Args:
+            origin_id: Warehouse ID the vehicle leaves from
+            vehicle: Vehicle to load
+            inventory_needs: Dictionary mapping inventory_id to quantity needed
+            destination_id: Location whose demand priorities rank the items
+
+        Returns:
+            Dictionary mapping inventory_id to quantity to load, empty if
+            nothing fits
+        """
+        state = self.solution_state
+        destination_demand = self.demand.get(destination_id, {})
+
+        def value_density(inv_id):
+            demand = destination_demand.get(inv_id)
+            priority = demand.priority if demand else 1
+            unit = self.inventory_types[inv_id].volume_per_unit
+            return priority / unit if unit > 0 else float("inf")
+
+        loading_plan = {}
+        room = vehicle.capacity
+        for inv_id in sorted(
+            inventory_needs, key=lambda inv_id: (-value_density(inv_id), inv_id)
+        ):
+            qty = min(inventory_needs[inv_id], state.inventory_at(origin_id, inv_id))
+            unit = self.inventory_types[inv_id].volume_per_unit
+            if unit > 0:
+                qty = min(qty, int(room // unit))
+            if qty <= 0:
+                continue
+            loading_plan[inv_id] = qty
+            room -= qty * unit
+
+        return loading_plan
+
+    def find_vehicle_for_delivery(
+        self, origin_id, inventory_needs, max_hops=2, destination_id=None
+    ):
         """
         Find the best vehicle and route for a delivery.
 
+        Each vehicle is loaded by plan_loading, so the best delivery may carry
+        only part of inventory_needs; the rest is left for other vehicles and
+        warehouses.
+
         Args:
             origin_id: Starting warehouse ID
             inventory_needs: Dictionary mapping inventory_id to quantity needed
             max_hops: Maximum number of intermediate stops
+            destination_id: Location the delivery is for; None considers
+                every location with demand
 
         Returns:
             Tuple of (vehicle, path, loading_plan) or (None, None, None) if no solution
@@ -438,47 +883,37 @@ class CVRPSolver:
         best_loading_plan = None
         best_score = float("-inf")
 
-        # Calculate total volume needed
-        total_volume_needed = sum(
-            qty * self.inventory_types[inv_id].volume_per_unit
-            for inv_id, qty in inventory_needs.items()
-        )
+        state = self.solution_state
 
-        # Get available vehicles at this origin
-        available_vehicles_at_origin = self.available_vehicles.get(origin_id, {})
+        # Nothing to do here without stock of any needed item
+        if not any(
+            state.inventory_at(origin_id, inv_id) > 0 for inv_id in inventory_needs
+        ):
+            return best_vehicle, best_path, best_loading_plan
 
-        for vehicle_id, count in available_vehicles_at_origin.items():
+        if destination_id is None:
+            destinations = list(self.demand.keys())
+        else:
+            destinations = [destination_id]
+
+        # Get available vehicles at this origin
+        for vehicle_id, count in state.vehicles_at(origin_id):
             if count <= 0:
                 continue
 
             vehicle = self.vehicles[vehicle_id]
 
-            # Skip if vehicle capacity is insufficient
-            if vehicle.capacity < total_volume_needed:
-                continue
-
-            # Check inventory availability at origin
-            inventory_at_origin = self.available_inventory.get(origin_id, {})
-            loading_plan = {}
-            can_fulfill = True
-
-            for inv_id, qty_needed in inventory_needs.items():
-                available = inventory_at_origin.get(inv_id, 0)
-                if available < qty_needed:
-                    can_fulfill = False
-                    break
-                loading_plan[inv_id] = qty_needed
-
-            if not can_fulfill:
-                continue
-
-            # Find all possible destinations
-            destinations = list(self.demand.keys())
-
             for destination_id in destinations:
                 if destination_id == origin_id:
                     continue
 
+                # Load what this vehicle can carry from the stock at origin
+                loading_plan = self.plan_loading(
+                    origin_id, vehicle, inventory_needs, destination_id
+                )
+                if not loading_plan:
+                    continue
+
                 # Find paths from origin to destination
                 paths = self.find_all_paths(
                     origin_id,
@@ -486,6 +921,7 @@ class CVRPSolver:
                     vehicle.range_km,
                     max_hops,
                     max_paths=3,  # Limit to top 3 paths
+                    vehicle_id=vehicle.id,
                 )
 
                 for path in paths:
@@ -544,13 +980,104 @@ class CVRPSolver:
 
         return best_vehicle, best_path, best_loading_plan
 
-    def solve(self, max_hops=2, max_vehicles=None):
+    def _shared_state(self):
+        """Read-only solver data sent once to each worker process."""
+        return {
+            "locations": self.locations,
+            "vehicles": self.vehicles,
+            "inventory_types": self.inventory_types,
+            "demand": self.demand,
+            "routes": self.routes,
+            "route_restrictions": self.route_restrictions,
+            "restricted_range": self.restricted_range,
+            "refuel_flags": self.refuel_flags,
+            "route_graphs": self.route_graphs,
+            "distances": self.distances,
+            "location_ids": self.location_ids,
+            "location_index": self.location_index,
+            "distance_matrix": self.distance_matrix,
+            "route_lengths": self.route_lengths,
+            "path_cache": self.path_cache,
+            "solution_state": self.solution_state,
+        }
+
+    @classmethod
+    def _from_shared_state(cls, state):
+        """A solver without a database connection, for worker processes."""
+        solver = cls.__new__(cls)
+        solver.__dict__.update(state)
+        solver.db_path = None
+        solver.conn = None
+        solver.cursor = None
+        solver.distance_rows = solver.distance_matrix.tolist()
+        solver.unsaved_paths = set()
+        solver.path_cache_hits = 0
+        solver.path_cache_misses = 0
+        return solver
+
+    def evaluate_origins(
+        self, warehouse_ids, inventory_needs, max_hops, destination_id=None
+    ):
+        """
+        Run find_vehicle_for_delivery for each warehouse, in order.
+
+        Returns a list of (warehouse_id, vehicle, path, loading_plan).
+        """
+        return [
+            (warehouse_id,)
+            + self.find_vehicle_for_delivery(
+                warehouse_id, inventory_needs, max_hops, destination_id
+            )
+            for warehouse_id in warehouse_ids
+        ]
+
+    def _evaluate_origins_parallel(
+        self, pool, chunks, inventory_needs, max_hops, destination_id
+    ):
+        """
+        Evaluate chunks of warehouses in the worker pool.
+
+        Each task carries only the inventory and vehicle rows of its own
+        warehouses. New
+        path searches made by the workers are merged into this solver's
+        cache, and results come back in warehouse order whatever order the
+        tasks finish in.
+        """
+        futures = [
+            pool.submit(
+                _evaluate_origins_task,
+                chunk,
+                inventory_needs,
+                max_hops,
+                destination_id,
+                *self.solution_state.rows(chunk),
+            )
+            for chunk in chunks
+        ]
+
+        candidates = []
+        for future in futures:
+            results, new_paths, hits, misses = future.result()
+            for warehouse_id, vehicle_id, path, loading in results:
+                vehicle = self.vehicles[vehicle_id] if vehicle_id is not None else None
+                candidates.append((warehouse_id, vehicle, path, loading))
+            for key, paths in new_paths.items():
+                if key not in self.path_cache:
+                    self.path_cache[key] = paths
+                    self.unsaved_paths.add(key)
+            self.path_cache_hits += hits
+            self.path_cache_misses += misses
+        return candidates
+
+    def solve(self, max_hops=2, max_vehicles=None, workers=1):
         """
         Solve the CVRP problem.
 
         Args:
             max_hops: Maximum number of intermediate stops
             max_vehicles: Maximum number of vehicles to use (None for unlimited)
+            workers: Number of processes evaluating warehouses in parallel;
+                1 evaluates them in this process. Results are identical.
 
         Returns:
             List of delivery routes and solution statistics
@@ -558,7 +1085,42 @@ class CVRPSolver:
         # Reset solution state
         self.reset_solution_state()
 
+        warehouse_ids = [
+            loc_id for loc_id, loc in self.locations.items() if "WAREHOUSE" in loc.type
+        ]
+
+        pool = None
+        if workers > 1 and len(warehouse_ids) > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self._shared_state(),),
+            )
+
+        try:
+            deliveries, unfulfilled = self._assign_deliveries(
+                warehouse_ids, max_hops, max_vehicles, pool, workers
+            )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # Calculate statistics
+        stats = self._calculate_statistics(deliveries, unfulfilled)
+
+        return deliveries, stats
+
+    def _assign_deliveries(self, warehouse_ids, max_hops, max_vehicles, pool, workers):
+        """
+        Greedy assignment loop of solve(); returns deliveries and unmet demand.
+
+        Every delivery carries what one vehicle can load of the remaining
+        demand, so a location can be served by several vehicles and
+        warehouses. Stock and vehicles only run down, so a warehouse with
+        nothing to offer a location is not asked again for that location.
+        """
         # Track solution
+        state = self.solution_state
         deliveries = []
         vehicle_count = 0
 
@@ -582,6 +1144,7 @@ class CVRPSolver:
 
         # Process each location
         for loc_id, _ in locations_by_priority:
+            origins = list(warehouse_ids)
             while loc_id in unfulfilled and any(unfulfilled[loc_id].values()):
                 # Check if we've reached the vehicle limit
                 if max_vehicles is not None and vehicle_count >= max_vehicles:
@@ -598,25 +1161,32 @@ class CVRPSolver:
                     break
 
                 # Try each warehouse as a source
-                best_delivery = None
                 best_origin = None
                 best_vehicle = None
                 best_path = None
                 best_loading = None
 
-                for warehouse_id in self.locations:
-                    # Skip if not a warehouse
-                    if "WAREHOUSE" not in self.locations[warehouse_id].type:
-                        continue
-
-                    # Try to find a vehicle for this delivery
-                    vehicle, path, loading = self.find_vehicle_for_delivery(
-                        warehouse_id, current_demand, max_hops
+                if pool is not None:
+                    chunk_size = -(-len(origins) // workers)
+                    chunks = [
+                        origins[i : i + chunk_size]
+                        for i in range(0, len(origins), chunk_size)
+                    ]
+                    candidates = self._evaluate_origins_parallel(
+                        pool, chunks, current_demand, max_hops, loc_id
+                    )
+                else:
+                    candidates = self.evaluate_origins(
+                        origins, current_demand, max_hops, loc_id
                     )
 
+                # Candidates are in warehouse order in both modes, so the
+                # same one wins: the largest load, first warehouse on ties
+                origins = []
+                for warehouse_id, vehicle, path, loading in candidates:
                     if vehicle and path and loading:
-                        # Check if this is the first solution or better than current best
-                        if not best_delivery or (
+                        origins.append(warehouse_id)
+                        if best_loading is None or (
                             sum(loading.values()) > sum(best_loading.values())
                         ):
                             best_origin = warehouse_id
@@ -627,12 +1197,12 @@ class CVRPSolver:
                 # If we found a solution, add it to deliveries
                 if best_vehicle and best_path and best_loading:
                     # Update available vehicles
-                    self.available_vehicles[best_origin][best_vehicle.id] -= 1
+                    state.add_vehicles(best_origin, best_vehicle.id, -1)
                     vehicle_count += 1
 
                     # Update available inventory
                     for inv_id, qty in best_loading.items():
-                        self.available_inventory[best_origin][inv_id] -= qty
+                        state.add_inventory(best_origin, inv_id, -qty)
 
                         # Update unfulfilled demand
                         unfulfilled[loc_id][inv_id] -= qty
@@ -646,6 +1216,9 @@ class CVRPSolver:
                     # Create delivery record
                     delivery = {
                         "vehicle": best_vehicle._asdict(),
+                        "origin_id": best_origin,
+                        "destination_id": best_path[-1],
+                        "path_ids": list(best_path),
                         "origin": self.locations[best_origin]._asdict(),
                         "destination": self.locations[best_path[-1]]._asdict(),
                         "path": [
@@ -665,10 +1238,7 @@ class CVRPSolver:
                     # No solution for this location, move to next
                     break
 
-        # Calculate statistics
-        stats = self._calculate_statistics(deliveries, unfulfilled)
-
-        return deliveries, stats
+        return deliveries, unfulfilled
 
     def _calculate_statistics(self, deliveries, unfulfilled):
         """Calculate statistics for the solution."""
@@ -693,12 +1263,7 @@ class CVRPSolver:
         # Analyze warehouse usage
         warehouse_usage = defaultdict(int)
         for delivery in deliveries:
-            origin_id = next(
-                loc_id
-                for loc_id, loc in self.locations.items()
-                if loc.name == delivery["origin"]["name"]
-            )
-            warehouse_usage[origin_id] += 1
+            warehouse_usage[self.delivery_location_ids(delivery)[0]] += 1
 
         # Calculate balance metrics (how evenly warehouses are used)
         if warehouse_usage:
@@ -732,52 +1297,65 @@ class CVRPSolver:
 
         return stats
 
-    def save_solution(self, deliveries):
-        """Save the solution to the database."""
-        cursor = self.conn.cursor()
-
-        # Insert each delivery
-        for i, delivery in enumerate(deliveries):
-            # Generate delivery ID
-            delivery_id = i + 1
+    def delivery_location_ids(self, delivery):
+        """
+        Origin, destination and path location IDs of a delivery.
 
-            # Get location IDs
-            origin_id = next(
-                loc_id
-                for loc_id, loc in self.locations.items()
-                if loc.name == delivery["origin"]["name"]
+        Deliveries built by the solvers carry the IDs; for records that only
+        have location details, the IDs are looked up by location name.
+        """
+        if "path_ids" in delivery:
+            return (
+                delivery["origin_id"],
+                delivery["destination_id"],
+                delivery["path_ids"],
             )
 
-            destination_id = next(
-                loc_id
-                for loc_id, loc in self.locations.items()
-                if loc.name == delivery["destination"]["name"]
-            )
+        by_name = self.location_ids_by_name
+        return (
+            by_name[delivery["origin"]["name"]],
+            by_name[delivery["destination"]["name"]],
+            [by_name[loc["name"]] for loc in delivery["path"]],
+        )
 
-            # Generate timestamps
-            start_time = datetime.now().isoformat()
-            end_time = (datetime.now() + timedelta(hours=delivery["time"])).isoformat()
+    def delivery_stops(self, delivery):
+        """
+        (location_id, unloading) for each stop of a delivery, in order.
 
-            # Serialize path
-            path_ids = [
-                next(
-                    loc_id
-                    for loc_id, loc in self.locations.items()
-                    if loc.name == path_loc["name"]
-                )
-                for path_loc in delivery["path"]
-            ]
+        Multi-stop deliveries list their stops; any other delivery unloads
+        everything at its destination.
+        """
+        if "stops" not in delivery:
+            return [(self.delivery_location_ids(delivery)[1], delivery["loading"])]
+        return [
+            (
+                stop["location"]["id"]
+                if "id" in stop["location"]
+                else self.location_ids_by_name[stop["location"]["name"]],
+                stop["unloading"],
+            )
+            for stop in delivery["stops"]
+        ]
 
-            path_json = json.dumps(path_ids)
+    def save_solution(self, deliveries):
+        """
+        Save the solution to the database in a single transaction.
 
-            # Insert delivery record
-            cursor.execute(
-                """
-                INSERT INTO deliveries 
-                (delivery_id, vehicle_id, start_location_id, end_location_id, 
-                 start_time, end_time, total_distance_km, route_path)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+        Saving replaces the previous solution: every row in deliveries,
+        delivery_items and delivery_stops is deleted first, so the tables
+        only hold the latest saved solution.
+        """
+        cursor = self.conn.cursor()
+        now = datetime.now()
+        start_time = now.isoformat()
+
+        delivery_rows = []
+        item_rows = []
+        stop_rows = []
+        for delivery_id, delivery in enumerate(deliveries, start=1):
+            origin_id, destination_id, path_ids = self.delivery_location_ids(delivery)
+            end_time = (now + timedelta(hours=delivery["time"])).isoformat()
+            delivery_rows.append(
                 (
                     delivery_id,
                     delivery["vehicle"]["id"],
@@ -786,22 +1364,55 @@ class CVRPSolver:
                     start_time,
                     end_time,
                     delivery["distance"],
-                    path_json,
-                ),
+                    json.dumps(path_ids),
+                )
             )
-
-            # Insert delivery items
-            for inv_id, qty in delivery["loading"].items():
-                cursor.execute(
-                    """
-                    INSERT INTO delivery_items
-                    (delivery_id, inventory_id, quantity)
-                    VALUES (?, ?, ?)
-                    """,
-                    (delivery_id, inv_id, qty),
+            item_rows.extend(
+                (delivery_id, inv_id, qty)
+                for inv_id, qty in delivery["loading"].items()
+            )
+            for stop_number, (loc_id, unloading) in enumerate(
+                self.delivery_stops(delivery), start=1
+            ):
+                stop_rows.extend(
+                    (delivery_id, stop_number, loc_id, inv_id, qty)
+                    for inv_id, qty in unloading.items()
                 )
 
-        self.conn.commit()
+        try:
+            cursor.execute(DELIVERY_STOPS_SCHEMA)
+            cursor.execute("DELETE FROM delivery_stops")
+            cursor.execute("DELETE FROM delivery_items")
+            cursor.execute("DELETE FROM deliveries")
+            cursor.executemany(
+                """
+                INSERT INTO deliveries
+                (delivery_id, vehicle_id, start_location_id, end_location_id,
+                 start_time, end_time, total_distance_km, route_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                delivery_rows,
+            )
+            cursor.executemany(
+                """
+                INSERT INTO delivery_items
+                (delivery_id, inventory_id, quantity)
+                VALUES (?, ?, ?)
+                """,
+                item_rows,
+            )
+            cursor.executemany(
+                """
+                INSERT INTO delivery_stops
+                (delivery_id, stop_number, location_id, inventory_id, quantity)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                stop_rows,
+            )
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
         print(f"Saved {len(deliveries)} deliveries to database")
 
     def close(self):
@@ -811,6 +1422,41 @@ class CVRPSolver:
             self.conn = None
 
 
+# Solver copy of each worker process, built once from the shared state
+_worker_solver = None
+
+
+def _init_worker(state):
+    global _worker_solver
+    _worker_solver = CVRPSolver._from_shared_state(state)
+
+
+def _evaluate_origins_task(
+    warehouse_ids, inventory_needs, max_hops, destination_id, inventory, vehicles
+):
+    """
+    Evaluate warehouses against this worker's solver copy.
+
+    Returns the candidates, with vehicles as ids, and the path searches and
+    cache counts added since the previous task in this worker.
+    """
+    solver = _worker_solver
+    solver.solution_state.set_rows(warehouse_ids, inventory, vehicles)
+
+    results = [
+        (warehouse_id, vehicle.id if vehicle else None, path, loading)
+        for warehouse_id, vehicle, path, loading in solver.evaluate_origins(
+            warehouse_ids, inventory_needs, max_hops, destination_id
+        )
+    ]
+
+    new_paths = {key: solver.path_cache[key] for key in solver.unsaved_paths}
+    counts = (solver.path_cache_hits, solver.path_cache_misses)
+    solver.unsaved_paths = set()
+    solver.path_cache_hits = solver.path_cache_misses = 0
+    return results, new_paths, *counts
+
+
 # Example usage
 if __name__ == "__main__":
     # Create an instance of the CVRP solver
@@ -828,12 +1474,14 @@ if __name__ == "__main__":
     print(f"Total distance: {stats['total_distance']:.2f} km")
     print(f"Total time: {stats['total_time']:.2f} hours")
     print(f"Demand fulfillment rate: {stats['fulfillment_rate'] * 100:.2f}%")
+    print(f"Path cache hit rate: {solver.path_cache_stats()['hit_rate'] * 100:.1f}%")
     print("Warehouse usage:")
     for wh_name, count in stats["warehouse_usage"].items():
         print(f"  {wh_name}: {count} vehicles")
 
-    # Save solution to database
+    # Save solution and path searches to database
     solver.save_solution(deliveries)
+    solver.save_path_cache()
 
     # Close database connection
     solver.close()
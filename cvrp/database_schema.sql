@@ -102,6 +102,32 @@ CREATE TABLE delivery_items (
     FOREIGN KEY (inventory_id) REFERENCES inventory_types(inventory_id)
 );
 
+-- What each delivery unloads at each of its stops, in order of visit
+CREATE TABLE delivery_stops (
+    delivery_id INTEGER NOT NULL,
+    stop_number INTEGER NOT NULL, -- 1 for the first stop after the origin
+    location_id INTEGER NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (delivery_id, stop_number, inventory_id),
+    FOREIGN KEY (delivery_id) REFERENCES deliveries(delivery_id),
+    FOREIGN KEY (location_id) REFERENCES locations(location_id),
+    FOREIGN KEY (inventory_id) REFERENCES inventory_types(inventory_id)
+);
+
+-- Cached path searches, valid only for the network they were found on
+CREATE TABLE path_cache (
+    network_hash TEXT NOT NULL, -- Hash of the locations and routes searched
+    origin_id INTEGER NOT NULL,
+    destination_id INTEGER NOT NULL,
+    range_bucket INTEGER NOT NULL, -- Number of routes within the vehicle range
+    vehicle_id INTEGER NOT NULL, -- Vehicle type with restricted routes in range, else 0
+    max_hops INTEGER NOT NULL,
+    max_paths INTEGER NOT NULL,
+    paths TEXT NOT NULL, -- JSON array of paths, each an array of location_ids
+    PRIMARY KEY (network_hash, origin_id, destination_id, range_bucket, vehicle_id, max_hops, max_paths)
+);
+
 -- Index for faster queries
 CREATE INDEX idx_inventory_location ON inventory(location_id);
 CREATE INDEX idx_inventory_type ON inventory(inventory_id);
@@ -113,6 +113,32 @@ CREATE TABLE delivery_items (
     FOREIGN KEY (inventory_id) REFERENCES inventory_types(inventory_id)
 );
 
+-- What each delivery unloads at each of its stops, in order of visit
+CREATE TABLE delivery_stops (
+    delivery_id INTEGER NOT NULL,
+    stop_number INTEGER NOT NULL, -- 1 for the first stop after the origin
+    location_id INTEGER NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (delivery_id, stop_number, inventory_id),
+    FOREIGN KEY (delivery_id) REFERENCES deliveries(delivery_id),
+    FOREIGN KEY (location_id) REFERENCES locations(location_id),
+    FOREIGN KEY (inventory_id) REFERENCES inventory_types(inventory_id)
+);
+
+-- Cached path searches, valid only for the network they were found on
+CREATE TABLE path_cache (
+    network_hash TEXT NOT NULL, -- Hash of the locations and routes searched
+    origin_id INTEGER NOT NULL,
+    destination_id INTEGER NOT NULL,
+    range_bucket INTEGER NOT NULL, -- Number of routes within the vehicle range
+    vehicle_id INTEGER NOT NULL, -- Vehicle type with restricted routes in range, else 0
+    max_hops INTEGER NOT NULL,
+    max_paths INTEGER NOT NULL,
+    paths TEXT NOT NULL, -- JSON array of paths, each an array of location_ids
+    PRIMARY KEY (network_hash, origin_id, destination_id, range_bucket, vehicle_id, max_hops, max_paths)
+);
+
 -- Index for faster queries
 CREATE INDEX idx_inventory_location ON inventory(location_id);
 CREATE INDEX idx_inventory_type ON inventory(inventory_id);
@@ -123,6 +149,7 @@ CREATE INDEX idx_routes_destination ON routes(destination_id);"""
 
 from db_initializer import create_database
 from cvrp_solver import CVRPSolver
+from savings_solver import SavingsSolver
 from solution_visualizer import CVRPVisualizer
 
 
@@ -155,6 +182,30 @@ def parse_arguments():
         help="Maximum number of vehicles to use (default: unlimited)",
     )
 
+    parser.add_argument(
+        "--algorithm",
+        choices=["greedy", "savings"],
+        default="greedy",
+        help="greedy: one destination per vehicle; savings: multi-stop routes "
+        "built with Clarke-Wright savings and local search (default: greedy)",
+    )
+
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="Wall-clock seconds the savings algorithm may spend in total, "
+        "building and improving routes (default: no limit)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes evaluating warehouses in parallel, greedy algorithm "
+        "only (default: 1, serial)",
+    )
+
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -162,7 +213,11 @@ def parse_arguments():
         help="Directory to save output files (default: output)",
     )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    # The savings algorithm runs in a single process
+    if args.algorithm == "savings" and args.workers > 1:
+        parser.error("--workers only applies to --algorithm greedy")
+    return args
 
 
 def ensure_output_dir(output_dir):
@@ -206,6 +261,10 @@ def save_solution_summary(deliveries, stats, output_dir):
     # Save delivery details
     delivery_details = []
     for i, delivery in enumerate(deliveries):
+        # Single-stop deliveries unload everything at the destination
+        stops = delivery.get("stops") or [
+            {"location": delivery["destination"], "unloading": delivery["loading"]}
+        ]
         detail = {
             "Delivery ID": i + 1,
             "Origin": delivery["origin"]["name"],
@@ -220,6 +279,15 @@ def save_solution_summary(deliveries, stats, output_dir):
                     for inv_id, qty in delivery["loading"].items()
                 ]
             ),
+            "Stops": "; ".join(
+                stop["location"]["name"]
+                + ": "
+                + ", ".join(
+                    f"{qty} {delivery['inventory_types'][inv_id]['name']}"
+                    for inv_id, qty in stop["unloading"].items()
+                )
+                for stop in stops
+            ),
         }
         delivery_details.append(detail)
 
@@ -247,12 +315,23 @@ def main():
     start_time = time.time()
 
     solver = CVRPSolver(args.db)
-    deliveries, stats = solver.solve(
-        max_hops=args.max_hops, max_vehicles=args.max_vehicles
-    )
-
-    # Save solution to database
+    if args.algorithm == "savings":
+        deliveries, stats = SavingsSolver(solver).solve(
+            max_hops=args.max_hops,
+            max_vehicles=args.max_vehicles,
+            time_budget=args.time_budget,
+        )
+    else:
+        deliveries, stats = solver.solve(
+            max_hops=args.max_hops,
+            max_vehicles=args.max_vehicles,
+            workers=args.workers,
+        )
+
+    # Save solution and path searches to database
     solver.save_solution(deliveries)
+    solver.save_path_cache()
+    path_cache = solver.path_cache_stats()
     solver.close()
 
     end_time = time.time()
@@ -264,6 +343,10 @@ def main():
     print(f"Total time: {stats['total_time']:.2f} hours")
     print(f"Demand fulfillment rate: {stats['fulfillment_rate'] * 100:.2f}%")
     print(f"Balance score: {stats['balance_score']:.2f}")
+    print(
+        f"Path cache: {path_cache['hits']} hits, {path_cache['misses']} misses "
+        f"({path_cache['hit_rate'] * 100:.1f}% hit rate)"
+    )
     print("Warehouse usage:")
     for wh_name, count in stats["warehouse_usage"].items():
         print(f"  {wh_name}: {count} vehicles")
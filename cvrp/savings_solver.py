@@ -0,0 +1,534 @@
+import time
+from collections import defaultdict, namedtuple
+
+# One drop of goods at a destination: load maps inventory_id -> quantity
+Visit = namedtuple("Visit", ["destination_id", "load", "volume", "priority"])
+
+
+class SavingsSolver:
+    """
+    Multi-stop CVRP engine: Clarke-Wright savings construction followed by
+    2-opt, relocate and exchange local search.
+
+    Works on the data, distance matrix and path cache already loaded by a
+    CVRPSolver and produces deliveries in the same format as
+    CVRPSolver.solve, so statistics, saving and visualization are shared.
+    Routes are open: a vehicle leaves its warehouse, serves its stops in
+    order and does not return.
+    """
+
+    def __init__(self, solver):
+        """
+        Args:
+            solver: Loaded CVRPSolver providing data and path finding
+        """
+        self.solver = solver
+        self.max_hops = 2
+        self.deadline = None
+        self._legs = {}  # (from_id, to_id, *graph_key) -> (distance, path) or None
+        self._routes = {}  # (origin_id, stop ids, vehicle_id) -> (distance, path)
+
+    def solve(self, max_hops=2, max_vehicles=None, time_budget=None):
+        """
+        Solve the CVRP problem with the savings heuristic.
+
+        Args:
+            max_hops: Maximum number of intermediate stops between two
+                consecutive route stops
+            max_vehicles: Maximum number of vehicles to use (None for unlimited)
+            time_budget: Wall-clock seconds allowed for the whole solve. Once
+                it is spent, destinations not yet allocated stay unfulfilled,
+                no more routes are merged and improvement stops with the best
+                routes so far (None for no limit)
+
+        Returns:
+            List of delivery routes and solution statistics
+        """
+        solver = self.solver
+        started = time.perf_counter()
+        self.max_hops = max_hops
+        self.deadline = started + time_budget if time_budget is not None else None
+        solver.reset_solution_state()
+
+        visits = self._allocate_visits()
+
+        routes = []  # [origin_id, vehicle, stops]
+        for origin_id, origin_visits in visits.items():
+            routes.extend(
+                [origin_id, None, stops]
+                for stops in self._savings_routes(origin_id, origin_visits)
+            )
+        routes = self._assign_vehicles(routes, max_vehicles)
+
+        by_origin = defaultdict(list)
+        for route in routes:
+            by_origin[route[0]].append(route)
+        for origin_routes in by_origin.values():
+            self._improve(origin_routes)
+
+        # Vehicles whose stops were all moved elsewhere stay at the warehouse
+        for origin_id, vehicle, stops in routes:
+            if not stops:
+                solver.solution_state.add_vehicles(origin_id, vehicle.id, 1)
+
+        deliveries = [
+            self._delivery(origin_id, vehicle, stops)
+            for origin_id, vehicle, stops in routes
+            if stops
+        ]
+
+        # Whatever is not on a delivery is still unfulfilled
+        unfulfilled = {
+            loc_id: {inv_id: demand.quantity for inv_id, demand in items.items()}
+            for loc_id, items in solver.demand.items()
+        }
+        for origin_id, vehicle, stops in routes:
+            for visit in stops:
+                for inv_id, qty in visit.load.items():
+                    unfulfilled[visit.destination_id][inv_id] -= qty
+        for items in unfulfilled.values():
+            for inv_id in [inv_id for inv_id, qty in items.items() if qty <= 0]:
+                del items[inv_id]
+
+        return deliveries, solver._calculate_statistics(deliveries, unfulfilled)
+
+    def _out_of_time(self):
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def _vehicle_types(self, origin_id):
+        """Vehicle types stationed at a warehouse, smallest capacity first."""
+        return sorted(
+            (
+                self.solver.vehicles[vehicle_id]
+                for vehicle_id, count in self.solver.vehicle_locations[
+                    origin_id
+                ].items()
+                if count > 0
+            ),
+            key=lambda vehicle: (vehicle.capacity, vehicle.id),
+        )
+
+    def _leg(self, from_id, to_id, vehicle):
+        """Shortest feasible connection between two stops, or None."""
+        if from_id == to_id:
+            return 0.0, [from_id]
+
+        solver = self.solver
+        key = (from_id, to_id, *solver.graph_key(vehicle.range_km, vehicle.id))
+        if key not in self._legs:
+            paths = solver.find_all_paths(
+                from_id,
+                to_id,
+                vehicle.range_km,
+                self.max_hops,
+                max_paths=1,
+                vehicle_id=vehicle.id,
+            )
+            self._legs[key] = (
+                (solver.calculate_path_distance(paths[0]), paths[0]) if paths else None
+            )
+        return self._legs[key]
+
+    def _route(self, origin_id, stops, vehicle):
+        """
+        Distance and full location path of a route for a vehicle, or None if
+        the vehicle cannot drive it.
+
+        Each leg is a feasible path on its own, but a vehicle leaving a stop
+        that cannot refuel only has the fuel left from getting there, so the
+        whole route is checked hop by hop.
+        """
+        stop_ids = tuple(visit.destination_id for visit in stops)
+        key = (origin_id, stop_ids, vehicle.id)
+        if key in self._routes:
+            return self._routes[key]
+
+        solver = self.solver
+        path = [origin_id]
+        distance = 0.0
+        result = None
+        for stop_id in stop_ids:
+            leg = self._leg(path[-1], stop_id, vehicle)
+            if leg is None:
+                break
+            distance += leg[0]
+            path.extend(leg[1][1:])
+        else:
+            fuel = vehicle.range_km
+            for from_id, to_id in zip(path, path[1:]):
+                fuel -= solver.get_distance(from_id, to_id)
+                if fuel < 0:
+                    break
+                if solver.locations[to_id].refuel_capable:
+                    fuel = vehicle.range_km
+            else:
+                result = (distance, path)
+
+        self._routes[key] = result
+        return result
+
+    def _fits(self, origin_id, stops, vehicle):
+        return (
+            sum(visit.volume for visit in stops) <= vehicle.capacity
+            and self._route(origin_id, stops, vehicle) is not None
+        )
+
+    def _allocate_visits(self):
+        """
+        Assign demand to warehouses and cut it into vehicle-sized visits.
+
+        Destinations are served in priority order from the nearest warehouses
+        that have the stock and a vehicle able to reach them. Warehouses are
+        probed nearest first, only while some demand is left, and allocation
+        stops when time runs out. Returns origin_id -> list of Visit.
+        """
+        solver = self.solver
+        state = solver.solution_state
+
+        origins = {
+            loc_id: self._vehicle_types(loc_id)
+            for loc_id, loc in solver.locations.items()
+            if "WAREHOUSE" in loc.type
+        }
+        origins = {loc_id: types for loc_id, types in origins.items() if types}
+
+        destinations = sorted(
+            solver.demand.items(),
+            key=lambda item: max(d.priority for d in item[1].values()),
+            reverse=True,
+        )
+
+        orders = defaultdict(lambda: defaultdict(int))  # (origin, dest) -> load
+        capacity = {}  # (origin, dest) -> largest vehicle able to drive there
+        for destination_id, items in destinations:
+            if self._out_of_time():
+                break
+            needed = {inv_id: demand.quantity for inv_id, demand in items.items()}
+            nearest = sorted(
+                (origin_id for origin_id in origins if origin_id != destination_id),
+                key=lambda origin_id: solver.get_distance(origin_id, destination_id),
+            )
+            for origin_id in nearest:
+                if not needed or self._out_of_time():
+                    break
+                # Reaching the destination is only worth checking from a
+                # warehouse holding some of what is still needed
+                if not any(state.inventory_at(origin_id, inv_id) for inv_id in needed):
+                    continue
+                stop = [Visit(destination_id, {}, 0, 0)]
+                reaching = [
+                    vehicle.capacity
+                    for vehicle in origins[origin_id]
+                    if self._route(origin_id, stop, vehicle)
+                ]
+                if not reaching:
+                    continue
+                capacity[(origin_id, destination_id)] = max(reaching)
+                for inv_id in list(needed):
+                    qty = min(needed[inv_id], state.inventory_at(origin_id, inv_id))
+                    if qty > 0:
+                        state.add_inventory(origin_id, inv_id, -qty)
+                        orders[(origin_id, destination_id)][inv_id] += qty
+                        needed[inv_id] -= qty
+                    if needed[inv_id] <= 0:
+                        del needed[inv_id]
+
+        visits = defaultdict(list)
+        for (origin_id, destination_id), load in orders.items():
+            priority = max(
+                solver.demand[destination_id][inv_id].priority for inv_id in load
+            )
+            for visit_load in self._split_load(
+                load, capacity[(origin_id, destination_id)], origin_id
+            ):
+                visits[origin_id].append(
+                    Visit(
+                        destination_id,
+                        visit_load,
+                        self._volume(visit_load),
+                        priority,
+                    )
+                )
+        return visits
+
+    def _volume(self, load):
+        return sum(
+            qty * self.solver.inventory_types[inv_id].volume_per_unit
+            for inv_id, qty in load.items()
+        )
+
+    def _split_load(self, load, capacity, origin_id):
+        """
+        Cut an order into loads no larger than capacity, filling each one
+        before starting the next. Units too large for any vehicle go back
+        into the warehouse's available stock.
+        """
+        loads = []
+        current = {}
+        room = capacity
+        for inv_id, qty in sorted(load.items()):
+            unit = self.solver.inventory_types[inv_id].volume_per_unit
+            if unit > capacity:
+                self.solver.solution_state.add_inventory(origin_id, inv_id, qty)
+                continue
+            while qty > 0:
+                fits = min(qty, int(room // unit)) if unit > 0 else qty
+                if fits == 0:
+                    loads.append(current)
+                    current, room = {}, capacity
+                    continue
+                current[inv_id] = current.get(inv_id, 0) + fits
+                room -= fits * unit
+                qty -= fits
+        if current:
+            loads.append(current)
+        return loads
+
+    def _savings_routes(self, origin_id, visits):
+        """
+        Clarke-Wright savings for open routes from one warehouse.
+
+        Every visit starts on its own route. Joining a route ending at visit
+        i to one starting at visit j saves d(origin, j) - d(i, j); joins are
+        taken in decreasing order of saving whenever some vehicle type at the
+        warehouse can carry and drive the joined route, until time runs out.
+        """
+        solver = self.solver
+        types = self._vehicle_types(origin_id)
+        distance = solver.get_distance
+
+        routes = {i: [i] for i in range(len(visits))}  # route id -> visit indices
+        route_of = list(range(len(visits)))
+
+        savings = []
+        for i, a in enumerate(visits):
+            if self._out_of_time():
+                break
+            for j, b in enumerate(visits):
+                if i == j:
+                    continue
+                saving = distance(origin_id, b.destination_id) - distance(
+                    a.destination_id, b.destination_id
+                )
+                if saving > 0:
+                    savings.append((saving, i, j))
+        savings.sort(key=lambda item: (-item[0], item[1], item[2]))
+
+        for _, i, j in savings:
+            if self._out_of_time():
+                break
+            route_i, route_j = route_of[i], route_of[j]
+            if route_i == route_j:
+                continue
+            first, second = routes[route_i], routes[route_j]
+            # i must end its route and j must start its route
+            if first[-1] != i or second[0] != j:
+                continue
+
+            merged = [visits[k] for k in first + second]
+            if not any(self._fits(origin_id, merged, vehicle) for vehicle in types):
+                continue
+
+            first.extend(second)
+            for k in routes.pop(route_j):
+                route_of[k] = route_i
+
+        return [[visits[k] for k in route] for route in routes.values()]
+
+    def _assign_vehicles(self, routes, max_vehicles):
+        """
+        Give each route the smallest stationed vehicle that can serve it.
+
+        Routes carrying the most priority-weighted demand go first, so when
+        vehicles run out it is the least valuable routes that are dropped. A
+        merged route left without a suitable vehicle is split back into its
+        stops, which smaller or longer-range vehicles may still serve.
+        """
+        state = self.solver.solution_state
+
+        def value(route):
+            return sum(visit.priority * sum(visit.load.values()) for visit in route[2])
+
+        assigned = []
+        dropped = []
+        pending = sorted(routes, key=value)
+        while pending:
+            route = pending.pop()
+            origin_id, _, stops = route
+            if max_vehicles is not None and len(assigned) >= max_vehicles:
+                dropped.append(route)
+                continue
+
+            for vehicle in self._vehicle_types(origin_id):
+                if state.vehicle_count(origin_id, vehicle.id) <= 0:
+                    continue
+                if self._fits(origin_id, stops, vehicle):
+                    state.add_vehicles(origin_id, vehicle.id, -1)
+                    route[1] = vehicle
+                    assigned.append(route)
+                    break
+            else:
+                if len(stops) > 1:
+                    pending.extend([origin_id, None, [visit]] for visit in stops)
+                    pending.sort(key=value)
+                else:
+                    dropped.append(route)
+
+        # Stock on dropped routes was never loaded
+        for origin_id, _, stops in dropped:
+            for visit in stops:
+                for inv_id, qty in visit.load.items():
+                    state.add_inventory(origin_id, inv_id, qty)
+        return assigned
+
+    def _cost(self, origin_id, stops, vehicle):
+        """Route distance, or None if the vehicle cannot serve the stops."""
+        if not stops:
+            return 0.0
+        if not self._fits(origin_id, stops, vehicle):
+            return None
+        return self._route(origin_id, stops, vehicle)[0]
+
+    def _improve(self, routes):
+        """
+        Local search over the routes of one warehouse, in place.
+
+        Applies the first improving 2-opt, relocate or exchange move until
+        none is left or time runs out. Each vehicle keeps its route slot, so
+        capacity and range are checked against the vehicle serving it.
+        """
+        improved = True
+        while improved and not self._out_of_time():
+            improved = (
+                self._two_opt(routes)
+                or self._relocate(routes)
+                or self._exchange(routes)
+            )
+
+    def _two_opt(self, routes):
+        """Reverse a run of stops within one route."""
+        for route in routes:
+            origin_id, vehicle, stops = route
+            current = self._cost(origin_id, stops, vehicle)
+            for i in range(len(stops) - 1):
+                if self._out_of_time():
+                    return False
+                for j in range(i + 1, len(stops)):
+                    candidate = stops[:i] + stops[i : j + 1][::-1] + stops[j + 1 :]
+                    cost = self._cost(origin_id, candidate, vehicle)
+                    if cost is not None and cost < current - 1e-9:
+                        route[2] = candidate
+                        return True
+        return False
+
+    def _relocate(self, routes):
+        """Move one stop to another position, in the same or another route."""
+        for a, route_a in enumerate(routes):
+            origin_id, vehicle_a, stops_a = route_a
+            cost_a = self._cost(origin_id, stops_a, vehicle_a)
+            for i, visit in enumerate(stops_a):
+                if self._out_of_time():
+                    return False
+                rest_a = stops_a[:i] + stops_a[i + 1 :]
+                cost_rest = self._cost(origin_id, rest_a, vehicle_a)
+                for b, route_b in enumerate(routes):
+                    _, vehicle_b, stops_b = route_b
+                    if a == b:
+                        # Reinsert elsewhere in the same route
+                        for j in range(len(rest_a) + 1):
+                            if j == i:
+                                continue
+                            candidate = rest_a[:j] + [visit] + rest_a[j:]
+                            cost = self._cost(origin_id, candidate, vehicle_a)
+                            if cost is not None and cost < cost_a - 1e-9:
+                                route_a[2] = candidate
+                                return True
+                        continue
+
+                    if cost_rest is None:
+                        continue
+                    before = cost_a + self._cost(origin_id, stops_b, vehicle_b)
+                    for j in range(len(stops_b) + 1):
+                        candidate = stops_b[:j] + [visit] + stops_b[j:]
+                        cost_b = self._cost(origin_id, candidate, vehicle_b)
+                        if cost_b is not None and cost_rest + cost_b < before - 1e-9:
+                            route_a[2] = rest_a
+                            route_b[2] = candidate
+                            return True
+        return False
+
+    def _exchange(self, routes):
+        """Swap one stop of a route with one stop of another route."""
+        for a in range(len(routes)):
+            origin_id, vehicle_a, stops_a = routes[a]
+            for b in range(a + 1, len(routes)):
+                _, vehicle_b, stops_b = routes[b]
+                before = self._cost(origin_id, stops_a, vehicle_a) + self._cost(
+                    origin_id, stops_b, vehicle_b
+                )
+                for i in range(len(stops_a)):
+                    if self._out_of_time():
+                        return False
+                    for j in range(len(stops_b)):
+                        new_a = stops_a[:i] + [stops_b[j]] + stops_a[i + 1 :]
+                        new_b = stops_b[:j] + [stops_a[i]] + stops_b[j + 1 :]
+                        cost_a = self._cost(origin_id, new_a, vehicle_a)
+                        cost_b = self._cost(origin_id, new_b, vehicle_b)
+                        if cost_a is None or cost_b is None:
+                            continue
+                        if cost_a + cost_b < before - 1e-9:
+                            routes[a][2] = new_a
+                            routes[b][2] = new_b
+                            return True
+        return False
+
+    def _delivery(self, origin_id, vehicle, stops):
+        """Delivery record in the format produced by CVRPSolver.solve."""
+        solver = self.solver
+        distance, path = self._route(origin_id, stops, vehicle)
+
+        # Consecutive visits to one destination are a single stop
+        unloading = []
+        for visit in stops:
+            if unloading and unloading[-1][0] == visit.destination_id:
+                for inv_id, qty in visit.load.items():
+                    unloading[-1][1][inv_id] = unloading[-1][1].get(inv_id, 0) + qty
+            else:
+                unloading.append((visit.destination_id, dict(visit.load)))
+
+        loading = defaultdict(int)
+        for visit in stops:
+            for inv_id, qty in visit.load.items():
+                loading[inv_id] += qty
+
+        # Refuel at every intermediate refuel point, unload at every stop
+        travel_time = (
+            vehicle.loading_time
+            + distance / vehicle.speed_kmh
+            + vehicle.refuel_time
+            * sum(1 for loc_id in path[1:-1] if solver.locations[loc_id].refuel_capable)
+            + vehicle.unloading_time * len(unloading)
+        )
+
+        return {
+            "vehicle": vehicle._asdict(),
+            "origin_id": origin_id,
+            "destination_id": path[-1],
+            "path_ids": path,
+            "origin": solver.locations[origin_id]._asdict(),
+            "destination": solver.locations[path[-1]]._asdict(),
+            "path": [solver.locations[loc_id]._asdict() for loc_id in path],
+            "distance": distance,
+            "time": travel_time,
+            "loading": dict(loading),
+            "inventory_types": {
+                inv_id: solver.inventory_types[inv_id]._asdict() for inv_id in loading
+            },
+            "stops": [
+                {
+                    "location": solver.locations[loc_id]._asdict(),
+                    "unloading": load,
+                }
+                for loc_id, load in unloading
+            ],
+        }
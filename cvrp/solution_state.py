@@ -0,0 +1,184 @@
+import numpy as np
+
+
+class SolutionState:
+    """
+    Stock and vehicles still available while a solution is being built.
+
+    Inventory is a location x inventory type matrix and vehicles a
+    location x vehicle type matrix of counts. While a checkpoint is open,
+    changes are recorded in an undo log, so a candidate move can be applied,
+    evaluated and rolled back at the cost of the cells it touched instead of
+    copying the whole state. Outside checkpoints nothing is logged.
+    """
+
+    INVENTORY = 0
+    VEHICLES = 1
+
+    def __init__(self, location_ids, inventory_ids, vehicle_ids, inventory, vehicles):
+        """
+        Args:
+            location_ids: Location IDs, one per matrix row
+            inventory_ids: Inventory type IDs, one per inventory column
+            vehicle_ids: Vehicle type IDs, one per vehicle column
+            inventory: Dictionary location_id -> {inventory_id -> quantity}
+            vehicles: Dictionary location_id -> {vehicle_id -> count}
+        """
+        self.location_index = {loc_id: i for i, loc_id in enumerate(location_ids)}
+        self.inventory_index = {inv_id: i for i, inv_id in enumerate(inventory_ids)}
+        self.vehicle_index = {veh_id: i for i, veh_id in enumerate(vehicle_ids)}
+        self.inventory_ids = list(inventory_ids)
+        self.vehicle_ids = list(vehicle_ids)
+
+        shape = len(self.location_index)
+        self.initial_inventory = np.zeros((shape, len(inventory_ids)), dtype=np.int64)
+        self.initial_vehicles = np.zeros((shape, len(vehicle_ids)), dtype=np.int64)
+
+        # Vehicle types stationed at each location, in the order they were
+        # loaded, so iteration order (and tie-breaking) matches the database
+        self.vehicle_order = [[] for _ in range(shape)]
+
+        for loc_id, items in inventory.items():
+            row = self.location_index[loc_id]
+            for inv_id, qty in items.items():
+                self.initial_inventory[row, self.inventory_index[inv_id]] = qty
+        for loc_id, counts in vehicles.items():
+            row = self.location_index[loc_id]
+            for veh_id, count in counts.items():
+                self.initial_vehicles[row, self.vehicle_index[veh_id]] = count
+                self.vehicle_order[row].append(veh_id)
+
+        self.inventory = self.initial_inventory.copy()
+        self.vehicles = self.initial_vehicles.copy()
+        self._matrices = (self.inventory, self.vehicles)
+        self._log = []  # (matrix, row, column, previous value)
+        self._open_checkpoints = 0
+
+    def reset(self):
+        """Return to the initial stock and vehicles and close all checkpoints."""
+        np.copyto(self.inventory, self.initial_inventory)
+        np.copyto(self.vehicles, self.initial_vehicles)
+        self._log.clear()
+        self._open_checkpoints = 0
+
+    def copy(self):
+        """Independent state with the current values and no open checkpoints."""
+        state = SolutionState.__new__(SolutionState)
+        state.__dict__.update(self.__dict__)
+        state.inventory = self.inventory.copy()
+        state.vehicles = self.vehicles.copy()
+        state._matrices = (state.inventory, state.vehicles)
+        state._log = []
+        state._open_checkpoints = 0
+        return state
+
+    def checkpoint(self):
+        """
+        Open a checkpoint and return its mark. Pass the mark to rollback() to
+        return to this state, or to release() to keep the changes.
+        Checkpoints nest and are closed in reverse order.
+        """
+        self._open_checkpoints += 1
+        return len(self._log)
+
+    def rollback(self, mark):
+        """Undo every change made since the checkpoint mark and close it."""
+        log = self._log
+        while len(log) > mark:
+            matrix, row, column, previous = log.pop()
+            self._matrices[matrix][row, column] = previous
+        self._close_checkpoint()
+
+    def release(self, mark):
+        """Keep the changes made since the checkpoint mark and close it."""
+        self._close_checkpoint()
+
+    def _close_checkpoint(self):
+        self._open_checkpoints -= 1
+        if self._open_checkpoints <= 0:
+            # Nothing can be rolled back any more
+            self._open_checkpoints = 0
+            self._log.clear()
+
+    def _add(self, matrix, row, column, delta):
+        values = self._matrices[matrix]
+        previous = int(values[row, column])
+        if self._open_checkpoints:
+            self._log.append((matrix, row, column, previous))
+        values[row, column] = previous + delta
+
+    def inventory_at(self, location_id, inventory_id):
+        """Available quantity of an inventory type at a location."""
+        row = self.location_index.get(location_id)
+        column = self.inventory_index.get(inventory_id)
+        if row is None or column is None:
+            return 0
+        return int(self.inventory[row, column])
+
+    def add_inventory(self, location_id, inventory_id, delta):
+        """Change the available quantity of an inventory type at a location."""
+        self._add(
+            self.INVENTORY,
+            self.location_index[location_id],
+            self.inventory_index[inventory_id],
+            delta,
+        )
+
+    def vehicle_count(self, location_id, vehicle_id):
+        """Available vehicles of one type at a location."""
+        row = self.location_index.get(location_id)
+        column = self.vehicle_index.get(vehicle_id)
+        if row is None or column is None:
+            return 0
+        return int(self.vehicles[row, column])
+
+    def vehicles_at(self, location_id):
+        """(vehicle_id, available count) for each type stationed at a location."""
+        row = self.location_index.get(location_id)
+        if row is None:
+            return []
+        counts = self.vehicles[row]
+        return [
+            (veh_id, int(counts[self.vehicle_index[veh_id]]))
+            for veh_id in self.vehicle_order[row]
+        ]
+
+    def add_vehicles(self, location_id, vehicle_id, delta):
+        """Change the available vehicles of one type at a location."""
+        self._add(
+            self.VEHICLES,
+            self.location_index[location_id],
+            self.vehicle_index[vehicle_id],
+            delta,
+        )
+
+    def rows(self, location_ids):
+        """Inventory and vehicle rows of some locations, to send elsewhere."""
+        rows = [self.location_index[loc_id] for loc_id in location_ids]
+        return self.inventory[rows], self.vehicles[rows]
+
+    def set_rows(self, location_ids, inventory, vehicles):
+        """Overwrite the rows of some locations, e.g. with rows() from another
+        process. Not logged, so rollback() does not undo it."""
+        rows = [self.location_index[loc_id] for loc_id in location_ids]
+        self.inventory[rows] = inventory
+        self.vehicles[rows] = vehicles
+
+    def inventory_dict(self):
+        """Available inventory as location_id -> {inventory_id -> quantity}."""
+        return {
+            loc_id: {
+                inv_id: int(self.inventory[row, column])
+                for inv_id, column in self.inventory_index.items()
+                if self.inventory[row, column] or self.initial_inventory[row, column]
+            }
+            for loc_id, row in self.location_index.items()
+        }
+
+    def vehicles_dict(self):
+        """Available vehicles as location_id -> {vehicle_id -> count}."""
+        return {
+            loc_id: dict(self.vehicles_at(loc_id))
+            for loc_id, row in self.location_index.items()
+            if self.vehicle_order[row]
+        }
@@ -0,0 +1,369 @@
+"""
+Streaming bulk import and export of warehouse_inventory.
+
+Files are read and written in batches, so memory use does not grow with the
+file. Imports are staged in a temp table, checked against warehouses and
+components in one pass, then upserted in batched transactions:
+
+    python -m database.bulk import snapshot.csv
+    python -m database.bulk export inventory.parquet
+
+Parquet needs pyarrow; CSV works with the standard library alone.
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pa = pq = None
+
+from database.config import configure_connection, enable_wal
+from database.connector import DATABASE_PATH, notify_table_write
+
+BATCH_SIZE = 50_000
+
+INVENTORY_COLUMNS = [
+    "warehouse_id",
+    "component_id",
+    "quantity",
+    "min_stock",
+    "max_stock",
+]
+REQUIRED_COLUMNS = INVENTORY_COLUMNS[:3]
+
+# Rejected rows listed in the report; the count covers all of them
+REJECT_SAMPLE_SIZE = 20
+
+
+def file_format(path, fmt=None):
+    fmt = fmt or ("parquet" if path.endswith((".parquet", ".pq")) else "csv")
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported file format: {fmt}")
+    if fmt == "parquet" and pq is None:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow")
+    return fmt
+
+
+def _read_csv(path, batch_size):
+    with open(path, newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        header = [name.strip() for name in next(reader, [])]
+        yield header
+
+        batch = []
+        # Line 1 is the header
+        for line, values in enumerate(reader, start=2):
+            batch.append((line, values))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _read_parquet(path, batch_size):
+    parquet_file = pq.ParquetFile(path)
+    header = parquet_file.schema_arrow.names
+    yield header
+
+    line = 1
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = record_batch.to_pydict()
+        rows = zip(*(columns[name] for name in header))
+        batch = [(line + i, values) for i, values in enumerate(rows)]
+        line += len(batch)
+        yield batch
+
+
+def _parse_row(values, positions):
+    """Converts one row to integers, or returns the reason it is rejected"""
+    row = []
+    for column, position in positions:
+        value = values[position] if position < len(values) else None
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is None:
+            if column in REQUIRED_COLUMNS:
+                return f"missing {column}"
+            row.append(None)
+            continue
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return f"{column} is not an integer: {value!r}"
+        if number < 0:
+            return f"{column} is negative: {number}"
+        row.append(number)
+    return row
+
+
+def _report_progress(progress, stage, rows, started):
+    if progress is not None:
+        elapsed = time.perf_counter() - started
+        progress(stage, rows, rows / elapsed if elapsed > 0 else 0.0)
+
+
+def import_inventory(
+    conn, path, fmt=None, batch_size=BATCH_SIZE, dry_run=False, progress=None
+):
+    """
+    Upserts warehouse_inventory rows from a CSV or Parquet file.
+
+    The file needs warehouse_id, component_id and quantity columns;
+    min_stock and max_stock are optional and left unchanged on existing rows
+    when absent. Rows that are malformed or point at an unknown warehouse or
+    component are skipped and counted. Each upsert batch commits on its own,
+    so an interrupted import can simply be run again.
+
+    progress, if given, is called as progress(stage, rows_done, rows_per_sec).
+    Returns a dict with row counts, rejected rows and timings.
+    """
+    fmt = file_format(path, fmt)
+    reader = _read_parquet if fmt == "parquet" else _read_csv
+    batches = reader(path, batch_size)
+
+    header = next(batches)
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    columns = [column for column in INVENTORY_COLUMNS if column in header]
+    positions = [(column, header.index(column)) for column in columns]
+
+    started = time.perf_counter()
+    rows_read = 0
+    rejected = []
+
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS temp.bulk_inventory")
+    cursor.execute(
+        f"""
+        CREATE TEMP TABLE bulk_inventory (
+            line INTEGER NOT NULL,
+            {", ".join(f"{column} INTEGER" for column in columns)}
+        )
+        """
+    )
+    insert = (
+        f"INSERT INTO temp.bulk_inventory (line, {', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * (len(columns) + 1))})"
+    )
+
+    try:
+        # Stage: temp tables live outside the main database file, so this
+        # holds no lock that app readers or writers could wait on
+        for batch in batches:
+            staged = []
+            for line, values in batch:
+                row = _parse_row(values, positions)
+                if isinstance(row, str):
+                    rejected.append((line, row))
+                else:
+                    staged.append([line] + row)
+            cursor.executemany(insert, staged)
+            conn.commit()
+            rows_read += len(batch)
+            _report_progress(progress, "staged", rows_read, started)
+
+        # Validate foreign keys for every staged row at once
+        unknown = cursor.execute(
+            """
+            SELECT
+                line,
+                CASE
+                    WHEN w.warehouse_id IS NULL
+                    THEN 'unknown warehouse_id ' || b.warehouse_id
+                    ELSE 'unknown component_id ' || b.component_id
+                END
+            FROM temp.bulk_inventory b
+            LEFT JOIN warehouses w ON w.warehouse_id = b.warehouse_id
+            LEFT JOIN components c ON c.component_id = b.component_id
+            WHERE w.warehouse_id IS NULL OR c.component_id IS NULL
+            """
+        ).fetchall()
+        if unknown:
+            cursor.execute(
+                """
+                DELETE FROM temp.bulk_inventory
+                WHERE warehouse_id NOT IN (SELECT warehouse_id FROM warehouses)
+                OR component_id NOT IN (SELECT component_id FROM components)
+                """
+            )
+            conn.commit()
+        rejected.extend((line, reason) for line, reason in unknown)
+
+        upserted = 0
+        if not dry_run:
+            upserted = _upsert_staged(conn, columns, batch_size, progress)
+            if upserted:
+                notify_table_write(conn, "warehouse_inventory")
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS temp.bulk_inventory")
+
+    elapsed = time.perf_counter() - started
+    rejected.sort()
+    return {
+        "rows_read": rows_read,
+        "rows_upserted": upserted,
+        "rows_rejected": len(rejected),
+        "rejected_sample": rejected[:REJECT_SAMPLE_SIZE],
+        "elapsed": elapsed,
+        "rows_per_sec": rows_read / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _upsert_staged(conn, columns, batch_size, progress):
+    updates = ["quantity = excluded.quantity"]
+    updates += [
+        f"{column} = excluded.{column}"
+        for column in ("min_stock", "max_stock")
+        if column in columns
+    ]
+    upsert = f"""
+        INSERT INTO warehouse_inventory ({", ".join(columns)})
+        SELECT {", ".join(columns)} FROM temp.bulk_inventory
+        WHERE rowid > ? AND rowid <= ?
+        ORDER BY rowid
+        ON CONFLICT (warehouse_id, component_id) DO UPDATE SET {", ".join(updates)}
+    """
+
+    cursor = conn.cursor()
+    last_rowid = cursor.execute(
+        "SELECT COALESCE(MAX(rowid), 0) FROM temp.bulk_inventory"
+    ).fetchone()[0]
+
+    started = time.perf_counter()
+    upserted = 0
+    for start in range(0, last_rowid, batch_size):
+        try:
+            cursor.execute(upsert, (start, start + batch_size))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        upserted += cursor.rowcount
+        _report_progress(progress, "upserted", upserted, started)
+    return upserted
+
+
+def export_inventory(conn, path, fmt=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Streams warehouse_inventory to a CSV or Parquet file in import format.
+
+    Returns a dict with the row count and timings.
+    """
+    fmt = file_format(path, fmt)
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT {", ".join(INVENTORY_COLUMNS)} FROM warehouse_inventory
+        ORDER BY warehouse_id, component_id
+        """
+    )
+
+    rows = 0
+    if fmt == "parquet":
+        schema = pa.schema([(column, pa.int64()) for column in INVENTORY_COLUMNS])
+        with pq.ParquetWriter(path, schema) as writer:
+            while batch := cursor.fetchmany(batch_size):
+                columns = [list(values) for values in zip(*batch)]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+                rows += len(batch)
+                _report_progress(progress, "exported", rows, started)
+    else:
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(INVENTORY_COLUMNS)
+            while batch := cursor.fetchmany(batch_size):
+                writer.writerows(batch)
+                rows += len(batch)
+                _report_progress(progress, "exported", rows, started)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "elapsed": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def print_progress(stage, rows, rate):
+    print(f"\r{stage}: {rows:,} rows ({rate:,.0f} rows/s)", end="", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bulk import or export warehouse inventory as CSV or Parquet."
+    )
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="File to read or write")
+    parser.add_argument(
+        "--db",
+        default=DATABASE_PATH,
+        help=f"Path to the database (default: {DATABASE_PATH})",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet"],
+        default=None,
+        help="File format (default: from the file extension)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help=f"Rows per batch and transaction (default: {BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate an import without writing to warehouse_inventory",
+    )
+    args = parser.parse_args()
+
+    if args.command == "import" and not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+
+    enable_wal(args.db)
+    conn = sqlite3.connect(args.db)
+    configure_connection(conn)
+    try:
+        if args.command == "import":
+            report = import_inventory(
+                conn,
+                args.path,
+                fmt=args.format,
+                batch_size=args.batch_size,
+                dry_run=args.dry_run,
+                progress=print_progress,
+            )
+            print(file=sys.stderr)
+            print(
+                f"Read {report['rows_read']:,} rows, upserted "
+                f"{report['rows_upserted']:,}, rejected {report['rows_rejected']:,} "
+                f"in {report['elapsed']:.1f}s ({report['rows_per_sec']:,.0f} rows/s)"
+            )
+            for line, reason in report["rejected_sample"]:
+                print(f"  row {line}: {reason}")
+        else:
+            report = export_inventory(
+                conn,
+                args.path,
+                fmt=args.format,
+                batch_size=args.batch_size,
+                progress=print_progress,
+            )
+            print(file=sys.stderr)
+            print(
+                f"Exported {report['rows']:,} rows in {report['elapsed']:.1f}s "
+                f"({report['rows_per_sec']:,.0f} rows/s)"
+            )
+    finally:
+        conn.close()
@@ -0,0 +1,255 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Seconds a cached read stays valid, by the tables it reads. Writes made
+# through the connector invalidate immediately, and the connector clears the
+# cache when it sees a commit from elsewhere; the TTL only bounds entry age.
+TABLE_TTLS = {
+    "warehouses": 3600,
+    "components": 3600,
+    "kits": 3600,
+    "kit_components": 3600,
+    "destinations": 3600,
+    "warehouse_inventory": 60,
+    "warehouse_transfers": 60,
+    "end_shipments": 60,
+}
+DEFAULT_TTL = 60
+
+_UNRESOLVED = object()
+
+
+class MemoryBackend:
+    """In-process LRU store. Entries and generations are private to the process."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tables):
+        with self._lock:
+            return [self._generations.get(table, 0) for table in tables]
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskBackend:
+    """
+    Store kept in a SQLite file.
+
+    Every process pointing at the same path shares entries and generation
+    counters, so gunicorn workers reuse each other's results and see each
+    other's invalidations.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                payload BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_expires
+                ON cache_entries(expires_at);
+            CREATE TABLE IF NOT EXISTS cache_generations (
+                table_name TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            );
+            """
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT payload FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key, payload, ttl):
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, expires_at, payload) "
+            "VALUES (?, ?, ?)",
+            (key, now + ttl, payload),
+        )
+
+    def generations(self, tables):
+        placeholders = ", ".join("?" * len(tables))
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT table_name, generation FROM cache_generations "
+                f"WHERE table_name IN ({placeholders})",
+                list(tables),
+            )
+            .fetchall()
+        )
+        found = dict(rows)
+        return [found.get(table, 0) for table in tables]
+
+    def bump(self, tables):
+        self._connection().executemany(
+            """
+            INSERT INTO cache_generations (table_name, generation) VALUES (?, 1)
+            ON CONFLICT(table_name) DO UPDATE SET generation = generation + 1
+            """,
+            [(table,) for table in tables],
+        )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entries")
+
+
+def backend_from_env():
+    """Builds the backend named by CACHE_BACKEND: memory (default), disk or off"""
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemoryBackend(int(os.getenv("CACHE_MAX_ENTRIES", "256")))
+    if kind == "disk":
+        return DiskBackend(os.getenv("CACHE_PATH", "database/query_cache.db"))
+    raise ValueError(f"Invalid CACHE_BACKEND value: {kind}")
+
+
+class ResultCache:
+    """
+    Caches read results keyed by function, arguments and table generations.
+
+    Each cached function declares the tables it reads. A write bumps the
+    generation of the tables it touched, which changes the key of every
+    dependent read, so stale entries are never looked up again and simply
+    age out. Results are stored pickled, so callers always get their own copy.
+    """
+
+    def __init__(self, backend=_UNRESOLVED, ttls=None):
+        self._backend = backend
+        self.ttls = dict(TABLE_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._tables = set()  # every table a cached function depends on
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        # Resolved lazily so settings loaded from .env after import still apply
+        if self._backend is _UNRESOLVED:
+            with self._lock:
+                if self._backend is _UNRESOLVED:
+                    self._backend = backend_from_env()
+        return self._backend
+
+    def ttl_for(self, tables):
+        return min((self.ttls.get(t, DEFAULT_TTL) for t in tables), default=DEFAULT_TTL)
+
+    def cached(self, *tables):
+        """Decorator for a read function that depends on the given tables"""
+        self._tables.update(tables)
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                backend = self.backend
+                if backend is None:
+                    return func(*args, **kwargs)
+
+                generations = backend.generations(tables)
+                key = (
+                    f"{func.__module__}.{func.__qualname__}:"
+                    f"{args!r}:{sorted(kwargs.items())!r}:{generations}"
+                )
+                payload = backend.get(key)
+                if payload is not None:
+                    with self._lock:
+                        self.hits += 1
+                    return pickle.loads(payload)
+
+                with self._lock:
+                    self.misses += 1
+                result = func(*args, **kwargs)
+                backend.set(key, pickle.dumps(result), self.ttl_for(tables))
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def versions(self, tables):
+        backend = self.backend
+        if backend is None:
+            return None
+        return backend.generations(tables)
+
+    def invalidate(self, *tables):
+        backend = self.backend
+        if backend is not None:
+            backend.bump(tables)
+
+    def invalidate_all(self):
+        """Bumps every known table, for changes whose tables are unknown"""
+        self.invalidate(*sorted(self._tables | set(self.ttls)))
+
+    def clear(self):
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
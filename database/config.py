@@ -0,0 +1,56 @@
+import os
+import sqlite3
+
+# PRAGMA values cannot be bound as parameters, so only known values are accepted
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+TEMP_STORE_MODES = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def get_connection_settings():
+    """
+    Reads connection tuning from the environment.
+
+    cache_size follows SQLite's convention: negative values are KiB,
+    positive values are pages.
+    """
+    settings = {
+        "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL").upper(),
+        "cache_size": int(os.getenv("DB_CACHE_SIZE", "-16000")),
+        "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024))),
+        "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY").upper(),
+        "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT", "5000")),
+    }
+
+    if settings["synchronous"] not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid DB_SYNCHRONOUS value: {settings['synchronous']}")
+    if settings["temp_store"] not in TEMP_STORE_MODES:
+        raise ValueError(f"Invalid DB_TEMP_STORE value: {settings['temp_store']}")
+
+    return settings
+
+
+def configure_connection(conn, readonly=False, settings=None):
+    """Applies per-connection pragmas; readers are additionally made query-only"""
+    settings = settings or get_connection_settings()
+
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+
+
+def enable_wal(database):
+    """
+    Switches the database file to write-ahead logging.
+
+    The journal mode is persistent, so this only needs to run once per file;
+    afterwards readers never wait on the writer.
+    """
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    finally:
+        conn.close()
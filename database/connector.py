@@ -1,19 +1,372 @@
+import os
 import sqlite3
+import threading
 from contextlib import contextmanager
+from datetime import date
+from functools import wraps
+from pathlib import Path
+
+from database.cache import ResultCache
+from database.config import configure_connection, enable_wal
+from database.kit_engine import KitCapacityEngine
+from database.pool import ConnectionPool
+from database.projection import InventoryProjection
+from database.rebalance_optimizer import NetworkRebalancer
 
 DATABASE_PATH = "database/kit_readiness.db"
 
+# Net kits a pair transfer must add to be labelled High impact
+HIGH_IMPACT_KITS = 10
+
+_read_pool = None
+_write_pool = None
+_pool_lock = threading.Lock()
+
+_kit_engine = None
+_kit_engine_lock = threading.Lock()
+
+_projection = None
+_projection_lock = threading.Lock()
+
+_write_listeners = []
+
+# Detects commits made outside the connector (other processes, bulk jobs,
+# manual SQL); see check_outside_writes
+_change_watcher = None
+_seen_data_version = None
+_writer_data_version = None  # (id of the writer connection, its data_version)
+_change_lock = threading.Lock()
+
+_result_cache = ResultCache()
+
+
+class StaleWriteError(Exception):
+    """Raised when rows changed after the caller read them; nothing is saved"""
+
+    def __init__(self, component_ids):
+        super().__init__(f"Inventory changed for components {component_ids}")
+        self.component_ids = component_ids
+
+
+def _get_pools():
+    # Created lazily so settings loaded from .env after import still apply
+    global _read_pool, _write_pool, _seen_data_version
+    if _read_pool is None:
+        with _pool_lock:
+            if _read_pool is None:
+                enable_wal(DATABASE_PATH)
+                # Switching to WAL moves data_version, and nothing can have
+                # been loaded without the pools, so the watcher starts here
+                with _change_lock:
+                    if _change_watcher is not None:
+                        _seen_data_version = _data_version(_change_watcher)
+                idle_timeout = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+                checkout_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+                # A single writer serializes writes inside the process; with WAL,
+                # readers on the other pool never wait for it
+                _write_pool = ConnectionPool(
+                    DATABASE_PATH,
+                    max_size=1,
+                    idle_timeout=idle_timeout,
+                    checkout_timeout=checkout_timeout,
+                    on_connect=_connect_writer,
+                )
+                _read_pool = ConnectionPool(
+                    DATABASE_PATH,
+                    max_size=int(os.getenv("DB_POOL_SIZE", "5")),
+                    idle_timeout=idle_timeout,
+                    checkout_timeout=checkout_timeout,
+                    on_connect=lambda conn: configure_connection(conn, readonly=True),
+                )
+    return _read_pool, _write_pool
+
 
 @contextmanager
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
+def get_db_connection(write=False):
+    """Yields a pooled connection; pass write=True for the serialized writer"""
+    read_pool, write_pool = _get_pools()
+    pool = write_pool if write else read_pool
+    with pool.connection() as conn:
         yield conn
-    finally:
-        conn.close()
 
 
+def get_pool_stats():
+    """Returns hit/miss and occupancy counters for the reader and writer pools"""
+    read_pool, write_pool = _get_pools()
+    return {"read": read_pool.stats(), "write": write_pool.stats()}
+
+
+def get_cache_stats():
+    """Returns hit/miss counters for the read result cache"""
+    return _result_cache.stats()
+
+
+def clear_result_cache():
+    _result_cache.clear()
+
+
+def get_table_versions(*tables):
+    """
+    Write generations of the given tables, or None when caching is off.
+
+    The values change whenever a connector write touches one of the tables,
+    or a change made outside the connector is detected, so callers can tell
+    whether data derived from them is still current.
+    """
+    check_outside_writes()
+    return _result_cache.versions(tables)
+
+
+def close_pool():
+    global _read_pool, _write_pool, _change_watcher, _writer_data_version
+    with _pool_lock:
+        for pool in (_read_pool, _write_pool):
+            if pool is not None:
+                pool.close()
+        _read_pool = None
+        _write_pool = None
+    with _change_lock:
+        if _change_watcher is not None:
+            _change_watcher.close()
+        _change_watcher = None
+        _writer_data_version = None
+
+
+def _data_version(conn):
+    # Changes whenever a connection other than conn commits to the database
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _drop_derived_state():
+    invalidate_kit_engine()
+    # Which tables changed is unknown, so every generation moves on and
+    # anything versioned by get_table_versions is rebuilt too
+    _result_cache.invalidate_all()
+    _result_cache.clear()
+
+
+def check_outside_writes():
+    """
+    Drops the kit engine, projection and cached reads if the database was
+    changed by anything other than this process's connector writes.
+
+    A dedicated connection watches PRAGMA data_version, which moves on every
+    commit made by another connection. Connector writes are reconciled in
+    _record_own_write, so they keep their incremental updates.
+    """
+    global _change_watcher, _seen_data_version
+    with _change_lock:
+        if _change_watcher is None:
+            try:
+                uri = Path(DATABASE_PATH).absolute().as_uri() + "?mode=ro"
+                _change_watcher = sqlite3.connect(
+                    uri, uri=True, check_same_thread=False
+                )
+                _seen_data_version = _data_version(_change_watcher)
+            except sqlite3.Error:
+                _change_watcher = None
+            # Anything loaded before the watcher existed may be stale
+            changed = True
+        else:
+            version = _data_version(_change_watcher)
+            changed = version != _seen_data_version
+            _seen_data_version = version
+    if changed:
+        _drop_derived_state()
+
+
+def _connect_writer(conn):
+    global _writer_data_version
+    configure_connection(conn)
+    # Baseline first, then catch up, so no outside commit falls in between
+    with _change_lock:
+        _writer_data_version = (id(conn), _data_version(conn))
+    check_outside_writes()
+
+
+def _record_own_write(conn):
+    """
+    Accounts for a connector write in the change watcher.
+
+    The watcher cannot tell this commit from an outside one, so its version
+    is simply taken as seen. The writer's own data_version ignores its own
+    commits, so any outside commit since its previous write, including one
+    that slipped in just now, still shows up there.
+    """
+    global _seen_data_version, _writer_data_version
+    with _change_lock:
+        if _change_watcher is None:
+            return
+        _seen_data_version = _data_version(_change_watcher)
+        if _writer_data_version is None or _writer_data_version[0] != id(conn):
+            outside = True
+        else:
+            version = _data_version(conn)
+            outside = version != _writer_data_version[1]
+            _writer_data_version = (id(conn), version)
+    if outside:
+        _drop_derived_state()
+
+
+def cached(*tables):
+    """Result cache decorator that first checks for outside writes"""
+
+    def decorator(func):
+        cached_func = _result_cache.cached(*tables)(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            check_outside_writes()
+            return cached_func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register_write_listener(listener):
+    """
+    Registers listener(conn, table, cells), called after every committed write.
+
+    cells lists the (warehouse_id, component_id) inventory cells the write
+    can affect, or is None when any cell may have changed.
+    """
+    _write_listeners.append(listener)
+
+
+def _notify_write(conn, table, cells):
+    _record_own_write(conn)
+    for listener in list(_write_listeners):
+        listener(conn, table, cells)
+
+
+def notify_table_write(conn, table):
+    """Tells listeners that a write made outside the connector changed table"""
+    _notify_write(conn, table, None)
+
+
+def get_kit_engine():
+    """Returns the shared kit capacity engine, loading it on first use"""
+    global _kit_engine
+    check_outside_writes()
+    with _kit_engine_lock:
+        if _kit_engine is None:
+            with get_db_connection() as conn:
+                _kit_engine = KitCapacityEngine.from_connection(conn)
+        return _kit_engine
+
+
+def invalidate_kit_engine():
+    """Drops the cached engine and projection so the next read reloads them"""
+    global _kit_engine, _projection
+    with _kit_engine_lock:
+        _kit_engine = None
+    with _projection_lock:
+        _projection = None
+
+
+def check_kit_engine_consistency():
+    """Compares the incrementally maintained engine against a full recompute"""
+    engine = get_kit_engine()
+    with get_db_connection() as conn:
+        return engine.check_consistency(conn)
+
+
+def _update_kit_engine(conn, table, cells):
+    # Holding the lock means a load in progress finishes first, so cells
+    # committed during the load are re-read rather than lost
+    global _kit_engine
+    with _kit_engine_lock:
+        if _kit_engine is None:
+            return
+        try:
+            refreshed = cells is not None and _kit_engine.refresh_cells(conn, cells)
+        except Exception:
+            refreshed = False
+        if not refreshed:
+            _kit_engine = None
+
+
+register_write_listener(_update_kit_engine)
+
+
+def get_inventory_projection():
+    """Returns the stock projection from today, rebuilt daily and after writes"""
+    global _projection
+    engine = get_kit_engine()
+    with _projection_lock:
+        if _projection is None or _projection.start != date.today():
+            with get_db_connection() as conn:
+                _projection = InventoryProjection.from_connection(conn, engine)
+        return _projection
+
+
+def _drop_projection(conn, table, cells):
+    global _projection
+    with _projection_lock:
+        _projection = None
+
+
+register_write_listener(_drop_projection)
+
+
+def get_projected_kits(warehouse_id, when):
+    """Completable kits per kit type at a warehouse on a date within the horizon"""
+    projection = get_inventory_projection()
+    kits = projection.kits_on(warehouse_id, when)
+    engine = projection.engine
+    results = [
+        {
+            "kit_id": kit_id,
+            "kit_name": engine.kit_names.get(kit_id, f"Kit {kit_id}"),
+            "possible_kits": count,
+        }
+        for kit_id, count in kits.items()
+    ]
+    results.sort(key=lambda r: r["kit_name"])
+    return results
+
+
+def get_projected_readiness():
+    """
+    Total completable kits per warehouse for every day of the horizon.
+
+    Returns the dates and a {warehouse_id: [kits per day]} mapping.
+    """
+    projection = get_inventory_projection()
+    totals = projection.readiness()
+    return projection.dates(), {
+        int(w): totals[:, i].tolist()
+        for i, w in enumerate(projection.engine.warehouse_ids)
+    }
+
+
+def _invalidate_cached_reads(conn, table, cells):
+    _result_cache.invalidate(table)
+
+
+register_write_listener(_invalidate_cached_reads)
+
+
+def _kit_cells(warehouse_id, kit_id):
+    """
+    Inventory cells consumed by a kit at a warehouse, or None when no engine
+    is loaded to look the kit up in.
+
+    An engine loading in another thread may have read the database before
+    this write, so without cells the listener has to reload it.
+    """
+    with _kit_engine_lock:
+        engine = _kit_engine
+    if engine is None:
+        return None
+    return [
+        (warehouse_id, component_id) for component_id in engine.components_of(kit_id)
+    ]
+
+
+@cached("warehouses")
 def get_all_warehouses():
     with get_db_connection() as conn:
         cursor = conn.cursor()
@@ -23,27 +376,41 @@ def get_all_warehouses():
         """
         ).fetchall()
 
-        return result
+        return [dict(row) for row in result]
+
 
+# Reservations are maintained by triggers on transfers and shipments, so reads
+# of available_inventory depend on those tables too
+AVAILABLE_INVENTORY_TABLES = (
+    "warehouse_inventory",
+    "warehouse_transfers",
+    "end_shipments",
+)
 
+# Final states a pending transfer or shipment can be moved to
+MOVE_STATUSES = ("completed", "cancelled")
+
+
+@cached("components", *AVAILABLE_INVENTORY_TABLES)
 def get_warehouse_inventory(warehouse_id):
     with get_db_connection() as conn:
         cursor = conn.cursor()
         result = cursor.execute(
             """
             SELECT 
-                wi.*, 
+                ai.*, 
                 c.component_name,
                 c.description
-            FROM warehouse_inventory wi
-            JOIN components c ON wi.component_id = c.component_id
-            WHERE wi.warehouse_id = ?
+            FROM available_inventory ai
+            JOIN components c ON ai.component_id = c.component_id
+            WHERE ai.warehouse_id = ?
         """,
             (warehouse_id,),
         ).fetchall()
-        return result
+        return [dict(row) for row in result]
 
 
+@cached("kits")
 def get_kit_details():
     with get_db_connection() as conn:
         cursor = conn.cursor()
@@ -53,9 +420,10 @@ def get_kit_details():
         """
         ).fetchall()
 
-        return result
+        return [dict(row) for row in result]
 
 
+@cached("warehouses", "warehouse_inventory")
 def get_warehouse_health_metrics():
     with get_db_connection() as conn:
         cursor = conn.cursor()
@@ -85,9 +453,10 @@ def get_warehouse_health_metrics():
             """
         ).fetchall()
 
-        return result
+        return [dict(row) for row in result]
 
 
+@cached("kits", "kit_components", "components", *AVAILABLE_INVENTORY_TABLES)
 def get_kit_components(warehouse_id=None):
     """Fetches kit component mappings with current inventory if warehouse specified"""
 
@@ -103,13 +472,13 @@ def get_kit_components(warehouse_id=None):
                     c.component_id,
                     c.component_name,
                     kc.quantity as required_quantity,
-                    COALESCE(wi.quantity, 0) as current_inventory,
-                    FLOOR(CAST(COALESCE(wi.quantity, 0) AS FLOAT) / kc.quantity) as possible_completions
+                    MAX(COALESCE(ai.available, 0), 0) as current_inventory,
+                    FLOOR(CAST(MAX(COALESCE(ai.available, 0), 0) AS FLOAT) / kc.quantity) as possible_completions
                 FROM kits k
                 JOIN kit_components kc ON k.kit_id = kc.kit_id
                 JOIN components c ON kc.component_id = c.component_id
-                LEFT JOIN warehouse_inventory wi ON c.component_id = wi.component_id 
-                    AND wi.warehouse_id = ?
+                LEFT JOIN available_inventory ai ON c.component_id = ai.component_id 
+                    AND ai.warehouse_id = ?
                 ORDER BY k.kit_name, c.component_name
                 """,
                 (warehouse_id,),
@@ -130,35 +499,16 @@ def get_kit_components(warehouse_id=None):
                 ORDER BY k.kit_name, c.component_name
                 """
             ).fetchall()
-        return result
+        return [dict(row) for row in result]
 
 
 def calculate_possible_kits(warehouse_id):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        result = cursor.execute(
-            """
-            WITH KitLimits AS (
-                SELECT 
-                    k.kit_id,
-                    k.kit_name,
-                    MIN(FLOOR(CAST(wi.quantity AS FLOAT) / kc.quantity)) as possible_kits
-                FROM kits k
-                JOIN kit_components kc ON k.kit_id = kc.kit_id
-                JOIN warehouse_inventory wi ON kc.component_id = wi.component_id
-                WHERE wi.warehouse_id = ?
-                GROUP BY k.kit_id, k.kit_name
-            )
-            SELECT 
-                kit_id,
-                kit_name,
-                possible_kits
-            FROM KitLimits
-            ORDER BY kit_name
-        """,
-            (warehouse_id,),
-        ).fetchall()
-        return result
+    return get_kit_engine().possible_kits_for(warehouse_id)
+
+
+def get_network_kit_readiness():
+    """Total completable kits per warehouse, for every warehouse in one pass"""
+    return get_kit_engine().total_kits_by_warehouse()
 
 
 def calculate_rebalance_suggestions(
@@ -168,41 +518,9 @@ def calculate_rebalance_suggestions(
         cursor = conn.cursor()
 
         # Get current kit completion possibilities for both warehouses
-        current_source_kits = cursor.execute(
-            """
-            WITH KitLimits AS (
-                SELECT 
-                    k.kit_id,
-                    MIN(FLOOR(CAST(wi.quantity AS FLOAT) / kc.quantity)) as possible_kits
-                FROM kits k
-                JOIN kit_components kc ON k.kit_id = kc.kit_id
-                JOIN warehouse_inventory wi ON kc.component_id = wi.component_id
-                WHERE wi.warehouse_id = ?
-                GROUP BY k.kit_id
-            )
-            SELECT COALESCE(SUM(possible_kits), 0) as total_possible_kits
-            FROM KitLimits
-        """,
-            (source_id,),
-        ).fetchone()["total_possible_kits"]
-
-        current_dest_kits = cursor.execute(
-            """
-            WITH KitLimits AS (
-                SELECT 
-                    k.kit_id,
-                    MIN(FLOOR(CAST(wi.quantity AS FLOAT) / kc.quantity)) as possible_kits
-                FROM kits k
-                JOIN kit_components kc ON k.kit_id = kc.kit_id
-                JOIN warehouse_inventory wi ON kc.component_id = wi.component_id
-                WHERE wi.warehouse_id = ?
-                GROUP BY k.kit_id
-            )
-            SELECT COALESCE(SUM(possible_kits), 0) as total_possible_kits
-            FROM KitLimits
-        """,
-            (dest_id,),
-        ).fetchone()["total_possible_kits"]
+        engine = get_kit_engine()
+        current_source_kits = engine.total_kits(source_id)
+        current_dest_kits = engine.total_kits(dest_id)
 
         # Get component inventories and requirements
         source_inventory = cursor.execute(
@@ -210,28 +528,33 @@ def calculate_rebalance_suggestions(
             SELECT 
                 c.component_id,
                 c.component_name,
-                wi.quantity as available_quantity,
-                wi.min_stock,
-                wi.max_stock
-            FROM warehouse_inventory wi
-            JOIN components c ON wi.component_id = c.component_id
-            WHERE wi.warehouse_id = ?
+                MAX(ai.available, 0) as available_quantity,
+                ai.min_stock,
+                ai.max_stock
+            FROM available_inventory ai
+            JOIN components c ON ai.component_id = c.component_id
+            WHERE ai.warehouse_id = ?
         """,
             (source_id,),
         ).fetchall()
 
+        # Stock already on its way counts against the destination's capacity
         dest_inventory = {
             row["component_id"]: row["quantity"]
             for row in cursor.execute(
                 """
-            SELECT component_id, quantity
-            FROM warehouse_inventory
+            SELECT component_id, quantity + incoming as quantity
+            FROM available_inventory
             WHERE warehouse_id = ?
         """,
                 (dest_id,),
             ).fetchall()
         }
 
+        # Transfers are scored against the engine's BOM index, so no
+        # per-component queries are needed
+        dest_bottlenecks = engine.bottlenecks(dest_id)
+
         # Calculate potential transfers
         suggestions = []
         for component in source_inventory:
@@ -248,38 +571,41 @@ def calculate_rebalance_suggestions(
                 transfer_amount = min(excess, dest_capacity, max_transfers)
 
                 if transfer_amount >= min_transfers:
-                    # Calculate impact score based on kit completion potential
-                    impact_score = cursor.execute(
-                        """
-                        SELECT COUNT(*) as kit_count
-                        FROM kit_components
-                        WHERE component_id = ?
-                    """,
-                        (component["component_id"],),
-                    ).fetchone()["kit_count"]
+                    component_id = component["component_id"]
+                    dest_kit_gain = engine.kit_delta(
+                        dest_id, component_id, transfer_amount
+                    )
+                    source_kit_loss = -engine.kit_delta(
+                        source_id, component_id, -transfer_amount
+                    )
+                    net_kit_change = dest_kit_gain - source_kit_loss
 
                     suggestions.append(
                         {
-                            "component_id": component["component_id"],
+                            "component_id": component_id,
                             "component": component["component_name"],
                             "quantity": transfer_amount,
                             "impact": (
                                 "High"
-                                if impact_score > 2
+                                if net_kit_change >= HIGH_IMPACT_KITS
                                 else "Medium"
-                                if impact_score > 1
+                                if net_kit_change > 0
                                 else "Low"
                             ),
+                            "dest_kit_gain": dest_kit_gain,
+                            "source_kit_loss": source_kit_loss,
+                            "net_kit_change": net_kit_change,
+                            "bottleneck": component_id in dest_bottlenecks,
                             "source_remaining": component["available_quantity"]
                             - transfer_amount,
                             "dest_new_total": dest_current + transfer_amount,
                         }
                     )
 
-        # Sort suggestions by impact
-        impact_values = {"High": 3, "Medium": 2, "Low": 1}
+        # Sort suggestions by the kits they actually add
         suggestions.sort(
-            key=lambda x: (impact_values[x["impact"]], x["quantity"]), reverse=True
+            key=lambda x: (x["net_kit_change"], x["dest_kit_gain"], x["quantity"]),
+            reverse=True,
         )
 
         return {
@@ -291,38 +617,123 @@ def calculate_rebalance_suggestions(
         }
 
 
+def calculate_network_rebalance(min_transfers=1, max_transfers=100, time_budget=2.0):
+    """
+    Plans transfers between all warehouses to maximize total completable kits.
+
+    Returns the ranked transfers, each with the exact kit gain it contributes,
+    and the network kit totals before and after the plan. complete is False
+    when the time budget ran out before the plan converged.
+    """
+    engine = get_kit_engine()
+    plan = NetworkRebalancer(engine, min_transfers, max_transfers).solve(time_budget)
+
+    with get_db_connection() as conn:
+        component_names = {
+            row["component_id"]: row["component_name"]
+            for row in conn.execute(
+                "SELECT component_id, component_name FROM components"
+            ).fetchall()
+        }
+
+    for transfer in plan["transfers"]:
+        transfer["component"] = component_names.get(
+            transfer["component_id"], f"Component {transfer['component_id']}"
+        )
+        transfer["source"] = engine.warehouse_names.get(
+            transfer["source_id"], f"Warehouse {transfer['source_id']}"
+        )
+        transfer["destination"] = engine.warehouse_names.get(
+            transfer["dest_id"], f"Warehouse {transfer['dest_id']}"
+        )
+    return plan
+
+
 def update_warehouse_inventory(warehouse_id, updates):
     """
     Updates inventory quantities for a warehouse
-    updates: list of dicts with component_id and new quantity
+    updates: list of dicts with component_id, new quantity and, optionally,
+    the row version the change was based on
+
+    Rows whose version no longer matches make the whole save fail with
+    StaleWriteError, so concurrent edits are never silently overwritten.
     """
+    if not updates:
+        return True
 
-    with get_db_connection() as conn:
+    rows = [
+        (
+            update["quantity"],
+            warehouse_id,
+            update["component_id"],
+            update.get("version"),
+            update.get("version"),
+        )
+        for update in updates
+    ]
+
+    with get_db_connection(write=True) as conn:
         cursor = conn.cursor()
         try:
-            for update in updates:
-                cursor.execute(
-                    """
-                    UPDATE warehouse_inventory
-                    SET quantity = ?
-                    WHERE warehouse_id = ? AND component_id = ?
-                    """,
-                    (update["quantity"], warehouse_id, update["component_id"]),
-                )
-            conn.commit()
-
-            return True
+            cursor.executemany(
+                """
+                UPDATE warehouse_inventory
+                SET quantity = ?, version = version + 1
+                WHERE warehouse_id = ? AND component_id = ?
+                AND (? IS NULL OR version = ?)
+                """,
+                rows,
+            )
+            stale = cursor.rowcount != len(rows)
+            if stale:
+                conn.rollback()
+            else:
+                conn.commit()
         except Exception as e:
             conn.rollback()
             return False
 
+        if stale:
+            raise StaleWriteError(_stale_components(cursor, warehouse_id, updates))
+
+        _notify_write(
+            conn,
+            "warehouse_inventory",
+            [(warehouse_id, update["component_id"]) for update in updates],
+        )
+        return True
+
+
+def _stale_components(cursor, warehouse_id, updates):
+    placeholders = ", ".join("?" * len(updates))
+    current = dict(
+        cursor.execute(
+            f"""
+            SELECT component_id, version FROM warehouse_inventory
+            WHERE warehouse_id = ? AND component_id IN ({placeholders})
+            """,
+            [warehouse_id] + [update["component_id"] for update in updates],
+        ).fetchall()
+    )
+    return [
+        update["component_id"]
+        for update in updates
+        if update["component_id"] not in current
+        or update.get("version") not in (None, current[update["component_id"]])
+    ]
+
 
 def create_warehouse_transfer(
     source_id, dest_id, component_id, quantity, transfer_date
 ):
-    """Creates a new warehouse transfer record"""
+    """
+    Creates a new pending warehouse transfer record
 
-    with get_db_connection() as conn:
+    A trigger reserves the quantity at the source and marks it incoming at
+    the destination in the same transaction.
+    """
+
+    with get_db_connection(write=True) as conn:
         cursor = conn.cursor()
         try:
             cursor.execute(
@@ -335,15 +746,26 @@ def create_warehouse_transfer(
                 (transfer_date, source_id, dest_id, component_id, quantity),
             )
             conn.commit()
-            return True
         except Exception as e:
             conn.rollback()
             return False
 
+        _notify_write(
+            conn,
+            "warehouse_transfers",
+            [(source_id, component_id), (dest_id, component_id)],
+        )
+        return True
+
 
 def create_end_shipment(warehouse_id, destination_id, kit_id, quantity, shipment_date):
-    """Creates a new end-user shipment record"""
-    with get_db_connection() as conn:
+    """
+    Creates a new pending end-user shipment record
+
+    A trigger reserves the kit's components at the warehouse in the same
+    transaction.
+    """
+    with get_db_connection(write=True) as conn:
         cursor = conn.cursor()
         try:
             cursor.execute(
@@ -356,12 +778,94 @@ def create_end_shipment(warehouse_id, destination_id, kit_id, quantity, shipment
                 (shipment_date, warehouse_id, destination_id, kit_id, quantity),
             )
             conn.commit()
-            return True
         except Exception as e:
             conn.rollback()
             return False
 
+        _notify_write(conn, "end_shipments", _kit_cells(warehouse_id, kit_id))
+        return True
+
+
+def set_transfer_status(transfer_id, status):
+    """
+    Completes or cancels a pending transfer
+
+    Triggers release its reservations and, when it is completed, move the
+    stock from source to destination in the same transaction. Returns False
+    if the transfer is not pending.
+    """
+    if status not in MOVE_STATUSES:
+        raise ValueError(f"Invalid transfer status: {status}")
+
+    with get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        try:
+            row = cursor.execute(
+                """
+                SELECT source_warehouse_id, destination_warehouse_id, component_id
+                FROM warehouse_transfers
+                WHERE transfer_id = ? AND status = 'pending'
+                """,
+                (transfer_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            cursor.execute(
+                "UPDATE warehouse_transfers SET status = ? WHERE transfer_id = ?",
+                (status, transfer_id),
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            return False
+
+        cells = [(row[0], row[2]), (row[1], row[2])]
+        _notify_write(conn, "warehouse_transfers", cells)
+        if status == "completed":
+            _notify_write(conn, "warehouse_inventory", cells)
+        return True
+
+
+def set_shipment_status(shipment_id, status):
+    """
+    Completes or cancels a pending shipment
+
+    Triggers release its reservations and, when it is completed, take the
+    kit's components out of the warehouse's stock in the same transaction.
+    Returns False if the shipment is not pending.
+    """
+    if status not in MOVE_STATUSES:
+        raise ValueError(f"Invalid shipment status: {status}")
 
+    with get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        try:
+            row = cursor.execute(
+                """
+                SELECT warehouse_id, kit_id FROM end_shipments
+                WHERE shipment_id = ? AND status = 'pending'
+                """,
+                (shipment_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            cursor.execute(
+                "UPDATE end_shipments SET status = ? WHERE shipment_id = ?",
+                (status, shipment_id),
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            return False
+
+        cells = _kit_cells(row[0], row[1])
+        _notify_write(conn, "end_shipments", cells)
+        if status == "completed":
+            _notify_write(conn, "warehouse_inventory", cells)
+        return True
+
+
+@cached("warehouse_transfers", "warehouses", "components")
 def get_warehouse_transfers():
     """Fetches all transfers between warehouses"""
 
@@ -383,9 +887,10 @@ def get_warehouse_transfers():
             ORDER BY t.transfer_date DESC
             """
         ).fetchall()
-        return result
+        return [dict(row) for row in result]
 
 
+@cached("end_shipments", "warehouses", "destinations", "kits")
 def get_end_user_shipments():
     """Fetches all shipments to end users"""
 
@@ -407,9 +912,230 @@ def get_end_user_shipments():
             ORDER BY s.shipment_date DESC
             """
         ).fetchall()
-        return result
+        return [dict(row) for row in result]
+
+
+# Columns the paginated tables can sort and filter on, mapped to SQL
+TRANSFER_COLUMNS = {
+    "transfer_date": "t.transfer_date",
+    "source_warehouse": "w_source.warehouse_name",
+    "destination_warehouse": "w_dest.warehouse_name",
+    "component_name": "c.component_name",
+    "quantity": "t.quantity",
+    "status": "t.status",
+}
+
+SHIPMENT_COLUMNS = {
+    "shipment_date": "s.shipment_date",
+    "source_warehouse": "w.warehouse_name",
+    "destination_name": "d.destination_name",
+    "kit_name": "k.kit_name",
+    "quantity": "s.quantity",
+    "status": "s.status",
+}
+
+FILTER_OPERATORS = {
+    "=": "{column} = ?",
+    "!=": "{column} != ?",
+    "<": "{column} < ?",
+    "<=": "{column} <= ?",
+    ">": "{column} > ?",
+    ">=": "{column} >= ?",
+    "contains": "{column} LIKE ? ESCAPE '\\'",
+    "datestartswith": "{column} LIKE ? ESCAPE '\\'",
+}
+
+TRANSFERS_FROM = """
+    FROM warehouse_transfers t
+    JOIN warehouses w_source ON t.source_warehouse_id = w_source.warehouse_id
+    JOIN warehouses w_dest ON t.destination_warehouse_id = w_dest.warehouse_id
+    JOIN components c ON t.component_id = c.component_id
+"""
+
+SHIPMENTS_FROM = """
+    FROM end_shipments s
+    JOIN warehouses w ON s.warehouse_id = w.warehouse_id
+    JOIN destinations d ON s.destination_id = d.destination_id
+    JOIN kits k ON s.kit_id = k.kit_id
+"""
+
+
+def _filter_clause(columns, filters):
+    """
+    Builds a WHERE clause from (column_id, operator, value) filters.
+
+    Column ids and operators are checked against whitelists, and values are
+    always bound as parameters.
+    """
+    conditions = []
+    params = []
+    for column_id, operator, value in filters or ():
+        if column_id not in columns or operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter: {column_id} {operator}")
+        if operator in ("contains", "datestartswith"):
+            escaped = (
+                str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            value = f"%{escaped}%" if operator == "contains" else f"{escaped}%"
+        conditions.append(FILTER_OPERATORS[operator].format(column=columns[column_id]))
+        params.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def _keyset_page(
+    select,
+    from_clause,
+    columns,
+    id_column,
+    default_sort,
+    page_size,
+    sort_by,
+    filters,
+    after,
+    offset,
+):
+    """
+    Fetches one page ordered by a single column, with the row id as tiebreaker.
+
+    With after, the (sort value, id) of the previous page's last row, the
+    page starts right after that row (keyset pagination) and costs the same
+    at any depth. Without it, offset is used.
+    """
+    column_id, direction = sort_by or default_sort
+    if column_id not in columns:
+        raise ValueError(f"Unsupported sort column: {column_id}")
+    direction = "DESC" if direction.lower() == "desc" else "ASC"
+    sort_column = columns[column_id]
+
+    where, params = _filter_clause(columns, filters)
+    if after is not None:
+        comparison = "<" if direction == "DESC" else ">"
+        keyset = f"({sort_column}, {id_column}) {comparison} (?, ?)"
+        where = f"{where} AND {keyset}" if where else f"WHERE {keyset}"
+        params.extend(after)
+        offset = 0
+
+    with get_db_connection() as conn:
+        result = conn.execute(
+            f"""
+            {select}
+            {from_clause}
+            {where}
+            ORDER BY {sort_column} {direction}, {id_column} {direction}
+            LIMIT ? OFFSET ?
+            """,
+            params + [page_size, offset],
+        ).fetchall()
+        return [dict(row) for row in result]
+
+
+def _count_rows(from_clause, columns, filters):
+    where, params = _filter_clause(columns, filters)
+    with get_db_connection() as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) {from_clause} {where}", params
+        ).fetchone()[0]
+
+
+@cached("warehouse_transfers", "warehouses", "components")
+def get_warehouse_transfers_page(
+    page_size=25, sort_by=None, filters=None, after=None, offset=0
+):
+    """
+    One page of warehouse transfers for the paginated table.
+
+    sort_by: (column_id, "asc" | "desc") from TRANSFER_COLUMNS; newest first
+    by default. filters: (column_id, operator, value) tuples. after: the
+    (sort value, transfer_id) of the last row on the previous page.
+    """
+    return _keyset_page(
+        """
+        SELECT
+            t.transfer_id,
+            t.transfer_date,
+            w_source.warehouse_name as source_warehouse,
+            w_dest.warehouse_name as destination_warehouse,
+            c.component_name,
+            t.quantity,
+            t.status
+        """,
+        TRANSFERS_FROM,
+        TRANSFER_COLUMNS,
+        "t.transfer_id",
+        ("transfer_date", "desc"),
+        page_size,
+        sort_by,
+        filters,
+        after,
+        offset,
+    )
+
+
+@cached("warehouse_transfers", "warehouses", "components")
+def count_warehouse_transfers(filters=None):
+    """Number of transfers matching filters, cached apart from the pages"""
+    return _count_rows(TRANSFERS_FROM, TRANSFER_COLUMNS, filters)
+
+
+@cached("end_shipments", "warehouses", "destinations", "kits")
+def get_end_user_shipments_page(
+    page_size=25, sort_by=None, filters=None, after=None, offset=0
+):
+    """
+    One page of end-user shipments for the paginated table.
+
+    Same arguments as get_warehouse_transfers_page, with columns from
+    SHIPMENT_COLUMNS and shipment_id as the row id.
+    """
+    return _keyset_page(
+        """
+        SELECT
+            s.shipment_id,
+            s.shipment_date,
+            w.warehouse_name as source_warehouse,
+            d.destination_name,
+            k.kit_name,
+            s.quantity,
+            s.status
+        """,
+        SHIPMENTS_FROM,
+        SHIPMENT_COLUMNS,
+        "s.shipment_id",
+        ("shipment_date", "desc"),
+        page_size,
+        sort_by,
+        filters,
+        after,
+        offset,
+    )
+
+
+@cached("end_shipments", "warehouses", "destinations", "kits")
+def count_end_user_shipments(filters=None):
+    """Number of shipments matching filters, cached apart from the pages"""
+    return _count_rows(SHIPMENTS_FROM, SHIPMENT_COLUMNS, filters)
+
+
+@cached("warehouses", "destinations")
+def get_location(kind, location_id):
+    """Fetches one warehouse or destination by id, or None"""
+    table, key = {
+        "warehouse": ("warehouses", "warehouse_id"),
+        "destination": ("destinations", "destination_id"),
+    }[kind]
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        row = cursor.execute(
+            f"SELECT * FROM {table} WHERE {key} = ?", (location_id,)
+        ).fetchone()
+
+        return dict(row) if row else None
 
 
+@cached("destinations")
 def get_all_destinations():
     """Fetches all destination locations"""
 
@@ -422,4 +1148,4 @@ def get_all_destinations():
             """
         ).fetchall()
 
-        return result
+        return [dict(row) for row in result]
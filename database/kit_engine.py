@@ -0,0 +1,382 @@
+import threading
+
+import numpy as np
+
+
+class KitCapacityEngine:
+    """
+    In-memory kit capacity model.
+
+    Inventory is held as a dense warehouse x component matrix and the bill of
+    materials (BOM) as a kit x component matrix, so possible kits for every
+    warehouse and every kit come out of one floor-divide/min reduction
+    instead of one GROUP BY query per warehouse.
+
+    Stock is available-to-promise: on hand less what pending transfers and
+    shipments have reserved, as given by the available_inventory view. A
+    component with no inventory row at a warehouse counts as zero stock.
+
+    After the initial load the engine is kept current incrementally: a write
+    only touches the (warehouse, kit) cells whose kits use a changed
+    component, found through a component -> kits reverse index.
+    """
+
+    def __init__(self):
+        self.warehouse_ids = np.zeros(0, dtype=np.int64)
+        self.component_ids = np.zeros(0, dtype=np.int64)
+        self.kit_ids = np.zeros(0, dtype=np.int64)
+        self.warehouse_index = {}
+        self.component_index = {}
+        self.kit_index = {}
+        self.warehouse_names = {}
+        self.kit_names = {}
+
+        self.quantity = np.zeros((0, 0), dtype=np.int64)
+        self.min_stock = np.zeros((0, 0), dtype=np.int64)
+        self.max_stock = np.zeros((0, 0), dtype=np.int64)
+        self.stocked = np.zeros((0, 0), dtype=bool)  # inventory row exists
+        self.bom = np.zeros((0, 0), dtype=np.int64)
+
+        self._possible = None
+        self._totals = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_connection(cls, conn):
+        engine = cls()
+        engine.load(conn)
+        return engine
+
+    def load(self, conn):
+        """Reads inventory and kit definitions in one pass per table"""
+        warehouses = conn.execute(
+            "SELECT warehouse_id, warehouse_name FROM warehouses"
+        ).fetchall()
+        components = conn.execute("SELECT component_id FROM components").fetchall()
+        kits = conn.execute("SELECT kit_id, kit_name FROM kits").fetchall()
+        inventory = conn.execute(
+            """
+            SELECT warehouse_id, component_id, MAX(available, 0), min_stock, max_stock
+            FROM available_inventory
+            """
+        ).fetchall()
+        bom = conn.execute(
+            "SELECT kit_id, component_id, quantity FROM kit_components"
+        ).fetchall()
+
+        # Inventory and BOM rows may reference ids missing from the master tables
+        warehouse_ids = {row[0] for row in warehouses} | {row[0] for row in inventory}
+        component_ids = (
+            {row[0] for row in components}
+            | {row[1] for row in inventory}
+            | {row[1] for row in bom}
+        )
+        kit_ids = {row[0] for row in kits} | {row[0] for row in bom}
+
+        self.warehouse_ids = np.array(sorted(warehouse_ids), dtype=np.int64)
+        self.component_ids = np.array(sorted(component_ids), dtype=np.int64)
+        self.kit_ids = np.array(sorted(kit_ids), dtype=np.int64)
+        self.warehouse_index = {int(w): i for i, w in enumerate(self.warehouse_ids)}
+        self.component_index = {int(c): i for i, c in enumerate(self.component_ids)}
+        self.kit_index = {int(k): i for i, k in enumerate(self.kit_ids)}
+        self.warehouse_names = {row[0]: row[1] for row in warehouses}
+        self.kit_names = {row[0]: row[1] for row in kits}
+
+        shape = (len(self.warehouse_ids), len(self.component_ids))
+        self.quantity = np.zeros(shape, dtype=np.int64)
+        self.min_stock = np.zeros(shape, dtype=np.int64)
+        self.max_stock = np.zeros(shape, dtype=np.int64)
+        self.stocked = np.zeros(shape, dtype=bool)
+        if inventory:
+            rows = np.array(
+                [self.warehouse_index[r[0]] for r in inventory], dtype=np.int64
+            )
+            cols = np.array(
+                [self.component_index[r[1]] for r in inventory], dtype=np.int64
+            )
+            self.quantity[rows, cols] = [r[2] or 0 for r in inventory]
+            self.min_stock[rows, cols] = [r[3] or 0 for r in inventory]
+            self.max_stock[rows, cols] = [r[4] or 0 for r in inventory]
+            self.stocked[rows, cols] = True
+
+        self.bom = np.zeros(
+            (len(self.kit_ids), len(self.component_ids)), dtype=np.int64
+        )
+        for kit_id, component_id, qty in bom:
+            if qty and qty > 0:
+                self.bom[
+                    self.kit_index[kit_id], self.component_index[component_id]
+                ] = qty
+
+        self._build_bom_entries()
+        self._possible = None
+        self._totals = None
+
+    def _build_bom_entries(self):
+        # Non-zero BOM cells flattened kit by kit, so np.minimum.reduceat can
+        # take the per-kit minimum over each kit's run of components
+        kit_idx, comp_idx = np.nonzero(self.bom)
+        self._entry_components = comp_idx
+        self._entry_quantities = self.bom[kit_idx, comp_idx]
+        self._kits_with_components, self._kit_offsets = np.unique(
+            kit_idx, return_index=True
+        )
+
+        # Reverse index used to find the kits a component change can affect
+        self.component_kits = [
+            np.nonzero(self.bom[:, c])[0] for c in range(self.bom.shape[1])
+        ]
+        self.kit_components = [
+            np.nonzero(self.bom[k])[0] for k in range(self.bom.shape[0])
+        ]
+
+    def kits_from(self, quantity):
+        """
+        Possible kits for any stock array whose last axis is components.
+
+        Accepts a single warehouse row (C,), the full matrix (W, C) or a
+        stack of scenarios (..., W, C); returns the same leading shape with
+        kits on the last axis.
+        """
+        quantity = np.asarray(quantity)
+        result = np.zeros(quantity.shape[:-1] + (len(self.kit_ids),), dtype=np.int64)
+        if len(self._entry_components) == 0:
+            return result
+
+        ratios = quantity[..., self._entry_components] // self._entry_quantities
+        per_kit = np.minimum.reduceat(ratios, self._kit_offsets, axis=-1)
+        result[..., self._kits_with_components] = np.maximum(per_kit, 0)
+        return result
+
+    def possible_kits(self):
+        """Warehouse x kit matrix of completable kits"""
+        with self._lock:
+            if self._possible is None:
+                self._possible = self.kits_from(self.quantity)
+                self._totals = self._possible.sum(axis=1)
+            return self._possible
+
+    def possible_kits_at(self, warehouse_id, kit_id):
+        """Completable kits of one type at one warehouse"""
+        if warehouse_id not in self.warehouse_index or kit_id not in self.kit_index:
+            return 0
+        with self._lock:
+            return int(
+                self.possible_kits()[
+                    self.warehouse_index[warehouse_id], self.kit_index[kit_id]
+                ]
+            )
+
+    def total_kits(self, warehouse_id):
+        """Completable kits at a warehouse, summed over all kit types"""
+        if warehouse_id not in self.warehouse_index:
+            return 0
+        with self._lock:
+            self.possible_kits()
+            return int(self._totals[self.warehouse_index[warehouse_id]])
+
+    def total_kits_by_warehouse(self):
+        with self._lock:
+            self.possible_kits()
+            return {int(w): int(t) for w, t in zip(self.warehouse_ids, self._totals)}
+
+    def possible_kits_for(self, warehouse_id):
+        """Per-kit completions for one warehouse, ordered by kit name"""
+        if warehouse_id not in self.warehouse_index:
+            return []
+
+        with self._lock:
+            row = self.possible_kits()[self.warehouse_index[warehouse_id]].copy()
+        results = [
+            {
+                "kit_id": int(kit_id),
+                "kit_name": self.kit_names.get(int(kit_id), f"Kit {kit_id}"),
+                "possible_kits": int(row[i]),
+            }
+            for i, kit_id in enumerate(self.kit_ids)
+        ]
+        results.sort(key=lambda r: r["kit_name"])
+        return results
+
+    def kit_delta(self, warehouse_id, component_id, delta):
+        """
+        Change in a warehouse's total kits if one component's stock moved by delta.
+
+        Only the kits that use the component are recomputed.
+        """
+        w = self.warehouse_index.get(warehouse_id)
+        c = self.component_index.get(component_id)
+        if w is None or c is None:
+            return 0
+
+        change = 0
+        with self._lock:
+            possible = self.possible_kits()
+            for k in self.component_kits[c]:
+                comps = self.kit_components[k]
+                stock = self.quantity[w, comps] + np.where(comps == c, delta, 0)
+                kits_after = max(int((stock // self.bom[k, comps]).min()), 0)
+                change += kits_after - int(possible[w, k])
+        return change
+
+    def bottlenecks(self, warehouse_id):
+        """Maps each component that limits a kit at the warehouse to those kit ids"""
+        w = self.warehouse_index.get(warehouse_id)
+        if w is None:
+            return {}
+
+        limiting = {}
+        with self._lock:
+            for k, comps in enumerate(self.kit_components):
+                if len(comps) == 0:
+                    continue
+                ratios = self.quantity[w, comps] // self.bom[k, comps]
+                for c in comps[ratios == ratios.min()]:
+                    limiting.setdefault(int(self.component_ids[c]), []).append(
+                        int(self.kit_ids[k])
+                    )
+        return limiting
+
+    def inventory_snapshot(self):
+        """Copies of quantity, min_stock, max_stock and stocked for planning"""
+        with self._lock:
+            return (
+                self.quantity.copy(),
+                self.min_stock.copy(),
+                self.max_stock.copy(),
+                self.stocked.copy(),
+            )
+
+    def components_of(self, kit_id):
+        """Component ids in a kit's BOM"""
+        if kit_id not in self.kit_index:
+            return []
+        return [
+            int(self.component_ids[c])
+            for c in self.kit_components[self.kit_index[kit_id]]
+        ]
+
+    def apply_changes(self, changes):
+        """
+        Applies new inventory values and recomputes the affected cells only.
+
+        changes: iterable of dicts with warehouse_id, component_id, quantity
+        and optionally min_stock, max_stock and stocked.
+
+        Returns False without changing anything if a change references a
+        warehouse or component the engine does not know; the caller should
+        reload the engine in that case.
+        """
+        changes = list(changes)
+        cells = []
+        for change in changes:
+            w = self.warehouse_index.get(change["warehouse_id"])
+            c = self.component_index.get(change["component_id"])
+            if w is None or c is None:
+                return False
+            cells.append((w, c))
+
+        with self._lock:
+            possible = self.possible_kits()
+            affected = {}
+
+            for (w, c), change in zip(cells, changes):
+                self.quantity[w, c] = change["quantity"] or 0
+                if "min_stock" in change:
+                    self.min_stock[w, c] = change["min_stock"] or 0
+                if "max_stock" in change:
+                    self.max_stock[w, c] = change["max_stock"] or 0
+                if "stocked" in change:
+                    self.stocked[w, c] = change["stocked"]
+                affected.setdefault(w, set()).update(self.component_kits[c].tolist())
+
+            for w, kits in affected.items():
+                for k in kits:
+                    components = self.kit_components[k]
+                    kits_now = int(
+                        (self.quantity[w, components] // self.bom[k, components]).min()
+                    )
+                    kits_now = max(kits_now, 0)
+                    self._totals[w] += kits_now - possible[w, k]
+                    possible[w, k] = kits_now
+
+        return True
+
+    def refresh_cells(self, conn, cells):
+        """
+        Re-reads the given (warehouse_id, component_id) cells and applies them.
+
+        Cells without an inventory row are treated as zero stock.
+        """
+        cells = list(dict.fromkeys(cells))
+        found = {}
+        for start in range(0, len(cells), 400):
+            chunk = cells[start : start + 400]
+            placeholders = ", ".join(["(?, ?)"] * len(chunk))
+            rows = conn.execute(
+                f"""
+                WITH cells(warehouse_id, component_id) AS (VALUES {placeholders})
+                SELECT
+                    ai.warehouse_id,
+                    ai.component_id,
+                    MAX(ai.available, 0),
+                    ai.min_stock,
+                    ai.max_stock
+                FROM cells
+                JOIN available_inventory ai
+                    ON ai.warehouse_id = cells.warehouse_id
+                    AND ai.component_id = cells.component_id
+                """,
+                [value for cell in chunk for value in cell],
+            ).fetchall()
+            for row in rows:
+                found[(row[0], row[1])] = row
+
+        changes = []
+        for warehouse_id, component_id in cells:
+            row = found.get((warehouse_id, component_id))
+            changes.append(
+                {
+                    "warehouse_id": warehouse_id,
+                    "component_id": component_id,
+                    "quantity": row[2] if row else 0,
+                    "min_stock": row[3] if row else 0,
+                    "max_stock": row[4] if row else 0,
+                    "stocked": row is not None,
+                }
+            )
+        return self.apply_changes(changes)
+
+    def check_consistency(self, conn):
+        """
+        Compares the maintained state against a full recompute.
+
+        Returns a list of (warehouse_id, kit_id, cached, expected) tuples for
+        every cell that differs; an empty list means the cache is consistent.
+        """
+        fresh = KitCapacityEngine.from_connection(conn)
+        with self._lock:
+            cached = self.possible_kits().copy()
+            same_shape = np.array_equal(
+                fresh.warehouse_ids, self.warehouse_ids
+            ) and np.array_equal(fresh.kit_ids, self.kit_ids)
+
+        expected = fresh.possible_kits()
+        if not same_shape:
+            # Ids changed underneath the cache; report every expected cell
+            return [
+                (int(w), int(k), None, int(expected[i, j]))
+                for i, w in enumerate(fresh.warehouse_ids)
+                for j, k in enumerate(fresh.kit_ids)
+            ]
+
+        rows, cols = np.nonzero(cached != expected)
+        return [
+            (
+                int(self.warehouse_ids[i]),
+                int(self.kit_ids[j]),
+                int(cached[i, j]),
+                int(expected[i, j]),
+            )
+            for i, j in zip(rows, cols)
+        ]
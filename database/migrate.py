@@ -0,0 +1,92 @@
+import os
+import re
+import sqlite3
+import argparse
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Migration files are named NNNN_description.sql and applied in order
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def load_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Returns (version, name, sql) tuples sorted by version"""
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(migrations_dir, filename), "r") as migration_file:
+            migrations.append(
+                (int(match.group(1)), match.group(2), migration_file.read())
+            )
+
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir}")
+    return migrations
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(database, target_version=None, migrations_dir=MIGRATIONS_DIR):
+    """
+    Upgrades a database in place to target_version (default: latest).
+
+    The schema version is tracked in PRAGMA user_version, so a fresh database
+    built from schema.sql starts at 0. Each migration runs in its own
+    transaction together with the version bump.
+
+    Returns the list of versions that were applied.
+    """
+    conn = sqlite3.connect(database)
+    applied = []
+    try:
+        current = get_schema_version(conn)
+        for version, name, sql in load_migrations(migrations_dir):
+            if version <= current:
+                continue
+            if target_version is not None and version > target_version:
+                break
+
+            try:
+                conn.executescript(
+                    f"BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;"
+                )
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise RuntimeError(f"Migration {version:04d}_{name} failed: {e}")
+
+            applied.append(version)
+    finally:
+        conn.close()
+
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Apply pending schema migrations to a Kit Readiness database."
+    )
+    parser.add_argument(
+        "--db",
+        default="database/kit_readiness.db",
+        help="Path to the database (default: database/kit_readiness.db)",
+    )
+    parser.add_argument(
+        "--target",
+        type=int,
+        default=None,
+        help="Stop after this migration version (default: latest)",
+    )
+    args = parser.parse_args()
+
+    applied = apply_migrations(args.db, target_version=args.target)
+    if applied:
+        print(f"Applied migrations: {', '.join(f'{v:04d}' for v in applied)}")
+    else:
+        print("Database is up to date.")
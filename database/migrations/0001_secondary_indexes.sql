@@ -0,0 +1,10 @@
+-- Impact lookups and BOM joins that start from a component
+CREATE INDEX IF NOT EXISTS idx_kit_components_component ON kit_components (component_id, kit_id, quantity);
+
+-- Network-wide inventory reads for a single component
+CREATE INDEX IF NOT EXISTS idx_warehouse_inventory_component ON warehouse_inventory (component_id, warehouse_id, quantity);
+
+-- Transfers and shipments are listed newest first
+CREATE INDEX IF NOT EXISTS idx_warehouse_transfers_date ON warehouse_transfers (transfer_date);
+
+CREATE INDEX IF NOT EXISTS idx_end_shipments_date ON end_shipments (shipment_date);
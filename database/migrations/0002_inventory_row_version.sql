@@ -0,0 +1,12 @@
+-- Row version for optimistic concurrency on inventory edits
+ALTER TABLE warehouse_inventory ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+-- Writers that don't manage the version themselves still invalidate readers
+CREATE TRIGGER IF NOT EXISTS trg_warehouse_inventory_version
+AFTER UPDATE OF quantity, min_stock, max_stock ON warehouse_inventory
+WHEN NEW.version = OLD.version
+BEGIN
+    UPDATE warehouse_inventory
+    SET version = OLD.version + 1
+    WHERE warehouse_id = NEW.warehouse_id AND component_id = NEW.component_id;
+END;
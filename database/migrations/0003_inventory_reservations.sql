@@ -0,0 +1,158 @@
+-- Transfers and shipments are pending until completed or cancelled
+ALTER TABLE warehouse_transfers ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'completed', 'cancelled'));
+
+ALTER TABLE end_shipments ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'completed', 'cancelled'));
+
+-- Moves dated before the upgrade are history; later ones are still to happen
+UPDATE warehouse_transfers SET status = 'completed' WHERE transfer_date < date('now');
+
+UPDATE end_shipments SET status = 'completed' WHERE shipment_date < date('now');
+
+-- Stock committed to pending moves, per inventory cell. reserved is promised
+-- to outbound transfers and shipments, incoming is on its way in. Triggers
+-- below keep it current in the same transaction as the move itself.
+CREATE TABLE IF NOT EXISTS inventory_reservations (
+    warehouse_id INTEGER NOT NULL,
+    component_id INTEGER NOT NULL,
+    reserved INTEGER NOT NULL DEFAULT 0,
+    incoming INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (warehouse_id, component_id)
+) WITHOUT ROWID;
+
+INSERT INTO inventory_reservations (warehouse_id, component_id, reserved, incoming)
+SELECT warehouse_id, component_id, SUM(reserved), SUM(incoming)
+FROM (
+    SELECT source_warehouse_id AS warehouse_id, component_id, quantity AS reserved, 0 AS incoming
+    FROM warehouse_transfers WHERE status = 'pending'
+    UNION ALL
+    SELECT destination_warehouse_id, component_id, 0, quantity
+    FROM warehouse_transfers WHERE status = 'pending'
+    UNION ALL
+    SELECT s.warehouse_id, kc.component_id, kc.quantity * s.quantity, 0
+    FROM end_shipments s JOIN kit_components kc ON kc.kit_id = s.kit_id
+    WHERE s.status = 'pending'
+)
+GROUP BY warehouse_id, component_id;
+
+CREATE TRIGGER IF NOT EXISTS trg_transfer_reserve
+AFTER INSERT ON warehouse_transfers
+WHEN NEW.status = 'pending'
+BEGIN
+    INSERT INTO inventory_reservations (warehouse_id, component_id, reserved, incoming)
+    VALUES
+        (NEW.source_warehouse_id, NEW.component_id, NEW.quantity, 0),
+        (NEW.destination_warehouse_id, NEW.component_id, 0, NEW.quantity)
+    ON CONFLICT (warehouse_id, component_id) DO UPDATE SET
+        reserved = reserved + excluded.reserved,
+        incoming = incoming + excluded.incoming;
+END;
+
+-- Completing, cancelling or deleting a pending transfer releases it
+CREATE TRIGGER IF NOT EXISTS trg_transfer_release
+AFTER UPDATE OF status ON warehouse_transfers
+WHEN OLD.status = 'pending' AND NEW.status != 'pending'
+BEGIN
+    UPDATE inventory_reservations SET reserved = reserved - OLD.quantity
+    WHERE warehouse_id = OLD.source_warehouse_id AND component_id = OLD.component_id;
+    UPDATE inventory_reservations SET incoming = incoming - OLD.quantity
+    WHERE warehouse_id = OLD.destination_warehouse_id AND component_id = OLD.component_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transfer_release_deleted
+AFTER DELETE ON warehouse_transfers
+WHEN OLD.status = 'pending'
+BEGIN
+    UPDATE inventory_reservations SET reserved = reserved - OLD.quantity
+    WHERE warehouse_id = OLD.source_warehouse_id AND component_id = OLD.component_id;
+    UPDATE inventory_reservations SET incoming = incoming - OLD.quantity
+    WHERE warehouse_id = OLD.destination_warehouse_id AND component_id = OLD.component_id;
+END;
+
+-- A completed transfer moves the stock on hand
+CREATE TRIGGER IF NOT EXISTS trg_transfer_complete
+AFTER UPDATE OF status ON warehouse_transfers
+WHEN OLD.status = 'pending' AND NEW.status = 'completed'
+BEGIN
+    UPDATE warehouse_inventory SET quantity = quantity - OLD.quantity
+    WHERE warehouse_id = OLD.source_warehouse_id AND component_id = OLD.component_id;
+    INSERT INTO warehouse_inventory (warehouse_id, component_id, quantity)
+    VALUES (OLD.destination_warehouse_id, OLD.component_id, OLD.quantity)
+    ON CONFLICT (warehouse_id, component_id) DO UPDATE SET
+        quantity = quantity + excluded.quantity;
+END;
+
+-- Shipments reserve every component of the kit. Releases use the kit's
+-- components at release time, so kit definitions should not change while
+-- shipments of that kit are pending.
+CREATE TRIGGER IF NOT EXISTS trg_shipment_reserve
+AFTER INSERT ON end_shipments
+WHEN NEW.status = 'pending'
+BEGIN
+    INSERT INTO inventory_reservations (warehouse_id, component_id, reserved, incoming)
+    SELECT NEW.warehouse_id, kc.component_id, kc.quantity * NEW.quantity, 0
+    FROM kit_components kc
+    WHERE kc.kit_id = NEW.kit_id
+    ON CONFLICT (warehouse_id, component_id) DO UPDATE SET
+        reserved = reserved + excluded.reserved;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_shipment_release
+AFTER UPDATE OF status ON end_shipments
+WHEN OLD.status = 'pending' AND NEW.status != 'pending'
+BEGIN
+    UPDATE inventory_reservations
+    SET reserved = reserved - (
+        SELECT kc.quantity * OLD.quantity FROM kit_components kc
+        WHERE kc.kit_id = OLD.kit_id
+        AND kc.component_id = inventory_reservations.component_id
+    )
+    WHERE warehouse_id = OLD.warehouse_id
+    AND component_id IN (SELECT component_id FROM kit_components WHERE kit_id = OLD.kit_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_shipment_release_deleted
+AFTER DELETE ON end_shipments
+WHEN OLD.status = 'pending'
+BEGIN
+    UPDATE inventory_reservations
+    SET reserved = reserved - (
+        SELECT kc.quantity * OLD.quantity FROM kit_components kc
+        WHERE kc.kit_id = OLD.kit_id
+        AND kc.component_id = inventory_reservations.component_id
+    )
+    WHERE warehouse_id = OLD.warehouse_id
+    AND component_id IN (SELECT component_id FROM kit_components WHERE kit_id = OLD.kit_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_shipment_complete
+AFTER UPDATE OF status ON end_shipments
+WHEN OLD.status = 'pending' AND NEW.status = 'completed'
+BEGIN
+    UPDATE warehouse_inventory
+    SET quantity = quantity - (
+        SELECT kc.quantity * OLD.quantity FROM kit_components kc
+        WHERE kc.kit_id = OLD.kit_id
+        AND kc.component_id = warehouse_inventory.component_id
+    )
+    WHERE warehouse_id = OLD.warehouse_id
+    AND component_id IN (SELECT component_id FROM kit_components WHERE kit_id = OLD.kit_id);
+END;
+
+-- Available-to-promise: stock on hand less what pending moves have claimed.
+-- One primary-key lookup per cell on each side of the join.
+CREATE VIEW IF NOT EXISTS available_inventory AS
+SELECT
+    wi.warehouse_id,
+    wi.component_id,
+    wi.quantity,
+    wi.min_stock,
+    wi.max_stock,
+    wi.version,
+    COALESCE(r.reserved, 0) AS reserved,
+    COALESCE(r.incoming, 0) AS incoming,
+    wi.quantity - COALESCE(r.reserved, 0) AS available
+FROM warehouse_inventory wi
+LEFT JOIN inventory_reservations r
+    ON r.warehouse_id = wi.warehouse_id AND r.component_id = wi.component_id;
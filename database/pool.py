@@ -0,0 +1,210 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of SQLite connections.
+
+    A thread holds at most one connection at a time: nested checkouts on the
+    same thread reuse the connection it already has. Idle connections are
+    health checked before being handed out again and closed once they have
+    been idle for longer than idle_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        database,
+        max_size=5,
+        idle_timeout=300.0,
+        checkout_timeout=30.0,
+        on_connect=None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.on_connect = on_connect
+
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._idle = []  # stack of (connection, last_used), most recent last
+        self._size = 0  # open connections, idle or checked out
+        self._closed = False
+
+        # Counters used to size the pool
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.health_check_failures = 0
+        self.timeouts = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _evict_idle(self, now):
+        """Drops idle connections past idle_timeout. Caller holds the lock."""
+        if self.idle_timeout is None:
+            return []
+
+        expired = [c for c, last in self._idle if now - last > self.idle_timeout]
+        if expired:
+            self._idle = [
+                (c, last) for c, last in self._idle if now - last <= self.idle_timeout
+            ]
+            self._size -= len(expired)
+            self.evictions += len(expired)
+            self._cond.notify(len(expired))
+        return expired
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        conn = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                expired = self._evict_idle(time.monotonic())
+                for stale in expired:
+                    self._close_quietly(stale)
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise TimeoutError(
+                        f"No database connection available after {self.checkout_timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+        if conn is not None:
+            if self._is_healthy(conn):
+                with self._cond:
+                    self.hits += 1
+                return conn
+
+            with self._cond:
+                self.health_check_failures += 1
+            self._close_quietly(conn)
+
+        # Either a fresh slot or a replacement for an unhealthy connection
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self.misses += 1
+        return conn
+
+    def _checkin(self, conn):
+        # Never hand a half-finished transaction to the next caller
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                self._discard(conn)
+                return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the current thread."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+
+        if conn is not None:
+            # Nested checkout on this thread shares the outer connection
+            local.depth += 1
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._checkout()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+        finally:
+            local.conn = None
+            local.depth = 0
+            self._checkin(conn)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "health_check_failures": self.health_check_failures,
+                "timeouts": self.timeouts,
+            }
+
+    def close(self):
+        """Closes idle connections; checked-out ones close when returned."""
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
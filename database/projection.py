@@ -0,0 +1,189 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+HORIZON_DAYS = 90
+
+# Upper bound on the day x warehouse x component block built at once by
+# readiness(), to keep memory flat on large networks
+READINESS_CHUNK_ELEMENTS = 4_000_000
+
+
+class InventoryProjection:
+    """
+    Projected on-hand stock per (warehouse, component) over a horizon of days.
+
+    Starts from stock on hand and applies the pending transfers and shipments
+    on their scheduled dates; overdue moves count from day 0 and moves past
+    the horizon are left out. Events are kept sorted by cell and day with a
+    running total per cell, so the stock of every touched cell on any day is
+    one binary search away and no per-day queries are needed.
+
+    Kit counts reuse the engine's BOM, so they match the kit calculator.
+    """
+
+    def __init__(self, engine, on_hand, events, start=None, horizon_days=HORIZON_DAYS):
+        """
+        engine: KitCapacityEngine providing ids and the BOM.
+        on_hand: warehouse x component matrix aligned with the engine.
+        events: iterable of (date, warehouse_id, component_id, delta).
+        """
+        self.engine = engine
+        self.start = start or date.today()
+        self.horizon_days = horizon_days
+        self.on_hand = np.asarray(on_hand, dtype=np.int64)
+
+        n_components = len(engine.component_ids)
+        days, cells, deltas = [], [], []
+        for when, warehouse_id, component_id, delta in events:
+            w = engine.warehouse_index.get(warehouse_id)
+            c = engine.component_index.get(component_id)
+            day = max((when - self.start).days, 0)
+            if w is None or c is None or day > horizon_days:
+                continue
+            days.append(day)
+            cells.append(w * n_components + c)
+            deltas.append(delta)
+
+        days = np.array(days, dtype=np.int64)
+        cells = np.array(cells, dtype=np.int64)
+        deltas = np.array(deltas, dtype=np.int64)
+
+        # One key per event orders by cell, then day; cumulative sums within
+        # each cell give the net change up to and including that event
+        self._span = horizon_days + 1
+        keys = cells * self._span + days
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._cells = cells[order]
+        self._days = days[order]
+        self._deltas = deltas[order]
+        running = np.cumsum(self._deltas)
+        if len(order):
+            first = np.r_[True, self._cells[1:] != self._cells[:-1]]
+            cell_start = np.maximum.accumulate(
+                np.where(first, np.arange(len(order)), 0)
+            )
+            running -= np.r_[0, running][cell_start]
+        self._running = running
+
+        self.touched_cells = np.unique(cells)
+
+    @classmethod
+    def from_connection(cls, conn, engine, start=None, horizon_days=HORIZON_DAYS):
+        """Reads stock on hand and every pending move in one query per table"""
+        on_hand = np.zeros_like(engine.quantity)
+        for warehouse_id, component_id, quantity in conn.execute(
+            "SELECT warehouse_id, component_id, quantity FROM warehouse_inventory"
+        ):
+            w = engine.warehouse_index.get(warehouse_id)
+            c = engine.component_index.get(component_id)
+            if w is not None and c is not None:
+                on_hand[w, c] = quantity or 0
+
+        moves = conn.execute(
+            """
+            SELECT transfer_date, source_warehouse_id, component_id, -quantity
+            FROM warehouse_transfers WHERE status = 'pending'
+            UNION ALL
+            SELECT transfer_date, destination_warehouse_id, component_id, quantity
+            FROM warehouse_transfers WHERE status = 'pending'
+            UNION ALL
+            SELECT s.shipment_date, s.warehouse_id, kc.component_id,
+                -kc.quantity * s.quantity
+            FROM end_shipments s
+            JOIN kit_components kc ON kc.kit_id = s.kit_id
+            WHERE s.status = 'pending'
+            """
+        ).fetchall()
+        events = [
+            (date.fromisoformat(str(when)[:10]), w, c, delta)
+            for when, w, c, delta in moves
+        ]
+        return cls(engine, on_hand, events, start, horizon_days)
+
+    def day_of(self, when):
+        """Day index of a date within the horizon"""
+        if isinstance(when, str):
+            when = date.fromisoformat(when[:10])
+        day = (when - self.start).days
+        if not 0 <= day <= self.horizon_days:
+            raise ValueError(f"{when} is outside the projection horizon")
+        return day
+
+    def dates(self):
+        return [self.start + timedelta(days=d) for d in range(self.horizon_days + 1)]
+
+    def _changes_on(self, cells, day):
+        """Net change of each cell from the start through day"""
+        if len(self._keys) == 0:
+            return np.zeros(len(cells), dtype=np.int64)
+        last = np.searchsorted(self._keys, cells * self._span + day, side="right") - 1
+        valid = (last >= 0) & (self._cells[np.maximum(last, 0)] == cells)
+        return np.where(valid, self._running[np.maximum(last, 0)], 0)
+
+    def quantity_on(self, when, warehouse_id=None):
+        """
+        Projected stock on a date: the full warehouse x component matrix, or
+        one warehouse's row when warehouse_id is given.
+        """
+        day = self.day_of(when)
+        n_components = self.on_hand.shape[1]
+        cells = self.touched_cells
+        if warehouse_id is not None:
+            w = self.engine.warehouse_index[warehouse_id]
+            cells = cells[cells // n_components == w]
+            row = self.on_hand[w].copy()
+            row[cells % n_components] += self._changes_on(cells, day)
+            return row
+
+        quantity = self.on_hand.copy()
+        quantity.flat[cells] += self._changes_on(cells, day)
+        return quantity
+
+    def kits_on(self, warehouse_id, when):
+        """Completable kits of each type at a warehouse on a date"""
+        if warehouse_id not in self.engine.warehouse_index:
+            return {}
+        row = self.engine.kits_from(np.maximum(self.quantity_on(when, warehouse_id), 0))
+        return {int(k): int(n) for k, n in zip(self.engine.kit_ids, row)}
+
+    def readiness(self):
+        """
+        Total completable kits for every warehouse on every day of the horizon.
+
+        Returns a days x warehouses matrix. Warehouses without scheduled moves
+        are flat; the rest are built as a dense day x component block of
+        cumulative changes, in chunks bounded by READINESS_CHUNK_ELEMENTS.
+        """
+        engine = self.engine
+        n_days = self.horizon_days + 1
+        n_components = self.on_hand.shape[1]
+
+        base = engine.kits_from(np.maximum(self.on_hand, 0)).sum(axis=1)
+        totals = np.tile(base, (n_days, 1))
+
+        changed = np.unique(self._cells // n_components) if len(self._cells) else []
+        chunk = max(1, READINESS_CHUNK_ELEMENTS // (n_days * max(n_components, 1)))
+        for begin in range(0, len(changed), chunk):
+            warehouses = changed[begin : begin + chunk]
+            local = np.full(len(self.on_hand), -1, dtype=np.int64)
+            local[warehouses] = np.arange(len(warehouses))
+
+            event_w = local[self._cells // n_components]
+            mask = event_w >= 0
+            block = np.zeros((n_days, len(warehouses), n_components), dtype=np.int64)
+            np.add.at(
+                block,
+                (
+                    self._days[mask],
+                    event_w[mask],
+                    self._cells[mask] % n_components,
+                ),
+                self._deltas[mask],
+            )
+            projected = self.on_hand[warehouses] + np.cumsum(block, axis=0)
+            totals[:, warehouses] = engine.kits_from(np.maximum(projected, 0)).sum(
+                axis=2
+            )
+        return totals
@@ -0,0 +1,236 @@
+import time
+
+import numpy as np
+
+# Share of solve()'s time budget kept for scoring the finished plan
+SCORING_SHARE = 0.2
+
+
+class NetworkRebalancer:
+    """
+    Network-wide transfer planner that maximizes total completable kits.
+
+    Works on a snapshot of a KitCapacityEngine. Each step raises one kit type
+    at one warehouse by one completion, pulling the missing components from
+    the free stock of other warehouses. Free stock is what a warehouse holds
+    above both min_stock and what its own kits need, so a donation never
+    lowers the donor's kit count. Receivers are capped at max_stock and only
+    take components they already have an inventory row for. Every
+    (source, destination, component) transfer ships between min_transfer and
+    max_transfer units.
+
+    Upgrades that move the fewest units are taken first, round after round,
+    until nothing is feasible or the time budget runs out.
+    """
+
+    def __init__(self, engine, min_transfer=1, max_transfer=100):
+        if min_transfer < 1 or max_transfer < min_transfer:
+            raise ValueError("Transfer limits must satisfy 1 <= min <= max")
+
+        self.engine = engine
+        self.min_transfer = int(min_transfer)
+        self.max_transfer = int(max_transfer)
+
+        (
+            self.quantity,
+            self.min_stock,
+            self.max_stock,
+            self.stocked,
+        ) = engine.inventory_snapshot()
+        self.initial_quantity = self.quantity.copy()
+        self.bom = engine.bom
+        self.kit_components = engine.kit_components
+
+        # BOM entries grouped by component, so the stock a warehouse must keep
+        # for its own kits is one np.maximum.reduceat over each group
+        kit_idx, comp_idx = np.nonzero(self.bom)
+        order = np.argsort(comp_idx, kind="stable")
+        self._entry_kits = kit_idx[order]
+        self._entry_quantities = self.bom[kit_idx, comp_idx][order]
+        self._reserve_components, self._reserve_offsets = np.unique(
+            comp_idx[order], return_index=True
+        )
+
+        self.kits = engine.kits_from(self.quantity)
+        self.received = np.zeros_like(self.stocked)
+        self.free = self._free_stock(slice(None))
+        self.transfers = {}  # (source, destination, component) -> units
+
+    def _free_stock(self, rows):
+        """Units each warehouse in rows can give away without losing kits"""
+        quantity = self.quantity[rows]
+        reserve = np.zeros_like(quantity)
+        if len(self._entry_kits):
+            needed = self.kits[rows][..., self._entry_kits] * self._entry_quantities
+            reserve[..., self._reserve_components] = np.maximum.reduceat(
+                needed, self._reserve_offsets, axis=-1
+            )
+
+        floor = np.maximum(reserve, self.min_stock[rows])
+        # A warehouse never passes on a component it is receiving
+        donors = self.stocked[rows] & ~self.received[rows]
+        return np.where(donors, np.maximum(quantity - floor, 0), 0)
+
+    def _candidates(self):
+        """(units, warehouse, kit) upgrades that look feasible, cheapest first"""
+        supply = self.free.sum(axis=0)
+        capacity = self.max_stock - self.quantity
+        candidates = []
+
+        for k, comps in enumerate(self.kit_components):
+            if len(comps) == 0:
+                continue
+            target = (self.kits[:, k] + 1)[:, None] * self.bom[k, comps]
+            need = np.maximum(target - self.quantity[:, comps], 0)
+            ship = np.where(need > 0, np.maximum(need, self.min_transfer), 0)
+
+            feasible = (
+                self.stocked[:, comps].all(axis=1)
+                & (ship <= capacity[:, comps]).all(axis=1)
+                & (ship <= supply[comps] - self.free[:, comps]).all(axis=1)
+            )
+            units = ship.sum(axis=1)
+            candidates.extend(
+                (int(units[d]), int(d), k) for d in np.nonzero(feasible)[0]
+            )
+
+        candidates.sort()
+        return candidates
+
+    def _allocate(self, d, c, amount):
+        """Splits amount of component c for warehouse d over donors, or None"""
+        capacity = self.max_stock[d, c] - self.quantity[d, c]
+        moves = []
+        moved = 0
+
+        for s in np.argsort(-self.free[:, c], kind="stable"):
+            if moved >= amount:
+                break
+            available = int(self.free[s, c])
+            if available <= 0:
+                break
+            if s == d:
+                continue
+
+            shipped = self.transfers.get((int(s), d, c), 0)
+            take = min(available, self.max_transfer - shipped, amount - moved)
+            if shipped == 0 and take < self.min_transfer:
+                # A new transfer ships at least min_transfer units
+                take = self.min_transfer
+                if take > available:
+                    continue
+            if take <= 0 or moved + take > capacity:
+                continue
+
+            moves.append((int(s), take))
+            moved += take
+
+        return moves if moved >= amount else None
+
+    def _try_upgrade(self, d, k):
+        comps = self.kit_components[k]
+        target = (self.kits[d, k] + 1) * self.bom[k, comps]
+        need = np.maximum(target - self.quantity[d, comps], 0)
+
+        plan = []
+        for c, amount in zip(comps, need):
+            if amount == 0:
+                continue
+            moves = self._allocate(d, int(c), int(amount))
+            if moves is None:
+                return False
+            plan.extend((s, int(c), units) for s, units in moves)
+
+        for s, c, units in plan:
+            self.quantity[s, c] -= units
+            self.free[s, c] -= units
+            self.quantity[d, c] += units
+            self.received[d, c] = True
+            self.transfers[(s, d, c)] = self.transfers.get((s, d, c), 0) + units
+
+        # Donors only gave free stock, so only the receiver's row changes
+        self.kits[d] = self.engine.kits_from(self.quantity[d])
+        self.free[d] = self._free_stock(d)
+        return True
+
+    def _kit_gains(self, sources, destinations, components, units):
+        """
+        Kits the network loses if each transfer alone is dropped from the plan.
+
+        Transfers are grouped by component, since only kits that use it can
+        change, and each group is scored for all of its transfers at once.
+        """
+        gains = np.zeros(len(units), dtype=np.int64)
+        order = np.argsort(components, kind="stable")
+        groups, starts = np.unique(components[order], return_index=True)
+        for c, idx in zip(groups, np.split(order, starts[1:])):
+            s, d, moved = sources[idx], destinations[idx], units[idx]
+            for k in self.engine.component_kits[c]:
+                comps = self.kit_components[k]
+                per_kit = self.bom[k, comps]
+                col = int(np.searchsorted(comps, c))
+
+                source_without = self.quantity[s][:, comps]
+                source_without[:, col] += moved
+                dest_without = self.quantity[d][:, comps]
+                dest_without[:, col] -= moved
+
+                kits_without = np.maximum(
+                    (source_without // per_kit).min(axis=1), 0
+                ) + np.maximum((dest_without // per_kit).min(axis=1), 0)
+                gains[idx] += self.kits[s, k] + self.kits[d, k] - kits_without
+        return gains
+
+    def solve(self, time_budget=2.0):
+        """
+        Builds the plan and returns it with before/after network totals.
+
+        Each transfer's kit_gain is exact for the final plan: the drop in
+        total kits if that transfer alone were left out. Transfers that feed
+        the same upgrade each report its full gain, so gains do not add up
+        to the plan total.
+
+        The search stops early enough for scoring to fit in time_budget as
+        well; elapsed covers the whole call.
+        """
+        started = time.monotonic()
+        # Part of the budget is kept for scoring the plan once search stops
+        deadline = started + time_budget * (1 - SCORING_SHARE)
+        complete = False
+
+        while not complete and time.monotonic() < deadline:
+            upgraded = False
+            for _, d, k in self._candidates():
+                if time.monotonic() >= deadline:
+                    break
+                upgraded |= self._try_upgrade(d, k)
+            else:
+                complete = not upgraded
+
+        warehouse_ids = self.engine.warehouse_ids
+        component_ids = self.engine.component_ids
+        keys = np.array(list(self.transfers), dtype=np.int64).reshape(-1, 3)
+        units = np.array(list(self.transfers.values()), dtype=np.int64)
+        sources, destinations, components = keys.T
+        gains = self._kit_gains(sources, destinations, components, units)
+        transfers = [
+            {
+                "source_id": int(warehouse_ids[s]),
+                "dest_id": int(warehouse_ids[d]),
+                "component_id": int(component_ids[c]),
+                "quantity": int(moved),
+                "kit_gain": int(gain),
+                "source_remaining": int(self.quantity[s, c]),
+                "dest_new_total": int(self.quantity[d, c]),
+            }
+            for (s, d, c), moved, gain in zip(keys.tolist(), units.tolist(), gains)
+        ]
+        transfers.sort(key=lambda t: (-t["kit_gain"], t["quantity"]))
+
+        return {
+            "transfers": transfers,
+            "current_total": int(self.engine.kits_from(self.initial_quantity).sum()),
+            "planned_total": int(self.kits.sum()),
+            "complete": complete,
+            "elapsed": time.monotonic() - started,
+        }
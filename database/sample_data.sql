@@ -49,7 +49,7 @@ VALUES
     ('Southeast Facility', 'Miami, FL', 25.7617, -80.1918),
     ('Great Lakes Facility', 'Cleveland, OH', 41.4993, -81.6944),
     ('Northern Facility', 'Minneapolis, MN', 44.9778, -93.2650),
-    ('Plains Facility', 'Omaha, NE', 41.2565, -95.9345)
+    ('Plains Facility', 'Omaha, NE', 41.2565, -95.9345);
 
 -- Warehouse Inventory
 INSERT INTO
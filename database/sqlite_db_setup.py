@@ -2,6 +2,11 @@ import sqlite3
 import os
 import argparse
 
+try:
+    from database.migrate import apply_migrations
+except ImportError:  # run as a script from inside database/
+    from migrate import apply_migrations
+
 
 def init_database(overwrite=False):
     # Create database directory if it doesn't exist
@@ -15,7 +20,8 @@ def init_database(overwrite=False):
             print(f"Database '{db_path}' has been deleted.")
         else:
             print(
-                f"Database '{db_path}' already exists. Use --overwrite to overwrite it."
+                f"Database '{db_path}' already exists. Use --overwrite to overwrite it "
+                "or --migrate to upgrade it in place."
             )
             return
 
@@ -34,15 +40,35 @@ def init_database(overwrite=False):
 
         # Commit the changes
         conn.commit()
+
+        # WAL lets dashboard reads proceed while inventory saves are in flight
+        cursor.execute("PRAGMA journal_mode = WAL")
         print("Database initialized successfully!")
 
     except Exception as e:
         print(f"Error initializing database: {e}")
         conn.rollback()
+        return
 
     finally:
         conn.close()
 
+    migrate_database(db_path)
+
+
+def migrate_database(db_path="database/kit_readiness.db"):
+    """Brings an existing database up to the latest schema version"""
+    try:
+        applied = apply_migrations(db_path)
+    except Exception as e:
+        print(f"Error migrating database: {e}")
+        return
+
+    if applied:
+        print(f"Applied migrations: {', '.join(f'{v:04d}' for v in applied)}")
+    else:
+        print("Database schema is up to date.")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -53,6 +79,14 @@ if __name__ == "__main__":
         action="store_true",
         help="Overwrite the existing database if it exists.",
     )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Apply pending migrations to the existing database.",
+    )
     args = parser.parse_args()
 
-    init_database(overwrite=args.overwrite)
+    if args.migrate:
+        migrate_database()
+    else:
+        init_database(overwrite=args.overwrite)
@@ -1,34 +1,23 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc, dash_table
-import plotly.express as px
-from database.connector import get_all_warehouses
-from datetime import date
+from callback_components.map_callbacks import (
+    INITIAL_ZOOM,
+    LOCATION_TABLES,
+    build_base_map,
+)
+from database.connector import get_table_versions
+from database.projection import HORIZON_DAYS
+from datetime import date, timedelta
+
+# Rows per page in the paginated transfers and shipments tables
+PAGE_SIZE = 25
 
 
 ### This creates the initial layout
 def create_layout():
-    # Get warehouse data
-    warehouses = get_all_warehouses()
-
-    # Create map
-    fig = px.scatter_mapbox(
-        lat=[w["latitude"] for w in warehouses],
-        lon=[w["longitude"] for w in warehouses],
-        hover_name=[w["warehouse_name"] for w in warehouses],
-        zoom=3,
-        mapbox_style="carto-positron",
-    )
-
-    fig.update_layout(
-        mapbox=dict(
-            bearing=0,
-            pitch=0,
-        ),
-        margin={"r": 0, "t": 0, "l": 0, "b": 0},
-        showlegend=True,
-        paper_bgcolor="white",
-        plot_bgcolor="white",
-    )
+    # The map starts from the shared base figure; selections patch its overlays
+    fig = build_base_map()
+    map_version = get_table_versions(*LOCATION_TABLES)
 
     return html.Div(
         [
@@ -142,13 +131,222 @@ def create_layout():
                                 [
                                     html.Div(id="kit-calculation-results"),
                                     html.Div(id="kit-components-detail"),
+                                    dbc.Card(
+                                        [
+                                            dbc.CardHeader("Projected Kit Completions"),
+                                            dbc.CardBody(
+                                                [
+                                                    dbc.Label("Projection Date"),
+                                                    dcc.DatePickerSingle(
+                                                        id="projection-date",
+                                                        min_date_allowed=date.today(),
+                                                        max_date_allowed=date.today()
+                                                        + timedelta(days=HORIZON_DAYS),
+                                                        date=date.today(),
+                                                        className="mb-3 d-block",
+                                                    ),
+                                                    html.Div(id="projected-kits"),
+                                                    dcc.Graph(
+                                                        id="projection-graph",
+                                                        config={
+                                                            "displayModeBar": False
+                                                        },
+                                                    ),
+                                                ]
+                                            ),
+                                        ],
+                                        className="mt-4",
+                                    ),
                                 ],
                                 id="kit-calculator-container",
                                 style={"display": "none"},  # Hidden by default
                             ),
+                            # Paginated history tables; pages are fetched by callbacks
+                            html.Div(
+                                [
+                                    dbc.Card(
+                                        [
+                                            dbc.CardHeader("Component Transfers"),
+                                            dbc.CardBody(
+                                                dash_table.DataTable(
+                                                    id="transfers-table",
+                                                    row_selectable="single",
+                                                    selected_row_ids=[],
+                                                    columns=[
+                                                        {
+                                                            "name": "Transfer Date",
+                                                            "id": "transfer_date",
+                                                        },
+                                                        {
+                                                            "name": "From",
+                                                            "id": "source_warehouse",
+                                                        },
+                                                        {
+                                                            "name": "To",
+                                                            "id": "destination_warehouse",
+                                                        },
+                                                        {
+                                                            "name": "Component",
+                                                            "id": "component_name",
+                                                        },
+                                                        {
+                                                            "name": "Quantity",
+                                                            "id": "quantity",
+                                                            "type": "numeric",
+                                                        },
+                                                        {
+                                                            "name": "Status",
+                                                            "id": "status",
+                                                        },
+                                                    ],
+                                                    page_current=0,
+                                                    page_size=PAGE_SIZE,
+                                                    page_action="custom",
+                                                    sort_action="custom",
+                                                    sort_mode="single",
+                                                    filter_action="custom",
+                                                    filter_query="",
+                                                    style_table={"overflowX": "auto"},
+                                                    style_cell={
+                                                        "textAlign": "left",
+                                                        "padding": "10px",
+                                                    },
+                                                    style_header={
+                                                        "backgroundColor": "rgb(230, 230, 230)",
+                                                        "fontWeight": "bold",
+                                                    },
+                                                )
+                                            ),
+                                        ]
+                                    ),
+                                    dbc.ButtonGroup(
+                                        [
+                                            dbc.Button(
+                                                "Mark Completed",
+                                                id="complete-selected-transfer",
+                                                color="success",
+                                                size="sm",
+                                            ),
+                                            dbc.Button(
+                                                "Cancel Transfer",
+                                                id="cancel-selected-transfer",
+                                                color="secondary",
+                                                size="sm",
+                                            ),
+                                        ],
+                                        className="mt-3",
+                                    ),
+                                    html.Div(
+                                        id="transfer-status-message", className="mt-2"
+                                    ),
+                                    dcc.Store(id="transfers-table-cursors"),
+                                    dcc.Store(id="transfers-table-refresh", data=0),
+                                ],
+                                id="transfers-container",
+                                style={"display": "none"},  # Hidden by default
+                            ),
+                            html.Div(
+                                [
+                                    dbc.Card(
+                                        [
+                                            dbc.CardHeader("Kit Shipments"),
+                                            dbc.CardBody(
+                                                dash_table.DataTable(
+                                                    id="shipments-table",
+                                                    row_selectable="single",
+                                                    selected_row_ids=[],
+                                                    columns=[
+                                                        {
+                                                            "name": "Shipment Date",
+                                                            "id": "shipment_date",
+                                                        },
+                                                        {
+                                                            "name": "Warehouse",
+                                                            "id": "source_warehouse",
+                                                        },
+                                                        {
+                                                            "name": "Destination",
+                                                            "id": "destination_name",
+                                                        },
+                                                        {
+                                                            "name": "Kit",
+                                                            "id": "kit_name",
+                                                        },
+                                                        {
+                                                            "name": "Quantity",
+                                                            "id": "quantity",
+                                                            "type": "numeric",
+                                                        },
+                                                        {
+                                                            "name": "Status",
+                                                            "id": "status",
+                                                        },
+                                                    ],
+                                                    page_current=0,
+                                                    page_size=PAGE_SIZE,
+                                                    page_action="custom",
+                                                    sort_action="custom",
+                                                    sort_mode="single",
+                                                    filter_action="custom",
+                                                    filter_query="",
+                                                    style_table={"overflowX": "auto"},
+                                                    style_cell={
+                                                        "textAlign": "left",
+                                                        "padding": "10px",
+                                                    },
+                                                    style_header={
+                                                        "backgroundColor": "rgb(230, 230, 230)",
+                                                        "fontWeight": "bold",
+                                                    },
+                                                )
+                                            ),
+                                        ]
+                                    ),
+                                    dbc.ButtonGroup(
+                                        [
+                                            dbc.Button(
+                                                "Mark Completed",
+                                                id="complete-selected-shipment",
+                                                color="success",
+                                                size="sm",
+                                            ),
+                                            dbc.Button(
+                                                "Cancel Shipment",
+                                                id="cancel-selected-shipment",
+                                                color="secondary",
+                                                size="sm",
+                                            ),
+                                        ],
+                                        className="mt-3",
+                                    ),
+                                    html.Div(
+                                        id="shipment-status-message", className="mt-2"
+                                    ),
+                                    dcc.Store(id="shipments-table-cursors"),
+                                    dcc.Store(id="shipments-table-refresh", data=0),
+                                ],
+                                id="shipments-container",
+                                style={"display": "none"},  # Hidden by default
+                            ),
                             # Add rebalancing container
                             html.Div(
                                 [
+                                    dbc.RadioItems(
+                                        id="rebalance-mode",
+                                        options=[
+                                            {
+                                                "label": "Warehouse Pair",
+                                                "value": "pair",
+                                            },
+                                            {
+                                                "label": "Whole Network",
+                                                "value": "network",
+                                            },
+                                        ],
+                                        value="pair",
+                                        inline=True,
+                                        className="mb-3",
+                                    ),
                                     dbc.Row(
                                         [
                                             dbc.Col(
@@ -186,6 +384,7 @@ def create_layout():
                                                 width=5,
                                             ),
                                         ],
+                                        id="rebalance-pair-selectors",
                                         className="d-flex align-items-end justify-content-center",
                                     ),
                                     dbc.Row(
@@ -365,6 +564,9 @@ def create_layout():
                                 ),
                                 className="map-container",
                             ),
+                            html.Div(id="map-point-detail", className="mt-2 small"),
+                            dcc.Store(id="map-base-version", data=map_version),
+                            dcc.Store(id="map-zoom-level", data=INITIAL_ZOOM),
                             # Add shipment creation modal
                             dbc.Modal(
                                 [
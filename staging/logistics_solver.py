@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from datetime import date, timedelta
 import heapq
 import logging
+import time
 from contextlib import contextmanager
 from math import radians, cos, sin, asin, sqrt
 from collections import defaultdict
@@ -716,6 +717,63 @@ class InventoryManager:
 
         return suggestions
 
+    def get_component_balances(
+        self,
+    ) -> Dict[int, Tuple[Dict[int, int], Dict[int, int]]]:
+        """
+        Supply and demand of each component for network rebalancing
+
+        Supply is stock above min_stock. Demand is the shortfall of a kit's
+        limiting components up to the level its next-scarcest component
+        already supports, capped by max_stock. A warehouse short of a
+        component offers none of it as supply.
+
+        Returns:
+            component_id -> (supply by warehouse_id, demand by warehouse_id)
+        """
+        targets: Dict[Tuple[int, int], int] = defaultdict(int)
+        for kit in self.kits.values():
+            required = {
+                component_id: quantity
+                for component_id, quantity in (kit.components or {}).items()
+                if quantity > 0
+            }
+            if not required:
+                continue
+
+            for warehouse_id in self.warehouses:
+                ratios = {
+                    component_id: self.get_inventory(warehouse_id, component_id)
+                    // quantity
+                    for component_id, quantity in required.items()
+                }
+                limiting = min(ratios.values())
+                higher = [ratio for ratio in ratios.values() if ratio > limiting]
+                if not higher:
+                    continue
+
+                target_kits = min(higher)
+                for component_id, ratio in ratios.items():
+                    if ratio == limiting:
+                        key = (warehouse_id, component_id)
+                        targets[key] = max(
+                            targets[key], target_kits * required[component_id]
+                        )
+
+        balances: Dict[int, Tuple[Dict[int, int], Dict[int, int]]] = {}
+        for (warehouse_id, component_id), item in self.inventory.items():
+            supply, demand = balances.setdefault(component_id, ({}, {}))
+            shortfall = min(
+                max(0, targets.get((warehouse_id, component_id), 0) - item.quantity),
+                item.capacity_available,
+            )
+            if shortfall > 0:
+                demand[warehouse_id] = shortfall
+            elif item.excess_quantity > 0:
+                supply[warehouse_id] = item.excess_quantity
+
+        return balances
+
     def reset_to_initial_state(self):
         """Reset inventory to initial database state"""
         # Reload from database
@@ -745,6 +803,102 @@ class InventoryManager:
                 )
 
 
+class MinCostFlow:
+    """
+    Min-cost max-flow solver using successive shortest paths
+
+    Dijkstra runs on reduced costs (node potentials), which stays valid
+    because every edge starts with a non-negative cost.
+    """
+
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self.adjacency: List[List[int]] = [[] for _ in range(num_nodes)]
+        # Edge i and its residual twin i ^ 1 are stored side by side
+        self.to: List[int] = []
+        self.capacity: List[int] = []
+        self.cost: List[float] = []
+
+    def add_edge(
+        self, origin: int, destination: int, capacity: int, cost: float
+    ) -> int:
+        """Add a directed edge and return its id for reading the flow later"""
+        edge_id = len(self.to)
+        for node, target, cap, edge_cost in (
+            (origin, destination, capacity, cost),
+            (destination, origin, 0, -cost),
+        ):
+            self.adjacency[node].append(len(self.to))
+            self.to.append(target)
+            self.capacity.append(cap)
+            self.cost.append(edge_cost)
+        return edge_id
+
+    def flow(self, edge_id: int) -> int:
+        """Units sent along an edge returned by add_edge"""
+        return self.capacity[edge_id ^ 1]
+
+    def solve(self, source: int, sink: int) -> Tuple[int, float]:
+        """
+        Send as much flow as possible from source to sink at minimum cost
+
+        Returns:
+            Tuple of (total flow, total cost)
+        """
+        potential = [0.0] * self.num_nodes
+        total_flow = 0
+        total_cost = 0.0
+
+        while True:
+            dist = [float("inf")] * self.num_nodes
+            prev_edge = [-1] * self.num_nodes
+            dist[source] = 0.0
+            queue = [(0.0, source)]
+
+            while queue:
+                d, node = heapq.heappop(queue)
+                if d > dist[node]:
+                    continue
+                for edge_id in self.adjacency[node]:
+                    if self.capacity[edge_id] <= 0:
+                        continue
+                    target = self.to[edge_id]
+                    reduced = (
+                        d + self.cost[edge_id] + potential[node] - potential[target]
+                    )
+                    if reduced < dist[target] - 1e-9:
+                        dist[target] = reduced
+                        prev_edge[target] = edge_id
+                        heapq.heappush(queue, (reduced, target))
+
+            if dist[sink] == float("inf"):
+                break
+
+            for node in range(self.num_nodes):
+                if dist[node] < float("inf"):
+                    potential[node] += dist[node]
+
+            # Augment along the shortest path by its bottleneck capacity
+            push = float("inf")
+            node = sink
+            while node != source:
+                edge_id = prev_edge[node]
+                push = min(push, self.capacity[edge_id])
+                node = self.to[edge_id ^ 1]
+
+            node = sink
+            while node != source:
+                edge_id = prev_edge[node]
+                self.capacity[edge_id] -= push
+                self.capacity[edge_id ^ 1] += push
+                node = self.to[edge_id ^ 1]
+
+            total_flow += push
+            total_cost += push * (potential[sink] - potential[source])
+
+        return total_flow, total_cost
+
+
 class LogisticsSolver:
     """Solves logistics problems to find optimal routes for transfers and optimize delivery schedules"""
 
@@ -759,6 +913,10 @@ class LogisticsSolver:
         self.distances = {}
         self.generate_distance_matrix()
 
+        # Dense copy of self.distances for the flow solver, built on first use
+        self._distance_ids: List[int] = []
+        self._distance_array: Optional[np.ndarray] = None
+
         # Default scoring weights
         self.default_weights = {
             "distance": DEFAULT_DISTANCE_WEIGHT,
@@ -974,6 +1132,119 @@ class LogisticsSolver:
         dfs(origin_id, [origin_id], 0)
         return all_paths
 
+    def get_distance_array(self) -> Tuple[List[int], np.ndarray]:
+        """
+        Warehouse ids and a dense matrix of the distances between them
+
+        Built from the cached pairwise distances and reused across solves
+        until the set of warehouses changes.
+        """
+        warehouse_ids = sorted(self.inventory_manager.warehouses)
+        if self._distance_array is None or self._distance_ids != warehouse_ids:
+            matrix = np.zeros((len(warehouse_ids), len(warehouse_ids)))
+            for i, origin_id in enumerate(warehouse_ids):
+                for j, destination_id in enumerate(warehouse_ids):
+                    if i != j:
+                        matrix[i, j] = self.get_distance(origin_id, destination_id)
+            self._distance_ids = warehouse_ids
+            self._distance_array = matrix
+        return self._distance_ids, self._distance_array
+
+    def solve_min_cost_rebalance(
+        self,
+        component_ids: Optional[List[int]] = None,
+        max_range: float = None,
+    ) -> Dict:
+        """
+        Plan component transfers across all warehouses as min-cost flows
+
+        Each component is its own commodity: warehouses with supply ship to
+        warehouses with demand at a per-unit cost equal to the distance
+        between them. For every component the solver meets as much demand as
+        possible, then minimizes the total unit-miles shipped.
+
+        Args:
+            component_ids: Components to plan (default: all)
+            max_range: Leave out direct routes longer than this many miles
+
+        Returns:
+            Dictionary with transfers, total_cost in unit-miles, unmet_demand
+            by component and solve_time in seconds
+        """
+        start = time.perf_counter()
+        warehouse_ids, distances = self.get_distance_array()
+        index = {warehouse_id: i for i, warehouse_id in enumerate(warehouse_ids)}
+
+        transfers = []
+        unmet_demand = {}
+        total_cost = 0.0
+        solved = 0
+
+        balances = self.inventory_manager.get_component_balances()
+        for component_id, (supply, demand) in sorted(balances.items()):
+            if component_ids is not None and component_id not in component_ids:
+                continue
+
+            sources = sorted(w for w in supply if w in index)
+            sinks = sorted(w for w in demand if w in index)
+            total_demand = sum(demand[w] for w in sinks)
+            if not sinks:
+                continue
+
+            # Nodes: 0 = super source, then sources, then sinks, then super sink
+            flow = MinCostFlow(len(sources) + len(sinks) + 2)
+            sink_node = len(sources) + len(sinks) + 1
+            for i, warehouse_id in enumerate(sources):
+                flow.add_edge(0, 1 + i, supply[warehouse_id], 0.0)
+            for j, warehouse_id in enumerate(sinks):
+                flow.add_edge(
+                    1 + len(sources) + j, sink_node, demand[warehouse_id], 0.0
+                )
+
+            routes = []
+            for i, source_id in enumerate(sources):
+                for j, dest_id in enumerate(sinks):
+                    distance = float(distances[index[source_id], index[dest_id]])
+                    if max_range is not None and distance > max_range:
+                        continue
+                    edge_id = flow.add_edge(
+                        1 + i, 1 + len(sources) + j, demand[dest_id], distance
+                    )
+                    routes.append((edge_id, source_id, dest_id, distance))
+
+            shipped, cost = flow.solve(0, sink_node)
+            total_cost += cost
+            solved += 1
+
+            for edge_id, source_id, dest_id, distance in routes:
+                units = flow.flow(edge_id)
+                if units > 0:
+                    transfers.append(
+                        {
+                            "source_warehouse_id": source_id,
+                            "destination_warehouse_id": dest_id,
+                            "component_id": component_id,
+                            "quantity": units,
+                            "distance": distance,
+                        }
+                    )
+
+            if shipped < total_demand:
+                unmet_demand[component_id] = total_demand - shipped
+
+        solve_time = time.perf_counter() - start
+        logger.info(
+            f"Min-cost rebalance planned {len(transfers)} transfers for "
+            f"{solved} components in {solve_time:.3f}s"
+        )
+
+        return {
+            "transfers": transfers,
+            "total_cost": total_cost,
+            "unmet_demand": unmet_demand,
+            "solve_time": solve_time,
+        }
+
 
 if __name__ == "__main__":
     # Initialize InventoryManager and load data
@@ -12,6 +12,7 @@ from logistics_solver import (
     TransferRequest,
     RouteSegment,
     DeliveryRoute,
+    MinCostFlow,
 )
 
 @pytest.fixture
@@ -93,4 +94,35 @@ def test_delivery_route():
     route.add_segment(destination_id=2, segment=segment)
     assert route.total_distance > 0
     assert route.total_time > 0
-    assert route.path == [1, 2]
\ No newline at end of file
+    assert route.path == [1, 2]
+
+def test_min_cost_flow_uses_cheapest_edges():
+    flow = MinCostFlow(4)
+    flow.add_edge(0, 1, 10, 0.0)
+    cheap = flow.add_edge(1, 3, 4, 1.0)
+    expensive = flow.add_edge(1, 2, 10, 5.0)
+    flow.add_edge(2, 3, 10, 0.0)
+    total_flow, total_cost = flow.solve(0, 3)
+    assert total_flow == 10
+    assert flow.flow(cheap) == 4
+    assert flow.flow(expensive) == 6
+    assert total_cost == 34.0
+
+def test_solve_min_cost_rebalance(inventory_manager):
+    inventory_manager.warehouses[3] = Warehouse(id=3, name="Warehouse 3", location="Location 3", latitude=39.9526, longitude=-75.1652)
+    inventory_manager.kits = {
+        1: Kit(id=1, name="Kit A", description="Kit A", components={1: 1, 2: 1}),
+    }
+    inventory_manager.inventory[(3, 1)] = InventoryItem(component_id=1, warehouse_id=3, quantity=10, min_stock=0, max_stock=100)
+    inventory_manager.inventory[(3, 2)] = InventoryItem(component_id=2, warehouse_id=3, quantity=50, min_stock=0, max_stock=100)
+    solver = LogisticsSolver(inventory_manager)
+
+    plan = solver.solve_min_cost_rebalance()
+    moves = {(t["source_warehouse_id"], t["destination_warehouse_id"], t["component_id"]): t["quantity"] for t in plan["transfers"]}
+    # Both shortfalls are covered from the nearby warehouse rather than across the country
+    assert moves == {(1, 3, 1): 40, (3, 1, 2): 25}
+    assert plan["unmet_demand"] == {}
+    assert plan["solve_time"] >= 0
+
+    ids, distances = solver.get_distance_array()
+    assert solver.get_distance_array()[1] is distances
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import database.connector as connector
+from database.migrate import apply_migrations
+
+# The CVRP solver is a standalone script folder with flat imports
+CVRP_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cvrp")
+if CVRP_DIR not in sys.path:
+    sys.path.append(CVRP_DIR)
+
+
+@pytest.fixture(autouse=True)
+def reset_kit_engine():
+    """Keeps the shared kit engine from leaking between tests"""
+    connector.invalidate_kit_engine()
+    yield
+    connector.invalidate_kit_engine()
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Cached reads would otherwise leak between tests and databases"""
+    connector.clear_result_cache()
+    yield
+    connector.clear_result_cache()
+
+
+@pytest.fixture
+def sample_db(tmp_path):
+    """Builds a database from schema.sql and sample_data.sql, fully migrated"""
+    path = str(tmp_path / "kit_readiness.db")
+    conn = sqlite3.connect(path)
+    with open("database/schema.sql", "r") as schema_file:
+        conn.executescript(schema_file.read())
+    with open("database/sample_data.sql", "r") as data_file:
+        conn.executescript(data_file.read())
+    conn.commit()
+    conn.close()
+
+    apply_migrations(path)
+    return path
+
+
+@pytest.fixture
+def connector_db(sample_db, monkeypatch):
+    """Points the connector's pools at the sample database"""
+    connector.close_pool()
+    monkeypatch.setattr(connector, "DATABASE_PATH", sample_db)
+    yield sample_db
+    connector.close_pool()
+
+
+@pytest.fixture
+def cvrp_db(tmp_path):
+    """
+    Small CVRP network built from cvrp/database_schema.sql: two warehouses,
+    a refuel stop and five destinations, with routes between every pair.
+    """
+    path = str(tmp_path / "cvrp.db")
+    conn = sqlite3.connect(path)
+    with open(os.path.join(CVRP_DIR, "database_schema.sql"), "r") as schema_file:
+        conn.executescript(schema_file.read())
+
+    locations = [
+        (1, "Alpha Warehouse", "WAREHOUSE", 0.0, 0.0, 1, 1000),
+        (2, "Beta Warehouse", "WAREHOUSE", 0.0, 3.0, 1, 1000),
+        (3, "Refuel Stop", "REFUEL_POINT", 1.0, 1.5, 1, None),
+        (4, "Dest A", "DESTINATION", 0.0, 1.0, 0, None),
+        (5, "Dest B", "DESTINATION", 1.0, 0.0, 0, None),
+        (6, "Dest C", "DESTINATION", 0.0, 2.0, 0, None),
+        (7, "Dest D", "DESTINATION", 2.0, 1.5, 0, None),
+        (8, "Dest E", "DESTINATION", 1.0, 3.0, 0, None),
+    ]
+    conn.executemany("INSERT INTO locations VALUES (?, ?, ?, ?, ?, ?, ?)", locations)
+    conn.executemany(
+        "INSERT INTO vehicles VALUES (?, ?, ?, ?, ?, 0.5, 0.5, 0.5)",
+        [(1, "Van", 20, 250, 60), (2, "Truck", 60, 500, 50)],
+    )
+    conn.executemany(
+        "INSERT INTO vehicle_locations VALUES (?, ?, ?)",
+        [(1, 1, 2), (2, 1, 1), (1, 2, 2), (2, 2, 1)],
+    )
+    conn.executemany(
+        "INSERT INTO inventory_types VALUES (?, ?, NULL, ?, NULL)",
+        [(1, "Parts", 1), (2, "Crates", 5), (3, "Generator", 100)],
+    )
+    conn.executemany(
+        "INSERT INTO inventory VALUES (?, ?, ?)",
+        [(1, 1, 100), (1, 2, 20), (1, 3, 5), (2, 1, 100), (2, 2, 20)],
+    )
+    conn.executemany(
+        "INSERT INTO demand VALUES (?, ?, ?, ?, NULL)",
+        [
+            (4, 1, 10, 3),
+            (5, 2, 4, 2),
+            (6, 1, 15, 1),
+            (7, 1, 5, 2),
+            (7, 2, 2, 2),
+            (8, 1, 8, 1),
+        ],
+    )
+
+    # Straight-line routes between every pair, roughly 111 km per degree
+    routes = []
+    for origin in locations:
+        for destination in locations:
+            if origin is not destination:
+                distance = (
+                    111.0
+                    * (
+                        (origin[3] - destination[3]) ** 2
+                        + (origin[4] - destination[4]) ** 2
+                    )
+                    ** 0.5
+                )
+                routes.append((origin[0], destination[0], round(distance, 1)))
+    conn.executemany(
+        "INSERT INTO routes (origin_id, destination_id, distance_km) VALUES (?, ?, ?)",
+        routes,
+    )
+    conn.commit()
+    conn.close()
+    return path
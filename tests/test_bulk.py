@@ -0,0 +1,111 @@
+import csv
+import sqlite3
+
+import pytest
+
+from database.bulk import export_inventory, import_inventory
+
+
+@pytest.fixture
+def conn(sample_db):
+    conn = sqlite3.connect(sample_db)
+    # The sample data stocks a warehouse that does not exist; imports would
+    # rightly reject those rows
+    conn.execute(
+        "DELETE FROM warehouse_inventory "
+        "WHERE warehouse_id NOT IN (SELECT warehouse_id FROM warehouses)"
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def inventory(conn):
+    return {
+        (w, c): (q, lo, hi)
+        for w, c, q, lo, hi in conn.execute(
+            "SELECT warehouse_id, component_id, quantity, min_stock, max_stock "
+            "FROM warehouse_inventory"
+        )
+    }
+
+
+def test_import_upserts_and_rejects_bad_rows(conn, tmp_path):
+    before = inventory(conn)
+    (w, c), (_, min_stock, max_stock) = next(iter(before.items()))
+    conn.execute("INSERT INTO components (component_name) VALUES ('Bulk Widget')")
+    unstocked = conn.execute("SELECT MAX(component_id) FROM components").fetchone()[0]
+
+    path = write_csv(
+        tmp_path / "snapshot.csv",
+        ["warehouse_id", "component_id", "quantity"],
+        [
+            (w, c, 123),
+            (w, unstocked, 7),
+            (999, c, 1),
+            (w, 999, 1),
+            (w, c, "lots"),
+            (w, c, -1),
+        ],
+    )
+    progress = []
+    report = import_inventory(
+        conn, path, batch_size=2, progress=lambda *args: progress.append(args)
+    )
+
+    assert report["rows_read"] == 6
+    assert report["rows_upserted"] == 2
+    assert report["rows_rejected"] == 4
+    assert [line for line, _ in report["rejected_sample"]] == [4, 5, 6, 7]
+    assert progress and progress[-1][0] == "upserted"
+
+    after = inventory(conn)
+    # Stock limits are not in the file, so existing ones are kept
+    assert after[(w, c)] == (123, min_stock, max_stock)
+    assert after[(w, unstocked)][0] == 7
+    assert len(after) == len(before) + 1
+
+
+def test_dry_run_does_not_write(conn, tmp_path):
+    before = inventory(conn)
+    path = write_csv(
+        tmp_path / "snapshot.csv",
+        ["warehouse_id", "component_id", "quantity"],
+        [(w, c, 0) for (w, c) in before],
+    )
+
+    report = import_inventory(conn, path, dry_run=True)
+    assert report["rows_rejected"] == 0
+    assert report["rows_upserted"] == 0
+    assert inventory(conn) == before
+
+
+def test_missing_required_column(conn, tmp_path):
+    path = write_csv(tmp_path / "bad.csv", ["warehouse_id", "quantity"], [(1, 1)])
+    with pytest.raises(ValueError):
+        import_inventory(conn, path)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_export_round_trips(conn, tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"inventory.{fmt}")
+    before = inventory(conn)
+
+    assert export_inventory(conn, path, batch_size=7)["rows"] == len(before)
+
+    conn.execute("UPDATE warehouse_inventory SET quantity = 0, min_stock = 0")
+    conn.commit()
+    report = import_inventory(conn, path)
+
+    assert report["rows_upserted"] == len(before)
+    assert inventory(conn) == before
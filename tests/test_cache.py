@@ -0,0 +1,140 @@
+import sqlite3
+
+import pytest
+
+import database.connector as connector
+from database.cache import DiskBackend, MemoryBackend, ResultCache
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=2)
+    return DiskBackend(str(tmp_path / "cache.db"))
+
+
+def counting_read(cache, *tables):
+    calls = []
+
+    @cache.cached(*tables)
+    def read(x):
+        calls.append(x)
+        return [{"x": x}]
+
+    return read, calls
+
+
+def test_results_are_cached_until_a_table_is_bumped(backend):
+    cache = ResultCache(backend)
+    read, calls = counting_read(cache, "warehouses")
+
+    assert read(1) == read(1) == [{"x": 1}]
+    assert calls == [1]
+
+    cache.invalidate("kits")
+    read(1)
+    assert calls == [1]
+
+    cache.invalidate("warehouses")
+    read(1)
+    assert calls == [1, 1]
+    assert cache.stats()["hits"] == 2
+
+
+def test_callers_get_their_own_copy(backend):
+    cache = ResultCache(backend)
+    read, _ = counting_read(cache, "warehouses")
+
+    read(1)[0]["x"] = "changed"
+    assert read(1) == [{"x": 1}]
+
+
+def test_invalidate_all_bumps_every_declared_table(backend):
+    cache = ResultCache(backend)
+    read, calls = counting_read(cache, "audit_log")
+    before = cache.versions(["audit_log", "warehouses"])
+
+    read(1)
+    cache.invalidate_all()
+    read(1)
+    assert calls == [1, 1]
+    after = cache.versions(["audit_log", "warehouses"])
+    assert all(new > old for old, new in zip(before, after))
+
+
+def test_entries_expire_after_ttl(backend):
+    cache = ResultCache(backend, ttls={"warehouses": 0})
+    read, calls = counting_read(cache, "warehouses")
+
+    read(1)
+    read(1)
+    assert calls == [1, 1]
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = ResultCache(MemoryBackend(max_entries=2))
+    read, calls = counting_read(cache, "warehouses")
+
+    read(1)
+    read(2)
+    read(1)
+    read(3)  # evicts 2
+    read(1)
+    read(2)
+    assert calls == [1, 2, 3, 2]
+
+
+def test_disk_backend_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a = ResultCache(DiskBackend(path))
+    worker_b = ResultCache(DiskBackend(path))
+    read_a, calls_a = counting_read(worker_a, "warehouses")
+    read_b, calls_b = counting_read(worker_b, "warehouses")
+
+    read_a(1)
+    read_b(1)
+    assert calls_b == []
+
+    worker_a.invalidate("warehouses")
+    read_b(1)
+    assert calls_b == [1]
+
+
+def test_connector_writes_invalidate_cached_reads(connector_db):
+    before = connector.get_warehouse_inventory(1)
+    assert connector.get_warehouse_inventory(1) == before
+    assert connector.get_cache_stats()["hits"] >= 1
+
+    component_id = before[0]["component_id"]
+    assert connector.update_warehouse_inventory(
+        1, [{"component_id": component_id, "quantity": 7}]
+    )
+
+    after = {row["component_id"]: row for row in connector.get_warehouse_inventory(1)}
+    assert after[component_id]["quantity"] == 7
+
+
+def test_outside_writes_invalidate_cached_reads(connector_db):
+    before = connector.get_warehouse_inventory(1)
+    component_id = before[0]["component_id"]
+    versions = connector.get_table_versions("warehouse_inventory", "destinations")
+
+    conn = sqlite3.connect(connector_db)
+    conn.execute(
+        "UPDATE warehouse_inventory SET quantity = 7 "
+        "WHERE warehouse_id = 1 AND component_id = ?",
+        (component_id,),
+    )
+    conn.commit()
+    conn.close()
+
+    after = {row["component_id"]: row for row in connector.get_warehouse_inventory(1)}
+    assert after[component_id]["quantity"] == 7
+    # Which tables changed is unknown, so every version moves on
+    assert all(
+        new > old
+        for old, new in zip(
+            versions,
+            connector.get_table_versions("warehouse_inventory", "destinations"),
+        )
+    )
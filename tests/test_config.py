@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from database.config import configure_connection, enable_wal, get_connection_settings
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "config.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_enable_wal(db_path):
+    assert enable_wal(db_path) == "wal"
+
+
+def test_reader_is_query_only(db_path):
+    conn = sqlite3.connect(db_path)
+    configure_connection(conn, readonly=True)
+
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO t VALUES (2)")
+    conn.close()
+
+
+def test_reads_do_not_wait_on_open_write(db_path):
+    enable_wal(db_path)
+    writer = sqlite3.connect(db_path)
+    reader = sqlite3.connect(db_path)
+    configure_connection(writer)
+    configure_connection(
+        reader, readonly=True, settings={**get_connection_settings(), "busy_timeout": 0}
+    )
+
+    writer.execute("INSERT INTO t VALUES (2)")  # leaves the write transaction open
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+    writer.commit()
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
+    writer.close()
+    reader.close()
+
+
+def test_invalid_synchronous_mode_is_rejected(monkeypatch):
+    monkeypatch.setenv("DB_SYNCHRONOUS", "NORMAL; DROP TABLE t")
+    with pytest.raises(ValueError):
+        get_connection_settings()
@@ -0,0 +1,457 @@
+import itertools
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from cvrp_solver import CVRPSolver, haversine_matrix
+
+
+@pytest.fixture
+def solver(cvrp_db, tmp_path):
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    yield solver
+    solver.close()
+
+
+def test_distance_matrix_prefers_route_distances(cvrp_db, tmp_path):
+    conn = sqlite3.connect(cvrp_db)
+    conn.execute("DELETE FROM routes WHERE origin_id = 1 AND destination_id = 2")
+    conn.execute(
+        "UPDATE routes SET distance_km = 130 WHERE origin_id = 1 AND destination_id = 4"
+    )
+    conn.commit()
+    conn.close()
+
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        locations = [solver.locations[loc_id] for loc_id in solver.location_ids]
+        great_circle = haversine_matrix(
+            [loc.latitude for loc in locations], [loc.longitude for loc in locations]
+        )
+        index = solver.location_index
+
+        # Great circle distance where there is no route
+        assert solver.get_distance(1, 2) == pytest.approx(
+            great_circle[index[1], index[2]]
+        )
+        assert solver.get_distance(1, 4) == 130
+        assert solver.path_legs([1, 4, 6]) == [130, solver.distances[(4, 6)]]
+        assert solver.calculate_path_distance([1, 4, 6]) == pytest.approx(
+            130 + solver.distances[(4, 6)]
+        )
+    finally:
+        solver.close()
+
+
+def test_distance_matrix_is_cached_per_set_of_locations(cvrp_db, tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = CVRPSolver(cvrp_db, cache_dir=str(cache_dir))
+    first.close()
+    cached = os.listdir(cache_dir)
+    assert len(cached) == 1
+    assert cached[0].startswith("distances_") and cached[0].endswith(".npy")
+
+    second = CVRPSolver(cvrp_db, cache_dir=str(cache_dir))
+    second.close()
+    assert os.listdir(cache_dir) == cached
+    assert np.array_equal(second.distance_matrix, first.distance_matrix)
+
+    # Moving a location starts a new cache file and removes the old one
+    conn = sqlite3.connect(cvrp_db)
+    conn.execute("UPDATE locations SET latitude = 1.5 WHERE location_id = 8")
+    conn.commit()
+    conn.close()
+    third = CVRPSolver(cvrp_db, cache_dir=str(cache_dir))
+    third.close()
+    replaced = os.listdir(cache_dir)
+    assert len(replaced) == 1
+    assert replaced != cached
+
+
+def randomize_network(db_path, seed):
+    """Replace the fixture routes with random ones, refuel points and
+    vehicle restrictions."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    location_ids = [row[0] for row in conn.execute("SELECT location_id FROM locations")]
+    for loc_id in location_ids:
+        conn.execute(
+            "UPDATE locations SET refuel_capable = ? WHERE location_id = ?",
+            (int(rng.random() < 0.6), loc_id),
+        )
+    conn.execute("DELETE FROM routes")
+    for origin, destination in itertools.permutations(location_ids, 2):
+        if rng.random() < 0.5:
+            continue
+        restricted = rng.choice([None, None, None, "1", "2", "1,2"])
+        conn.execute(
+            """
+            INSERT INTO routes (origin_id, destination_id, distance_km,
+                                restricted_vehicle_types)
+            VALUES (?, ?, ?, ?)
+            """,
+            (origin, destination, round(rng.uniform(50, 300), 1), restricted),
+        )
+    conn.commit()
+    conn.close()
+    return rng
+
+
+def brute_force_distances(
+    solver, origin_id, destination_id, max_range, max_hops, vehicle_id
+):
+    """Sorted distances of every simple path find_all_paths may return."""
+    usable = {
+        key: distance
+        for key, distance in solver.distances.items()
+        if distance <= max_range
+        and vehicle_id not in solver.route_restrictions.get(key, ())
+    }
+    stops = [
+        loc_id
+        for loc_id in solver.location_ids
+        if solver.locations[loc_id].refuel_capable
+        and loc_id not in (origin_id, destination_id)
+    ]
+    found = []
+    for hops in range(max_hops + 1):
+        for middle in itertools.permutations(stops, hops):
+            path = [origin_id, *middle, destination_id]
+            legs = list(zip(path, path[1:]))
+            if all(leg in usable for leg in legs):
+                found.append(sum(usable[leg] for leg in legs))
+    return sorted(found)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_find_all_paths_matches_brute_force(cvrp_db, tmp_path, seed):
+    rng = randomize_network(cvrp_db, seed)
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        for _ in range(50):
+            origin_id, destination_id = rng.sample(solver.location_ids, 2)
+            max_range = rng.choice([120, 200, 300])
+            max_hops = rng.randint(0, 2)
+            max_paths = rng.randint(1, 6)
+            vehicle_id = rng.choice([None, 1, 2])
+
+            paths = solver.find_all_paths(
+                origin_id, destination_id, max_range, max_hops, max_paths, vehicle_id
+            )
+            expected = brute_force_distances(
+                solver, origin_id, destination_id, max_range, max_hops, vehicle_id
+            )[:max_paths]
+
+            assert len({tuple(path) for path in paths}) == len(paths)
+            for path in paths:
+                assert path[0] == origin_id and path[-1] == destination_id
+                assert len(path) <= max_hops + 2
+                assert len(set(path)) == len(path)
+            distances = [solver.calculate_path_distance(path) for path in paths]
+            assert distances == pytest.approx(expected)
+    finally:
+        solver.close()
+
+
+def test_path_searches_are_cached_across_runs(cvrp_db, tmp_path):
+    first = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        paths = first.find_all_paths(1, 8, 250, 2, 3)
+        assert paths
+        assert first.find_all_paths(1, 8, 250, 2, 3) == paths
+        # No route is between 250 and 251 km long, so the search is shared
+        assert first.find_all_paths(1, 8, 251, 2, 3) == paths
+        assert first.path_cache_stats()["hits"] == 2
+        assert first.path_cache_stats()["misses"] == 1
+        first.save_path_cache()
+        assert not first.unsaved_paths
+    finally:
+        first.close()
+
+    second = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        assert second.path_cache == first.path_cache
+        assert second.find_all_paths(1, 8, 250, 2, 3) == paths
+        assert second.path_cache_stats()["misses"] == 0
+    finally:
+        second.close()
+
+
+def test_path_cache_is_dropped_when_the_network_changes(cvrp_db, tmp_path):
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        solver.find_all_paths(1, 8, 250, 2, 3)
+        solver.save_path_cache()
+    finally:
+        solver.close()
+
+    conn = sqlite3.connect(cvrp_db)
+    conn.execute(
+        "UPDATE routes SET distance_km = 150 WHERE origin_id = 1 AND destination_id = 4"
+    )
+    conn.commit()
+    conn.close()
+
+    reloaded = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        assert reloaded.path_cache == {}
+    finally:
+        reloaded.close()
+    conn = sqlite3.connect(cvrp_db)
+    assert conn.execute("SELECT COUNT(*) FROM path_cache").fetchone()[0] == 0
+    conn.close()
+
+
+def delivery_plan(deliveries):
+    return [
+        (
+            d["origin"]["id"],
+            d["vehicle"]["id"],
+            [loc["id"] for loc in d["path"]],
+            d["loading"],
+        )
+        for d in deliveries
+    ]
+
+
+def test_parallel_solve_matches_serial_solve(cvrp_db, tmp_path):
+    serial = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "serial"))
+    parallel = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "parallel"))
+    try:
+        serial_deliveries, serial_stats = serial.solve()
+        parallel_deliveries, parallel_stats = parallel.solve(workers=2)
+    finally:
+        serial.close()
+        parallel.close()
+
+    assert serial_deliveries
+    assert delivery_plan(parallel_deliveries) == delivery_plan(serial_deliveries)
+    assert parallel_stats == serial_stats
+
+
+def test_worker_path_searches_are_merged_into_the_cache(cvrp_db, tmp_path):
+    serial = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "serial"))
+    parallel = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "parallel"))
+    try:
+        serial.solve()
+        parallel.solve(workers=2)
+
+        # Every search ran in a worker; the parent has them all, unsaved
+        assert parallel.path_cache
+        assert parallel.path_cache == serial.path_cache
+        assert parallel.unsaved_paths == set(parallel.path_cache)
+        assert parallel.path_cache_misses >= len(parallel.path_cache)
+
+        parallel.save_path_cache()
+        assert not parallel.unsaved_paths
+    finally:
+        serial.close()
+        parallel.close()
+
+    reloaded = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "parallel"))
+    try:
+        assert reloaded.path_cache == parallel.path_cache
+    finally:
+        reloaded.close()
+
+
+def set_demand(db_path, rows):
+    """Replace the fixture demand with (location_id, inventory_id, quantity)."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM demand")
+    conn.executemany("INSERT INTO demand VALUES (?, ?, ?, 1, NULL)", rows)
+    conn.commit()
+    conn.close()
+
+
+def delivered(deliveries, inventory_id):
+    return sum(d["loading"].get(inventory_id, 0) for d in deliveries)
+
+
+def test_demand_larger_than_a_vehicle_is_split_across_deliveries(cvrp_db, tmp_path):
+    set_demand(cvrp_db, [(4, 1, 90)])
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        deliveries, stats = solver.solve()
+    finally:
+        solver.close()
+
+    assert len(deliveries) > 1
+    assert delivered(deliveries, 1) == 90
+    assert stats["fulfilled_demand"] == 90
+    for delivery in deliveries:
+        assert delivery["destination_id"] == 4
+        assert delivery["loading"][1] <= delivery["vehicle"]["capacity"]
+
+
+def test_demand_larger_than_a_warehouse_is_split_across_warehouses(cvrp_db, tmp_path):
+    set_demand(cvrp_db, [(6, 1, 150)])
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        deliveries, stats = solver.solve()
+        remaining = solver.available_inventory
+    finally:
+        solver.close()
+
+    # Each warehouse holds 100 Parts; both have to send some
+    by_origin = {}
+    for delivery in deliveries:
+        by_origin[delivery["origin_id"]] = (
+            by_origin.get(delivery["origin_id"], 0) + delivery["loading"][1]
+        )
+    assert set(by_origin) == {1, 2}
+    assert sum(by_origin.values()) == 150
+    assert all(qty <= 100 for qty in by_origin.values())
+    assert remaining[1][1] + remaining[2][1] == 50
+
+
+def test_items_larger_than_every_vehicle_are_skipped(cvrp_db, tmp_path):
+    # A Generator takes 100 units of volume; the Truck carries 60
+    set_demand(cvrp_db, [(5, 3, 1), (5, 1, 10)])
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        deliveries, stats = solver.solve()
+        remaining = solver.available_inventory
+    finally:
+        solver.close()
+
+    assert delivered(deliveries, 1) == 10
+    assert delivered(deliveries, 3) == 0
+    assert remaining[1][3] == 5
+    assert stats["fulfilled_demand"] == 10
+
+
+@pytest.fixture
+def restricted_db(cvrp_db):
+    """Alpha Warehouse -> Dest A closed to Vans, with only Vans at Alpha."""
+    conn = sqlite3.connect(cvrp_db)
+    conn.execute(
+        "UPDATE routes SET restricted_vehicle_types = '1' "
+        "WHERE origin_id = 1 AND destination_id = 4"
+    )
+    conn.execute(
+        "DELETE FROM vehicle_locations WHERE location_id = 1 AND vehicle_type_id = 2"
+    )
+    conn.commit()
+    conn.close()
+    set_demand(cvrp_db, [(4, 1, 10)])
+    return cvrp_db
+
+
+def uses_leg(path, leg):
+    return leg in zip(path, path[1:])
+
+
+def test_restricted_route_is_only_closed_to_its_vehicle_type(restricted_db, tmp_path):
+    solver = CVRPSolver(restricted_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        van, truck = solver.vehicles[1], solver.vehicles[2]
+
+        assert solver.find_path(1, 4, van.range_km, 0, vehicle_id=van.id) is None
+        assert solver.find_path(1, 4, van.range_km, 2, vehicle_id=van.id) == [1, 3, 4]
+        for path in solver.find_all_paths(1, 4, van.range_km, 2, vehicle_id=van.id):
+            assert not uses_leg(path, (1, 4))
+
+        assert solver.find_path(1, 4, truck.range_km, 0, vehicle_id=truck.id) == [1, 4]
+        assert solver.find_all_paths(1, 4, truck.range_km, 2, vehicle_id=truck.id)[
+            0
+        ] == [1, 4]
+        assert solver.find_path(1, 4, van.range_km, 0) == [1, 4]
+    finally:
+        solver.close()
+
+
+def test_deliveries_avoid_routes_closed_to_their_vehicle(restricted_db, tmp_path):
+    from savings_solver import SavingsSolver
+
+    solver = CVRPSolver(restricted_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        greedy, _ = solver.solve()
+        savings, _ = SavingsSolver(solver).solve()
+    finally:
+        solver.close()
+
+    for deliveries in (greedy, savings):
+        vans_from_alpha = [
+            d for d in deliveries if d["origin_id"] == 1 and d["vehicle"]["id"] == 1
+        ]
+        assert vans_from_alpha
+        for delivery in deliveries:
+            if delivery["vehicle"]["id"] == 1:
+                assert not uses_leg(delivery["path_ids"], (1, 4))
+
+
+def saved_solution(db_path):
+    conn = sqlite3.connect(db_path)
+    deliveries = conn.execute(
+        """
+        SELECT delivery_id, vehicle_id, start_location_id, end_location_id,
+               start_time, end_time, total_distance_km, route_path
+        FROM deliveries ORDER BY delivery_id
+        """
+    ).fetchall()
+    items = conn.execute(
+        "SELECT delivery_id, inventory_id, quantity FROM delivery_items "
+        "ORDER BY delivery_id, inventory_id"
+    ).fetchall()
+    conn.close()
+    return deliveries, items
+
+
+def test_save_solution_replaces_the_previous_solution(solver, cvrp_db):
+    first, _ = solver.solve()
+    solver.save_solution(first)
+    deliveries, _ = solver.solve(max_vehicles=2)
+    assert 0 < len(deliveries) < len(first)
+
+    # Records without ids are matched to locations by name
+    without_ids = dict(deliveries[0])
+    for key in ("origin_id", "destination_id", "path_ids"):
+        del without_ids[key]
+    solver.save_solution([without_ids] + deliveries[1:])
+
+    rows, items = saved_solution(cvrp_db)
+    assert [row[:4] + row[6:] for row in rows] == [
+        (
+            delivery_id,
+            delivery["vehicle"]["id"],
+            delivery["origin_id"],
+            delivery["destination_id"],
+            delivery["distance"],
+            json.dumps(delivery["path_ids"]),
+        )
+        for delivery_id, delivery in enumerate(deliveries, start=1)
+    ]
+    for row, delivery in zip(rows, deliveries):
+        start, end = datetime.fromisoformat(row[4]), datetime.fromisoformat(row[5])
+        assert (end - start).total_seconds() == pytest.approx(
+            delivery["time"] * 3600, abs=1e-3
+        )
+    assert items == sorted(
+        (delivery_id, inv_id, qty)
+        for delivery_id, delivery in enumerate(deliveries, start=1)
+        for inv_id, qty in delivery["loading"].items()
+    )
+
+
+def test_workers_are_rejected_for_the_savings_algorithm(tmp_path, monkeypatch, capsys):
+    # cvrp/main.py writes database_schema.sql to the working directory
+    monkeypatch.chdir(tmp_path)
+    from main import parse_arguments
+
+    monkeypatch.setattr(
+        "sys.argv", ["main.py", "--algorithm", "savings", "--workers", "2"]
+    )
+    with pytest.raises(SystemExit):
+        parse_arguments()
+    assert "--workers only applies to --algorithm greedy" in capsys.readouterr().err
+
+    monkeypatch.setattr("sys.argv", ["main.py", "--workers", "2"])
+    assert parse_arguments().workers == 2
+    monkeypatch.setattr("sys.argv", ["main.py", "--algorithm", "savings"])
+    assert parse_arguments().workers == 1
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+import database.connector as connector
+from callback_components.inventory_callbacks import (
+    inventory_changes,
+    inventory_snapshot,
+)
+from database.connector import StaleWriteError
+
+
+def quantities(warehouse_id):
+    return {
+        row["component_id"]: (row["quantity"], row["version"])
+        for row in connector.get_warehouse_inventory(warehouse_id)
+    }
+
+
+def test_only_edited_rows_are_sent():
+    inventory = [
+        {"component_id": 1, "quantity": 5, "version": 0},
+        {"component_id": 2, "quantity": 8, "version": 3},
+    ]
+    table = [dict(row) for row in inventory]
+    table[1]["quantity"] = 9
+
+    assert inventory_changes(table, inventory_snapshot(inventory)) == [
+        {"component_id": 2, "quantity": 9, "version": 3}
+    ]
+    assert inventory_changes(inventory, inventory_snapshot(inventory)) == []
+
+
+def test_save_bumps_row_version(connector_db):
+    before = quantities(1)
+    component_id = next(iter(before))
+    _, version = before[component_id]
+
+    assert connector.update_warehouse_inventory(
+        1, [{"component_id": component_id, "quantity": 3, "version": version}]
+    )
+    assert quantities(1)[component_id] == (3, version + 1)
+
+
+def test_stale_save_is_rejected_whole(connector_db):
+    before = quantities(1)
+    fresh, stale = list(before)[:2]
+
+    # Another planner saves one of the rows first
+    assert connector.update_warehouse_inventory(
+        1, [{"component_id": stale, "quantity": 11, "version": before[stale][1]}]
+    )
+
+    with pytest.raises(StaleWriteError) as excinfo:
+        connector.update_warehouse_inventory(
+            1,
+            [
+                {"component_id": fresh, "quantity": 1, "version": before[fresh][1]},
+                {"component_id": stale, "quantity": 2, "version": before[stale][1]},
+            ],
+        )
+
+    assert excinfo.value.component_ids == [stale]
+    after = quantities(1)
+    assert after[fresh] == before[fresh]
+    assert after[stale][0] == 11
+
+
+def test_outside_writes_bump_the_version(connector_db):
+    component_id, (_, version) = next(iter(quantities(1).items()))
+
+    conn = sqlite3.connect(connector_db)
+    conn.execute(
+        "UPDATE warehouse_inventory SET quantity = quantity + 1 "
+        "WHERE warehouse_id = 1 AND component_id = ?",
+        (component_id,),
+    )
+    conn.commit()
+    conn.close()
+    connector.clear_result_cache()
+
+    with pytest.raises(StaleWriteError):
+        connector.update_warehouse_inventory(
+            1, [{"component_id": component_id, "quantity": 0, "version": version}]
+        )
@@ -0,0 +1,163 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import database.connector as connector
+from database.kit_engine import KitCapacityEngine
+
+
+@pytest.fixture
+def engine(sample_db):
+    conn = sqlite3.connect(sample_db)
+    engine = KitCapacityEngine.from_connection(conn)
+    conn.close()
+    return engine
+
+
+def sql_possible_kits(db_path, warehouse_id):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        """
+        SELECT kc.kit_id,
+               MIN(CAST(COALESCE(wi.quantity, 0) / kc.quantity AS INTEGER))
+        FROM kit_components kc
+        LEFT JOIN warehouse_inventory wi
+            ON wi.component_id = kc.component_id AND wi.warehouse_id = ?
+        GROUP BY kc.kit_id
+        """,
+        (warehouse_id,),
+    ).fetchall()
+    conn.close()
+    return {kit_id: max(kits, 0) for kit_id, kits in rows}
+
+
+def test_matches_sql_for_every_warehouse(engine, sample_db):
+    for warehouse_id in engine.warehouse_ids:
+        expected = sql_possible_kits(sample_db, int(warehouse_id))
+        actual = {
+            row["kit_id"]: row["possible_kits"]
+            for row in engine.possible_kits_for(int(warehouse_id))
+        }
+        assert actual == expected
+
+
+def test_kits_from_accepts_scenario_stacks(engine):
+    scenarios = np.stack([engine.quantity, engine.quantity * 2])
+    kits = engine.kits_from(scenarios)
+
+    assert kits.shape == (2,) + engine.possible_kits().shape
+    assert np.array_equal(kits[0], engine.possible_kits())
+    assert np.all(kits[1] >= kits[0])
+
+
+def test_unknown_warehouse(engine):
+    assert engine.possible_kits_for(999) == []
+    assert engine.total_kits(999) == 0
+
+
+def test_unknown_component_change_is_rejected(engine):
+    before = engine.possible_kits().copy()
+    change = {"warehouse_id": 1, "component_id": 999, "quantity": 5}
+
+    assert engine.apply_changes([change]) is False
+    assert np.array_equal(engine.possible_kits(), before)
+
+
+def test_kit_delta_matches_full_recompute(engine):
+    totals = engine.possible_kits().sum(axis=1)
+    for warehouse_id, w in engine.warehouse_index.items():
+        for component_id, c in engine.component_index.items():
+            for delta in (40, -min(25, engine.quantity[w, c])):
+                quantity = engine.quantity[w].copy()
+                quantity[c] += delta
+                expected = engine.kits_from(quantity).sum() - totals[w]
+                assert engine.kit_delta(warehouse_id, component_id, delta) == expected
+
+
+def test_bottlenecks_name_the_limiting_components(engine):
+    for warehouse_id, w in engine.warehouse_index.items():
+        for component_id, kit_ids in engine.bottlenecks(warehouse_id).items():
+            c = engine.component_index[component_id]
+            for kit_id in kit_ids:
+                k = engine.kit_index[kit_id]
+                assert (
+                    engine.quantity[w, c] // engine.bom[k, c]
+                    == engine.possible_kits()[w, k]
+                )
+
+
+def test_inventory_update_is_applied_incrementally(connector_db):
+    engine = connector.get_kit_engine()
+    assert engine.possible_kits_at(1, 1) > 0
+
+    assert connector.update_warehouse_inventory(1, [{"component_id": 1, "quantity": 0}])
+
+    assert connector.get_kit_engine() is engine
+    assert engine.possible_kits_at(1, 1) == 0
+    assert connector.check_kit_engine_consistency() == []
+
+
+def test_consistency_check_reports_drift(connector_db):
+    engine = connector.get_kit_engine()
+    engine.apply_changes([{"warehouse_id": 1, "component_id": 1, "quantity": 0}])
+
+    mismatches = connector.check_kit_engine_consistency()
+    assert [(w, k) for w, k, _, _ in mismatches] == [(1, 1)]
+
+
+def test_outside_write_reloads_engine(connector_db):
+    engine = connector.get_kit_engine()
+    assert connector.get_kit_engine() is engine
+
+    # A second connection stands in for another process, e.g. a bulk import
+    conn = sqlite3.connect(connector_db)
+    conn.execute(
+        "UPDATE warehouse_inventory SET quantity = 0 "
+        "WHERE warehouse_id = 1 AND component_id = 1"
+    )
+    conn.commit()
+    conn.close()
+
+    reloaded = connector.get_kit_engine()
+    assert reloaded is not engine
+    assert reloaded.possible_kits_at(1, 1) == 0
+    assert connector.check_kit_engine_consistency() == []
+
+
+def test_outside_write_after_connector_write_is_seen(connector_db):
+    engine = connector.get_kit_engine()
+    assert connector.update_warehouse_inventory(1, [{"component_id": 2, "quantity": 5}])
+    assert connector.get_kit_engine() is engine
+
+    conn = sqlite3.connect(connector_db)
+    conn.execute(
+        "UPDATE warehouse_inventory SET quantity = 0 "
+        "WHERE warehouse_id = 1 AND component_id = 1"
+    )
+    conn.commit()
+    conn.close()
+
+    assert connector.update_warehouse_inventory(1, [{"component_id": 3, "quantity": 5}])
+    assert connector.check_kit_engine_consistency() == []
+
+
+def test_shipment_racing_an_engine_load_reloads_it(connector_db, monkeypatch):
+    # Loaded by another thread from a snapshot taken before the shipment
+    stale = connector.get_kit_engine()
+    connector.invalidate_kit_engine()
+    kit_cells = connector._kit_cells
+
+    def load_during_write(warehouse_id, kit_id):
+        cells = kit_cells(warehouse_id, kit_id)
+        connector._kit_engine = stale
+        return cells
+
+    monkeypatch.setattr(connector, "_kit_cells", load_during_write)
+    kits = stale.possible_kits_at(1, 1)
+    assert kits > 0
+    assert connector.create_end_shipment(1, 1, 1, kits, "2030-01-01")
+
+    assert connector.get_kit_engine() is not stale
+    assert connector.get_kit_engine().possible_kits_at(1, 1) == 0
+    assert connector.check_kit_engine_consistency() == []
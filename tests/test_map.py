@@ -0,0 +1,152 @@
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from dash import Patch
+from dash.exceptions import PreventUpdate
+
+import callback_components.map_callbacks as map_callbacks
+import database.connector as connector
+from callback_components.map_callbacks import (
+    INITIAL_ZOOM,
+    LOCATION_TABLES,
+    OVERLAY_SLOTS,
+    OVERLAY_START,
+    build_base_map,
+    cluster_points,
+    register_map_callbacks,
+)
+
+
+class CallbackCollector:
+    def __init__(self):
+        self.callbacks = {}
+
+    def callback(self, *args, **kwargs):
+        def decorator(func):
+            self.callbacks[func.__name__] = func
+            return func
+
+        return decorator
+
+
+def map_callbacks_for_test():
+    app = CallbackCollector()
+    register_map_callbacks(app)
+    return app.callbacks
+
+
+def map_callback():
+    return map_callbacks_for_test()["update_map_with_selections"]
+
+
+@pytest.fixture(autouse=True)
+def trigger(monkeypatch):
+    """Stands in for the callback context; tests set the triggering id"""
+    context = SimpleNamespace(triggered_id="source-warehouse")
+    monkeypatch.setattr(map_callbacks, "ctx", context)
+    return context
+
+
+def test_base_map_has_hidden_overlay_slots(connector_db):
+    figure = build_base_map()
+    overlays = figure["data"][OVERLAY_START:]
+
+    assert len(overlays) == len(OVERLAY_SLOTS)
+    assert all(not trace["visible"] and not trace["lon"] for trace in overlays)
+    assert len(figure["data"][0]["lon"]) == len(connector.get_all_warehouses())
+
+
+def test_selection_patches_overlays_only(connector_db):
+    update = map_callback()
+    version = connector.get_table_versions(*LOCATION_TABLES)
+
+    figure, returned, level = update(1, 2, None, None, version, INITIAL_ZOOM)
+    assert isinstance(figure, Patch)
+    assert returned == version
+    assert level == INITIAL_ZOOM
+
+    operations = figure.to_plotly_json()["operations"]
+    touched = {op["location"][1] for op in operations}
+    assert touched == set(range(OVERLAY_START, OVERLAY_START + len(OVERLAY_SLOTS)))
+
+
+def test_location_write_sends_full_figure(connector_db):
+    update = map_callback()
+    stale = connector.get_table_versions(*LOCATION_TABLES)
+    build_base_map()
+
+    # Added by another process, e.g. a bulk load
+    conn = sqlite3.connect(connector_db)
+    conn.execute(
+        "INSERT INTO destinations (destination_name, latitude, longitude) "
+        "VALUES ('Test Outpost', 61.2, -149.9)"
+    )
+    conn.commit()
+    conn.close()
+
+    figure, version, _ = update(1, 2, 3, None, stale, INITIAL_ZOOM)
+    assert isinstance(figure, dict)
+    assert version != stale
+    destinations = figure["data"][1]
+    assert len(destinations["lat"]) == len(connector.get_all_destinations())
+    assert 61.2 in list(destinations["lat"])
+    assert -149.9 in list(destinations["lon"])
+
+    route, source, dest, highlight, active = figure["data"][OVERLAY_START:]
+    assert route["visible"] and len(route["lon"]) == 2
+    assert source["visible"] and dest["visible"]
+    assert highlight["visible"] and active["visible"]
+
+
+def test_clusters_cover_every_point():
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(25, 48, 2000)
+    lon = rng.uniform(-124, -67, 2000)
+
+    coarse = cluster_points(lat, lon, 2)
+    fine = cluster_points(lat, lon, 8)
+
+    assert coarse[2].sum() == fine[2].sum() == 2000
+    assert len(coarse[2]) < len(fine[2])
+    assert lat.min() <= coarse[0].min() and coarse[0].max() <= lat.max()
+
+
+def test_large_layers_are_clustered_until_zoomed_in(connector_db, monkeypatch):
+    monkeypatch.setenv("MAP_CLUSTER_THRESHOLD", "1")
+    warehouses = build_base_map(0)["data"][0]
+    assert sum(warehouses["customdata"]) == len(connector.get_all_warehouses())
+    assert len(warehouses["lat"]) < len(connector.get_all_warehouses())
+
+    close = build_base_map(map_callbacks.CLUSTER_MAX_ZOOM)["data"][0]
+    assert sorted(close["customdata"]) == sorted(
+        w["warehouse_id"] for w in connector.get_all_warehouses()
+    )
+
+
+def test_zoom_only_patches_layers_when_level_changes(connector_db, trigger):
+    trigger.triggered_id = "map-content"
+    update = map_callback()
+    version = connector.get_table_versions(*LOCATION_TABLES)
+
+    with pytest.raises(PreventUpdate):
+        update(None, None, None, {"mapbox.zoom": 3.7}, version, 3)
+    with pytest.raises(PreventUpdate):
+        update(None, None, None, {"mapbox.center": {}}, version, 3)
+
+    figure, _, level = update(None, None, None, {"mapbox.zoom": 11.2}, version, 3)
+    assert level == map_callbacks.CLUSTER_MAX_ZOOM
+    touched = {op["location"][1] for op in figure.to_plotly_json()["operations"]}
+    assert {0, 1} <= touched
+
+
+def test_clicking_a_point_shows_its_details(connector_db):
+    detail = map_callbacks_for_test()["show_location_detail"]
+    warehouse = connector.get_all_warehouses()[0]
+
+    shown = detail({"points": [{"curveNumber": 0, "customdata": 1}]}, INITIAL_ZOOM)
+    assert warehouse["warehouse_name"] in str(shown)
+
+    with pytest.raises(PreventUpdate):
+        detail({"points": [{"curveNumber": OVERLAY_START}]}, INITIAL_ZOOM)
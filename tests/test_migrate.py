@@ -0,0 +1,42 @@
+import sqlite3
+
+from database.migrate import apply_migrations, get_schema_version, load_migrations
+
+
+def test_fresh_database_is_fully_migrated(sample_db):
+    conn = sqlite3.connect(sample_db)
+    latest = load_migrations()[-1][0]
+    assert get_schema_version(conn) == latest
+
+    indexes = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    assert "idx_kit_components_component" in indexes
+    assert "idx_warehouse_transfers_date" in indexes
+    conn.close()
+
+
+def test_migrations_are_idempotent(sample_db):
+    assert apply_migrations(sample_db) == []
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    migrations_dir = tmp_path / "migrations"
+    migrations_dir.mkdir()
+    (migrations_dir / "0001_create.sql").write_text("CREATE TABLE a (x INTEGER);")
+    (migrations_dir / "0002_broken.sql").write_text(
+        "CREATE TABLE b (x INTEGER);\nNOT VALID SQL;"
+    )
+    db = str(tmp_path / "m.db")
+
+    try:
+        apply_migrations(db, migrations_dir=str(migrations_dir))
+    except RuntimeError:
+        pass
+
+    conn = sqlite3.connect(db)
+    assert get_schema_version(conn) == 1
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+    assert tables == {"a"}
+    conn.close()
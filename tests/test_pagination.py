@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+import database.connector as connector
+from callback_components.utils import parse_filter_query
+
+
+@pytest.fixture
+def history_db(connector_db):
+    """Sample database with enough transfer history to span several pages"""
+    conn = sqlite3.connect(connector_db)
+    conn.executemany(
+        """
+        INSERT INTO warehouse_transfers (
+            transfer_date, source_warehouse_id, destination_warehouse_id,
+            component_id, quantity
+        ) VALUES (?, ?, ?, ?, ?)
+        """,
+        [
+            (f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", 1 + i % 3, 4, 1 + i % 8, i % 7)
+            for i in range(60)
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return connector_db
+
+
+def walk_pages(page_size, sort_by=None, filters=None):
+    sort_column = sort_by[0] if sort_by else "transfer_date"
+    rows, after = [], None
+    while True:
+        page = connector.get_warehouse_transfers_page(
+            page_size, sort_by, filters, after
+        )
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        after = [page[-1][sort_column], page[-1]["transfer_id"]]
+
+
+@pytest.mark.parametrize(
+    "sort_by", [None, ("quantity", "asc"), ("source_warehouse", "desc")]
+)
+def test_keyset_pages_match_offset_pages(history_db, sort_by):
+    total = connector.count_warehouse_transfers()
+    keyset = walk_pages(7, sort_by)
+    offset = [
+        row
+        for start in range(0, total, 7)
+        for row in connector.get_warehouse_transfers_page(7, sort_by, offset=start)
+    ]
+
+    assert len(keyset) == total
+    assert keyset == offset
+    assert len({row["transfer_id"] for row in keyset}) == total
+
+
+def test_default_order_is_newest_first(history_db):
+    rows = walk_pages(10)
+    keys = [(row["transfer_date"], row["transfer_id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_filters_are_pushed_down(history_db):
+    filters = [("quantity", ">", 3), ("source_warehouse", "contains", "a")]
+    rows = walk_pages(5, filters=filters)
+
+    assert rows
+    assert len(rows) == connector.count_warehouse_transfers(filters)
+    assert all(row["quantity"] > 3 for row in rows)
+    assert all("a" in row["source_warehouse"].lower() for row in rows)
+
+
+def test_like_wildcards_in_filter_values_are_literal(history_db):
+    assert (
+        connector.count_warehouse_transfers([("component_name", "contains", "%")]) == 0
+    )
+
+
+def test_unsupported_filters_are_rejected(history_db):
+    with pytest.raises(ValueError):
+        connector.count_warehouse_transfers([("transfer_id; DROP", "=", 1)])
+    with pytest.raises(ValueError):
+        connector.get_end_user_shipments_page(10, ("scheduled_at", "asc"))
+
+
+def test_parse_filter_query():
+    assert parse_filter_query(
+        '{quantity} >= 5 && {component_name} contains "Flash light" && {kit_name} eq Alpha'
+    ) == [
+        ("quantity", ">=", 5),
+        ("component_name", "contains", "Flash light"),
+        ("kit_name", "=", "Alpha"),
+    ]
+    assert parse_filter_query("") == []
+    assert parse_filter_query("{quantity} ~ 5") == []
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from database.pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, checkout_timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    stats = pool.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+
+
+def test_nested_checkout_shares_thread_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        assert pool.stats()["in_use"] == 1
+
+
+def test_pool_is_bounded(pool):
+    results = []
+
+    def hold():
+        with pool.connection():
+            barrier.wait()
+            barrier.wait()
+
+    barrier = threading.Barrier(3)
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+
+    try:
+        with pool.connection():
+            results.append("acquired")
+    except TimeoutError:
+        results.append("timeout")
+
+    barrier.wait()
+    for t in threads:
+        t.join()
+
+    assert results == ["timeout"]
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_idle_connections_are_evicted(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), idle_timeout=0)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is not second
+    assert pool.stats()["evictions"] == 1
+    pool.close()
+
+
+def test_open_transaction_is_rolled_back_on_return(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
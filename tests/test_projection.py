@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import database.connector as connector
+from database.kit_engine import KitCapacityEngine
+from database.projection import InventoryProjection
+
+START = date(2030, 1, 1)
+HORIZON = 30
+
+
+@pytest.fixture
+def engine(sample_db):
+    conn = sqlite3.connect(sample_db)
+    engine = KitCapacityEngine.from_connection(conn)
+    conn.close()
+    return engine
+
+
+@pytest.fixture
+def events(engine):
+    rng = np.random.default_rng(7)
+    return [
+        (
+            START + timedelta(days=int(rng.integers(-5, HORIZON + 10))),
+            int(rng.choice(engine.warehouse_ids)),
+            int(rng.choice(engine.component_ids)),
+            int(rng.integers(-40, 40)),
+        )
+        for _ in range(300)
+    ]
+
+
+@pytest.fixture
+def projection(engine, events):
+    return InventoryProjection(engine, engine.quantity, events, START, HORIZON)
+
+
+def brute_force(engine, events, day):
+    quantity = engine.quantity.copy()
+    for when, warehouse_id, component_id, delta in events:
+        if max((when - START).days, 0) <= day:
+            w = engine.warehouse_index[warehouse_id]
+            c = engine.component_index[component_id]
+            quantity[w, c] += delta
+    return quantity
+
+
+def test_quantity_matches_brute_force(engine, events, projection):
+    for day in range(HORIZON + 1):
+        when = START + timedelta(days=day)
+        expected = brute_force(engine, events, day)
+        assert np.array_equal(projection.quantity_on(when), expected)
+
+        warehouse_id = int(engine.warehouse_ids[day % len(engine.warehouse_ids)])
+        w = engine.warehouse_index[warehouse_id]
+        assert np.array_equal(projection.quantity_on(when, warehouse_id), expected[w])
+
+
+def test_readiness_matches_point_queries(engine, projection):
+    totals = projection.readiness()
+    assert totals.shape == (HORIZON + 1, len(engine.warehouse_ids))
+
+    for day in (0, 7, HORIZON):
+        when = START + timedelta(days=day)
+        for i, warehouse_id in enumerate(engine.warehouse_ids):
+            kits = projection.kits_on(int(warehouse_id), when)
+            assert totals[day, i] == sum(kits.values())
+
+
+def test_readiness_chunks_agree(monkeypatch, projection):
+    whole = projection.readiness()
+    monkeypatch.setattr("database.projection.READINESS_CHUNK_ELEMENTS", 1)
+    assert np.array_equal(projection.readiness(), whole)
+
+
+def test_no_events_is_flat(engine):
+    projection = InventoryProjection(engine, engine.quantity, [], START, HORIZON)
+    totals = projection.readiness()
+
+    assert np.array_equal(totals[0], engine.possible_kits().sum(axis=1))
+    assert np.all(totals == totals[0])
+
+
+def test_dates_outside_horizon_are_rejected(projection):
+    with pytest.raises(ValueError):
+        projection.quantity_on(START - timedelta(days=1))
+    with pytest.raises(ValueError):
+        projection.kits_on(1, START + timedelta(days=HORIZON + 1))
+    assert projection.day_of(START.isoformat()) == 0
+
+
+def test_scheduled_transfer_shows_on_its_date(connector_db):
+    engine = connector.get_kit_engine()
+    warehouse_id, source_id = (int(w) for w in engine.warehouse_ids[:2])
+    kit_id = int(engine.kit_ids[0])
+    bom = engine.bom[engine.kit_index[kit_id]]
+    arrival = date.today() + timedelta(days=10)
+
+    def projected(when):
+        rows = connector.get_projected_kits(warehouse_id, when)
+        return next(r["possible_kits"] for r in rows if r["kit_id"] == kit_id)
+
+    before = projected(arrival)
+
+    # Enough of every component for 100 more kits arrives on the date
+    for component_id in engine.components_of(kit_id):
+        need = int(bom[engine.component_index[component_id]]) * 100
+        assert connector.create_warehouse_transfer(
+            source_id, warehouse_id, int(component_id), need, arrival.isoformat()
+        )
+
+    assert projected(arrival - timedelta(days=1)) == before
+    assert projected(arrival) >= before + 100
@@ -0,0 +1,145 @@
+"""
+EXPLAIN QUERY PLAN regression check for the connector queries.
+
+Every statement a connector function issues is captured and explained. A
+plain "SCAN <table>" step fails the test unless the function is expected to
+read that table in full.
+"""
+
+import re
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+import database.connector as connector
+
+# Tables each function legitimately reads end to end
+FULL_READS = {
+    "get_all_warehouses": {"warehouses"},
+    "get_kit_details": {"kits"},
+    "get_all_destinations": {"destinations"},
+    "get_warehouse_health_metrics": {"warehouses"},
+    "get_kit_components": {"kit_components"},
+    # The kit engine loads inventory and the BOM once for all warehouses
+    "calculate_possible_kits": {
+        "warehouses",
+        "components",
+        "kits",
+        "warehouse_inventory",
+        "kit_components",
+    },
+    "calculate_rebalance_suggestions": {
+        "warehouses",
+        "components",
+        "kits",
+        "warehouse_inventory",
+        "kit_components",
+    },
+    "calculate_network_rebalance": {
+        "warehouses",
+        "components",
+        "kits",
+        "warehouse_inventory",
+        "kit_components",
+    },
+    # Totals for the paginated tables count every matching row
+    "count_warehouse_transfers": {"warehouse_transfers"},
+    "count_end_user_shipments": {"end_shipments"},
+}
+
+CONNECTOR_QUERIES = [
+    ("get_all_warehouses", ()),
+    ("get_warehouse_inventory", (1,)),
+    ("get_kit_details", ()),
+    ("get_warehouse_health_metrics", ()),
+    ("get_kit_components", (1,)),
+    ("get_kit_components", ()),
+    ("calculate_possible_kits", (1,)),
+    ("calculate_rebalance_suggestions", (1, 4)),
+    ("calculate_network_rebalance", ()),
+    ("get_warehouse_transfers", ()),
+    ("get_end_user_shipments", ()),
+    ("get_warehouse_transfers_page", (25,)),
+    ("get_warehouse_transfers_page", (25, None, None, ["2024-06-01", 10])),
+    ("get_end_user_shipments_page", (25,)),
+    ("get_end_user_shipments_page", (25, None, None, ["2024-06-01", 10])),
+    ("count_warehouse_transfers", ()),
+    ("count_end_user_shipments", ()),
+    ("get_all_destinations", ()),
+    ("get_location", ("warehouse", 1)),
+    ("get_location", ("destination", 1)),
+]
+
+TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+SQL_KEYWORDS = {"ON", "WHERE", "JOIN", "LEFT", "INNER", "GROUP", "ORDER", "LIMIT"}
+
+
+def table_aliases(conn, sql):
+    """Maps every table alias in sql, including those inside views it reads"""
+    views = dict(
+        conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'")
+    )
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        if table in views:
+            aliases.update(table_aliases(conn, views[table]))
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(conn, sql):
+    """Returns the tables that the plan reads without using an index"""
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    subqueries = {
+        line.split()[-1]
+        for line in plan
+        if line.startswith(("CO-ROUTINE", "MATERIALIZE"))
+    }
+    aliases = table_aliases(conn, sql)
+
+    scanned = set()
+    for line in plan:
+        match = re.fullmatch(r"SCAN (\w+)", line)
+        if match and match.group(1) not in subqueries:
+            scanned.add(aliases.get(match.group(1), match.group(1)))
+    return scanned
+
+
+@pytest.fixture
+def traced_connector(sample_db, monkeypatch):
+    conn = sqlite3.connect(sample_db)
+    conn.row_factory = sqlite3.Row
+    statements = []
+
+    @contextmanager
+    def traced_connection(write=False):
+        conn.set_trace_callback(statements.append)
+        try:
+            yield conn
+        finally:
+            conn.set_trace_callback(None)
+
+    monkeypatch.setattr(connector, "get_db_connection", traced_connection)
+    yield conn, statements
+    conn.close()
+
+
+@pytest.mark.parametrize("function_name, args", CONNECTOR_QUERIES)
+def test_connector_queries_use_indexes(traced_connector, function_name, args):
+    conn, statements = traced_connector
+    getattr(connector, function_name)(*args)
+
+    queries = [
+        s for s in statements if s.lstrip().upper().startswith(("SELECT", "WITH"))
+    ]
+    assert queries, f"{function_name} issued no queries"
+
+    allowed = FULL_READS.get(function_name, set())
+    for sql in queries:
+        unexpected = full_scans(conn, sql) - allowed
+        assert (
+            not unexpected
+        ), f"{function_name} falls back to a full scan of {sorted(unexpected)}:\n{sql}"
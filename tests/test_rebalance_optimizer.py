@@ -0,0 +1,148 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import database.connector as connector
+from database.kit_engine import KitCapacityEngine
+from database.rebalance_optimizer import NetworkRebalancer
+
+
+@pytest.fixture
+def engine(sample_db):
+    conn = sqlite3.connect(sample_db)
+    engine = KitCapacityEngine.from_connection(conn)
+    conn.close()
+    return engine
+
+
+def apply_plan(engine, transfers):
+    quantity = engine.quantity.copy()
+    for t in transfers:
+        s = engine.warehouse_index[t["source_id"]]
+        d = engine.warehouse_index[t["dest_id"]]
+        c = engine.component_index[t["component_id"]]
+        quantity[s, c] -= t["quantity"]
+        quantity[d, c] += t["quantity"]
+    return quantity
+
+
+def test_plan_increases_network_kits(engine):
+    plan = NetworkRebalancer(engine).solve()
+
+    assert plan["complete"]
+    assert plan["current_total"] == engine.possible_kits().sum()
+    assert plan["planned_total"] > plan["current_total"]
+
+    after = engine.kits_from(apply_plan(engine, plan["transfers"]))
+    assert after.sum() == plan["planned_total"]
+    # Donations only come from free stock, so no warehouse loses kits
+    assert (after.sum(axis=1) >= engine.possible_kits().sum(axis=1)).all()
+
+
+def test_plan_respects_stock_and_transfer_limits(engine):
+    plan = NetworkRebalancer(engine, min_transfer=10, max_transfer=40).solve()
+    quantity = apply_plan(engine, plan["transfers"])
+
+    assert plan["transfers"]
+    for t in plan["transfers"]:
+        s = engine.warehouse_index[t["source_id"]]
+        d = engine.warehouse_index[t["dest_id"]]
+        c = engine.component_index[t["component_id"]]
+        assert 10 <= t["quantity"] <= 40
+        assert engine.stocked[d, c]
+        assert quantity[s, c] >= engine.min_stock[s, c]
+        assert quantity[d, c] <= engine.max_stock[d, c]
+
+
+def test_kit_gain_is_leave_one_out(engine):
+    plan = NetworkRebalancer(engine).solve()
+    gains = [t["kit_gain"] for t in plan["transfers"]]
+
+    assert gains == sorted(gains, reverse=True)
+    for i, t in enumerate(plan["transfers"]):
+        others = plan["transfers"][:i] + plan["transfers"][i + 1 :]
+        without = engine.kits_from(apply_plan(engine, others)).sum()
+        assert t["kit_gain"] == plan["planned_total"] - without
+
+
+def test_invalid_transfer_limits(engine):
+    with pytest.raises(ValueError):
+        NetworkRebalancer(engine, min_transfer=50, max_transfer=10)
+
+
+def test_connector_plan_has_names(connector_db):
+    plan = connector.calculate_network_rebalance(1, 100)
+
+    assert plan["transfers"]
+    first = plan["transfers"][0]
+    assert first["component"] and first["source"] and first["destination"]
+
+
+def test_pair_suggestions_report_exact_kit_deltas(connector_db):
+    engine = connector.get_kit_engine()
+    results = connector.calculate_rebalance_suggestions(5, 1)
+
+    assert results["suggestions"]
+    for row in results["suggestions"]:
+        quantity = engine.quantity.copy()
+        s = engine.warehouse_index[5]
+        d = engine.warehouse_index[1]
+        c = engine.component_index[row["component_id"]]
+        quantity[s, c] -= row["quantity"]
+        quantity[d, c] += row["quantity"]
+        after = engine.kits_from(quantity).sum(axis=1)
+        before = engine.possible_kits().sum(axis=1)
+
+        assert row["dest_kit_gain"] == after[d] - before[d]
+        assert row["source_kit_loss"] == before[s] - after[s]
+        assert row["net_kit_change"] == row["dest_kit_gain"] - row["source_kit_loss"]
+        if row["net_kit_change"] <= 0:
+            assert row["impact"] == "Low"
+
+    changes = [row["net_kit_change"] for row in results["suggestions"]]
+    assert changes == sorted(changes, reverse=True)
+    assert changes[0] > 0
+
+
+def synthetic_engine(warehouses, components, kits, seed=0):
+    rng = np.random.default_rng(seed)
+    engine = KitCapacityEngine()
+    engine.warehouse_ids = np.arange(1, warehouses + 1)
+    engine.component_ids = np.arange(1, components + 1)
+    engine.kit_ids = np.arange(1, kits + 1)
+    engine.warehouse_index = {int(w): i for i, w in enumerate(engine.warehouse_ids)}
+    engine.component_index = {int(c): i for i, c in enumerate(engine.component_ids)}
+    engine.kit_index = {int(k): i for i, k in enumerate(engine.kit_ids)}
+
+    shape = (warehouses, components)
+    engine.stocked = rng.random(shape) < 0.9
+    engine.quantity = np.where(engine.stocked, rng.integers(0, 500, shape), 0)
+    engine.min_stock = rng.integers(0, 50, shape)
+    engine.max_stock = engine.quantity + rng.integers(0, 500, shape)
+    engine.bom = np.zeros((kits, components), dtype=np.int64)
+    for k in range(kits):
+        used = rng.choice(components, 20, replace=False)
+        engine.bom[k, used] = rng.integers(1, 10, len(used))
+    engine._build_bom_entries()
+    return engine
+
+
+def test_solve_stays_within_time_budget():
+    engine = synthetic_engine(warehouses=150, components=1000, kits=30)
+    plan = NetworkRebalancer(engine).solve(time_budget=1.0)
+
+    assert not plan["complete"]
+    assert plan["transfers"]
+    assert plan["elapsed"] <= 1.0
+
+
+def test_kit_gain_is_leave_one_out_on_a_larger_network():
+    engine = synthetic_engine(warehouses=12, components=60, kits=6, seed=1)
+    plan = NetworkRebalancer(engine).solve(time_budget=30)
+    assert plan["complete"]
+
+    for i, t in enumerate(plan["transfers"]):
+        others = plan["transfers"][:i] + plan["transfers"][i + 1 :]
+        without = engine.kits_from(apply_plan(engine, others)).sum()
+        assert t["kit_gain"] == plan["planned_total"] - without
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+import database.connector as connector
+
+
+def cell(db, warehouse_id, component_id):
+    conn = sqlite3.connect(db)
+    row = conn.execute(
+        """
+        SELECT quantity, reserved, incoming, available FROM available_inventory
+        WHERE warehouse_id = ? AND component_id = ?
+        """,
+        (warehouse_id, component_id),
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def latest_id(db, table, key):
+    conn = sqlite3.connect(db)
+    value = conn.execute(f"SELECT MAX({key}) FROM {table}").fetchone()[0]
+    conn.close()
+    return value
+
+
+@pytest.fixture
+def stocked_component(connector_db):
+    """A component stocked at both warehouse 1 and warehouse 4"""
+    at_4 = {row["component_id"] for row in connector.get_warehouse_inventory(4)}
+    return next(
+        row["component_id"]
+        for row in connector.get_warehouse_inventory(1)
+        if row["component_id"] in at_4 and row["quantity"] >= 5
+    )
+
+
+def test_transfer_reserves_until_completed(connector_db, stocked_component):
+    c = stocked_component
+    source_before, dest_before = cell(connector_db, 1, c), cell(connector_db, 4, c)
+    engine = connector.get_kit_engine()
+
+    assert connector.create_warehouse_transfer(1, 4, c, 5, "2030-01-01")
+    assert cell(connector_db, 1, c) == (
+        source_before[0],
+        source_before[1] + 5,
+        source_before[2],
+        source_before[3] - 5,
+    )
+    assert cell(connector_db, 4, c)[2] == dest_before[2] + 5
+    # The engine plans with available stock
+    assert engine.quantity[engine.warehouse_index[1], engine.component_index[c]] == max(
+        source_before[3] - 5, 0
+    )
+
+    transfer_id = latest_id(connector_db, "warehouse_transfers", "transfer_id")
+    assert connector.set_transfer_status(transfer_id, "completed")
+    assert cell(connector_db, 1, c) == (
+        source_before[0] - 5,
+        source_before[1],
+        source_before[2],
+        source_before[3] - 5,
+    )
+    assert cell(connector_db, 4, c)[0] == dest_before[0] + 5
+    assert cell(connector_db, 4, c)[2] == dest_before[2]
+
+    assert not connector.set_transfer_status(transfer_id, "cancelled")
+    assert connector.check_kit_engine_consistency() == []
+
+
+def test_cancelled_transfer_only_releases(connector_db, stocked_component):
+    c = stocked_component
+    before = cell(connector_db, 1, c)
+
+    assert connector.create_warehouse_transfer(1, 4, c, 5, "2030-01-01")
+    transfer_id = latest_id(connector_db, "warehouse_transfers", "transfer_id")
+    assert connector.set_transfer_status(transfer_id, "cancelled")
+
+    assert cell(connector_db, 1, c) == before
+
+
+def test_shipment_reserves_kit_components(connector_db):
+    kit_id = 1
+    bom = {
+        row["component_id"]: row["required_quantity"]
+        for row in connector.get_kit_components()
+        if row["kit_id"] == kit_id
+    }
+    before = {c: cell(connector_db, 1, c) for c in bom}
+    kits_before = connector.get_kit_engine().possible_kits_at(1, kit_id)
+
+    assert connector.create_end_shipment(1, 1, kit_id, 2, "2030-01-01")
+    for c, qty in bom.items():
+        if before[c]:
+            assert cell(connector_db, 1, c)[1] == before[c][1] + 2 * qty
+    assert connector.get_kit_engine().possible_kits_at(1, kit_id) <= max(
+        kits_before - 2, 0
+    )
+
+    shipment_id = latest_id(connector_db, "end_shipments", "shipment_id")
+    assert connector.set_shipment_status(shipment_id, "completed")
+    for c, qty in bom.items():
+        if before[c]:
+            quantity, reserved, _, _ = cell(connector_db, 1, c)
+            assert quantity == before[c][0] - 2 * qty
+            assert reserved == before[c][1]
+    assert connector.check_kit_engine_consistency() == []
+
+
+def test_invalid_status(connector_db):
+    with pytest.raises(ValueError):
+        connector.set_transfer_status(1, "pending")
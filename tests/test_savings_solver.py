@@ -0,0 +1,147 @@
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from cvrp_solver import CVRPSolver
+from savings_solver import SavingsSolver
+
+
+@pytest.fixture
+def solver(cvrp_db, tmp_path):
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    yield solver
+    solver.close()
+
+
+def test_savings_solve_fulfills_reachable_demand(solver):
+    deliveries, stats = SavingsSolver(solver).solve()
+
+    assert deliveries
+    assert stats["fulfilled_demand"] == stats["total_demand"]
+    for delivery in deliveries:
+        path_ids = [loc["id"] for loc in delivery["path"]]
+        stop_ids = [stop["location"]["id"] for stop in delivery["stops"]]
+        assert stop_ids[-1] == delivery["destination"]["id"] == path_ids[-1]
+        assert set(stop_ids) <= set(path_ids)
+        assert (
+            sum(
+                qty * delivery["inventory_types"][inv_id]["volume_per_unit"]
+                for inv_id, qty in delivery["loading"].items()
+            )
+            <= delivery["vehicle"]["capacity"]
+        )
+
+
+def test_savings_routes_serve_several_stops(solver):
+    deliveries, _ = SavingsSolver(solver).solve()
+    greedy, _ = solver.solve()
+
+    multi_stop = [d for d in deliveries if len(d["stops"]) > 1]
+    assert multi_stop
+    for delivery in multi_stop:
+        unloaded = {}
+        for stop in delivery["stops"]:
+            for inv_id, qty in stop["unloading"].items():
+                unloaded[inv_id] = unloaded.get(inv_id, 0) + qty
+        assert unloaded == delivery["loading"]
+    assert len(deliveries) < len(greedy)
+
+
+def test_savings_skips_items_larger_than_every_vehicle(cvrp_db, tmp_path):
+    conn = sqlite3.connect(cvrp_db)
+    conn.execute("INSERT INTO demand VALUES (5, 3, 2, 3, NULL)")
+    conn.commit()
+    conn.close()
+    solver = CVRPSolver(cvrp_db, cache_dir=str(tmp_path / "cache"))
+    try:
+        deliveries, stats = SavingsSolver(solver).solve()
+        remaining = solver.available_inventory
+    finally:
+        solver.close()
+
+    assert not any(3 in delivery["loading"] for delivery in deliveries)
+    assert remaining[1][3] == 5
+    assert stats["fulfilled_demand"] == stats["total_demand"] - 2
+
+
+def test_time_budget_covers_route_construction(solver):
+    deliveries, stats = SavingsSolver(solver).solve(time_budget=0)
+
+    # Nothing was allocated, so nothing is taken from the warehouses
+    assert deliveries == []
+    assert stats["fulfilled_demand"] == 0
+    assert solver.solution_state.inventory.tolist() == (
+        solver.solution_state.initial_inventory.tolist()
+    )
+
+
+def test_savings_merges_stop_when_time_runs_out(solver):
+    savings = SavingsSolver(solver)
+    visits = savings._allocate_visits()
+    origin_id = max(visits, key=lambda origin_id: len(visits[origin_id]))
+    assert len(savings._savings_routes(origin_id, visits[origin_id])) < len(
+        visits[origin_id]
+    )
+
+    savings.deadline = time.perf_counter()
+    routes = savings._savings_routes(origin_id, visits[origin_id])
+    assert routes == [[visit] for visit in visits[origin_id]]
+
+
+def test_save_solution_keeps_each_stop(solver, cvrp_db, tmp_path, monkeypatch):
+    # cvrp/main.py writes database_schema.sql to the working directory
+    monkeypatch.chdir(tmp_path)
+    from main import save_solution_summary
+
+    deliveries, stats = SavingsSolver(solver).solve()
+    multi_stop = [d for d in deliveries if len(d["stops"]) > 1]
+    assert multi_stop
+
+    solver.save_solution(deliveries)
+    conn = sqlite3.connect(cvrp_db)
+    rows = conn.execute(
+        """
+        SELECT delivery_id, stop_number, location_id, inventory_id, quantity
+        FROM delivery_stops ORDER BY delivery_id, stop_number, inventory_id
+        """
+    ).fetchall()
+    conn.close()
+    expected = sorted(
+        (delivery_id, stop_number, stop["location"]["id"], inv_id, qty)
+        for delivery_id, delivery in enumerate(deliveries, start=1)
+        for stop_number, stop in enumerate(delivery["stops"], start=1)
+        for inv_id, qty in stop["unloading"].items()
+    )
+    assert rows == expected
+
+    save_solution_summary(deliveries, stats, str(tmp_path))
+    details = pd.read_csv(tmp_path / "delivery_details.csv")
+    row = details.iloc[deliveries.index(multi_stop[0])]
+    assert row["Stops"].split("; ") == [
+        stop["location"]["name"]
+        + ": "
+        + ", ".join(
+            f"{qty} {multi_stop[0]['inventory_types'][inv_id]['name']}"
+            for inv_id, qty in stop["unloading"].items()
+        )
+        for stop in multi_stop[0]["stops"]
+    ]
+
+
+def test_single_stop_deliveries_unload_at_the_destination(solver, cvrp_db):
+    deliveries, _ = solver.solve()
+    solver.save_solution(deliveries)
+
+    conn = sqlite3.connect(cvrp_db)
+    rows = conn.execute(
+        "SELECT delivery_id, stop_number, location_id, inventory_id, quantity "
+        "FROM delivery_stops ORDER BY delivery_id, inventory_id"
+    ).fetchall()
+    conn.close()
+    assert rows == sorted(
+        (delivery_id, 1, delivery["destination_id"], inv_id, qty)
+        for delivery_id, delivery in enumerate(deliveries, start=1)
+        for inv_id, qty in delivery["loading"].items()
+    )
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from solution_state import SolutionState
+
+
+@pytest.fixture
+def state():
+    return SolutionState(
+        location_ids=[10, 20, 30],
+        inventory_ids=[1, 2],
+        vehicle_ids=[7, 8],
+        inventory={10: {1: 5, 2: 3}, 20: {1: 4}},
+        vehicles={10: {8: 1, 7: 2}, 30: {7: 1}},
+    )
+
+
+def test_rollback_returns_to_the_checkpoint(state):
+    state.add_inventory(10, 1, -1)
+    outer = state.checkpoint()
+    state.add_inventory(10, 1, -2)
+    inner = state.checkpoint()
+    state.add_vehicles(10, 7, -1)
+    state.add_inventory(20, 1, -4)
+
+    state.rollback(inner)
+    assert state.vehicle_count(10, 7) == 2
+    assert state.inventory_at(20, 1) == 4
+    assert state.inventory_at(10, 1) == 2
+
+    state.rollback(outer)
+    assert state.inventory_at(10, 1) == 4
+
+
+def test_release_keeps_changes_and_stops_logging(state):
+    mark = state.checkpoint()
+    state.add_inventory(10, 2, -3)
+    state.release(mark)
+    assert state.inventory_at(10, 2) == 0
+
+    # With no checkpoint open, changes are not recorded at all
+    for _ in range(100):
+        state.add_vehicles(30, 7, 1)
+    assert state._log == []
+    assert state.vehicle_count(30, 7) == 101
+
+
+def test_released_inner_checkpoint_is_undone_by_outer_rollback(state):
+    outer = state.checkpoint()
+    inner = state.checkpoint()
+    state.add_inventory(20, 1, -1)
+    state.release(inner)
+    state.rollback(outer)
+    assert state.inventory_at(20, 1) == 4
+
+
+def test_copy_is_independent(state):
+    mark = state.checkpoint()
+    state.add_inventory(10, 1, -1)
+
+    copy = state.copy()
+    copy.add_inventory(10, 1, -2)
+    copy.add_vehicles(10, 8, -1)
+    assert state.inventory_at(10, 1) == 4
+    assert state.vehicle_count(10, 8) == 1
+
+    state.rollback(mark)
+    assert state.inventory_at(10, 1) == 5
+    assert copy.inventory_at(10, 1) == 2
+    assert copy.vehicles_at(10) == [(8, 0), (7, 2)]
+
+
+def test_rows_round_trip(state):
+    other = state.copy()
+    state.add_inventory(20, 1, -3)
+    state.add_vehicles(30, 7, -1)
+
+    inventory, vehicles = state.rows([30, 20])
+    other.set_rows([30, 20], inventory, vehicles)
+    assert np.array_equal(other.inventory, state.inventory)
+    assert np.array_equal(other.vehicles, state.vehicles)
+    assert other.inventory_dict() == state.inventory_dict()
+    assert other.vehicles_dict() == state.vehicles_dict()
+
+
+def test_reset_restores_the_initial_state(state):
+    state.checkpoint()
+    state.add_inventory(10, 2, -1)
+    state.add_vehicles(10, 7, -2)
+    state.reset()
+    assert state.inventory_dict() == {10: {1: 5, 2: 3}, 20: {1: 4}, 30: {}}
+    assert state.vehicles_dict() == {10: {8: 1, 7: 2}, 30: {7: 1}}
+    assert state._log == []